@@ -0,0 +1,210 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Generalized Feistel networks with 4-bit S-boxes, described by a spec file
+in ciphers/specs. The spec gives the S-box, the nibble permutation, the
+Feistel branches and the key schedule. The model of one round is compiled
+once into a template, which is shared by all rounds and models.
+
+Example spec (see ciphers/specs/twine.yaml):
+
+    name: twine
+    sbox: [0xC, 0x0, 0xF, 0xA, 0x2, 0xB, 0x9, 0x5, 0x8, 0x3, 0xD, 0x7, 0x1, 0xE, 0x6, 0x4]
+    perm: [5, 0, 1, 4, 7, 12, 3, 8, 13, 6, 9, 2, 15, 10, 11, 14]
+    branches: ...       # optional, [source, target] nibbles, default [2i, 2i+1]
+    keyaftersbox: False # optional, key added after the S-box (reference only)
+    keywords: 0         # optional, related-key: round i uses key word K[i % keywords]
+'''
+
+from parser import stpcommands
+from ciphers.cipher import AbstractCipher
+from ciphers import reference
+
+import os
+import yaml
+
+SPEC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "specs")
+
+
+class GFNCipher(AbstractCipher):
+    """
+    Represents the (related-key) differential behaviour of a generalized
+    Feistel network given by a spec.
+    """
+
+    def __init__(self, spec):
+        self.name = spec["name"]
+        self.sbox = list(spec["sbox"])
+        self.perm = list(spec["perm"])
+        self.branches = [tuple(branch) for branch in
+                         spec.get("branches", [[2*i, 2*i + 1] for i in range(len(self.perm) // 2)])]
+        self.keyAfterSbox = spec.get("keyaftersbox", False)
+        self.keyWords = spec.get("keywords", 0)
+        self.template = None
+
+        if sorted(self.perm) != list(range(len(self.perm))):
+            raise ValueError("{}: perm is not a permutation".format(self.name))
+        if len(self.sbox) != 16:
+            raise ValueError("{}: only 4-bit S-boxes are supported".format(self.name))
+        nibbles = [nibble for branch in self.branches for nibble in branch]
+        if len(set(nibbles)) != len(nibbles) or not set(nibbles) <= set(self.perm):
+            raise ValueError("{}: branches must use distinct nibbles".format(self.name))
+
+    def getFormatString(self):
+        """
+        Returns the print format.
+        """
+        if self.keyWords:
+            return ['X', 'S', 'K', 'w']
+        return ['X', 'S', 'w']
+
+    def createSTP(self, stp_filename, parameters):
+        """
+        Creates an STP file to find a characteristic with the given
+        parameters.
+        """
+
+        wordsize = parameters["wordsize"]
+        rounds = parameters["rounds"]
+        weight = parameters["sweight"]
+
+        if wordsize != 4 * len(self.perm):
+            raise ValueError("{} requires wordsize {}".format(self.name, 4 * len(self.perm)))
+
+        # S-box outputs and weights only exist for the branches
+        halfsize = 4 * len(self.branches)
+
+        with open(stp_filename, 'w') as stp_file:
+            header = ("% Input File for STP\n% {} w={}"
+                      "rounds={}\n\n\n".format(self.name, wordsize, rounds))
+            stp_file.write(header)
+
+            # Setup variables
+            # x = input, s = S-Box layer output, k = key difference, w = weight
+            x = ["X{}".format(i) for i in range(rounds + 1)]
+            s = ["S{}".format(i) for i in range(rounds)]
+            k = ["K{}".format(i) for i in range(self.keyWords)]
+            w = ["w{}".format(i) for i in range(rounds)]
+
+            stpcommands.setupVariables(stp_file, x, wordsize)
+            stpcommands.setupVariables(stp_file, s, halfsize)
+            if self.keyWords:
+                stpcommands.setupVariables(stp_file, k, wordsize)
+            stpcommands.setupVariables(stp_file, w, halfsize)
+
+            stpcommands.setupWeightComputation(stp_file, weight, w, halfsize, 0,
+                                               parameters["weightencoding"])
+
+            template = self.getRoundTemplate()
+            for i in range(rounds):
+                key = k[i % self.keyWords] if self.keyWords else ""
+                stp_file.write(template.format(x_in=x[i], s=s[i], w=w[i],
+                                               k=key, x_out=x[i+1]))
+
+            # Upper half of the key words is never used
+            for key in k:
+                stp_file.write("ASSERT(0bin{} = {}[{}:{}]);\n".format(
+                    "0" * (wordsize - halfsize), key, wordsize - 1, halfsize))
+
+            # No all zero characteristic
+            stpcommands.assertNonZero(stp_file, x, wordsize)
+            if self.keyWords:
+                stpcommands.assertNonZero(stp_file, k, wordsize)
+
+            # Iterative characteristics only
+            # Input difference = Output difference
+            if parameters["iterative"]:
+                stpcommands.assertVariableValue(stp_file, x[0], x[rounds])
+
+            for key, value in parameters["fixedVariables"].items():
+                stpcommands.assertVariableValue(stp_file, key, value)
+
+            for char in parameters["blockedCharacteristics"]:
+                stpcommands.blockCharacteristic(stp_file, char, wordsize)
+
+            stpcommands.setupQuery(stp_file)
+
+        return
+
+    def getRoundTemplate(self):
+        """
+        Returns the model of one round with the placeholders {x_in}, {s},
+        {w}, {k} and {x_out}.
+        """
+        if self.template is not None:
+            return self.template
+
+        def nibble(variable, index):
+            return "{{{0}}}[{1}:{2}]".format(variable, 4*index + 3, 4*index)
+
+        command = ""
+
+        # Substitution Layer
+        for i, (source, target) in enumerate(self.branches):
+            variables = ["{{x_in}}[{0}:{0}]".format(4*source + bit) for bit in range(3, -1, -1)]
+            variables += ["{{s}}[{0}:{0}]".format(4*i + bit) for bit in range(3, -1, -1)]
+            variables += ["{{w}}[{0}:{0}]".format(4*i + bit) for bit in range(3, -1, -1)]
+            command += stpcommands.add4bitSboxCompact(self.sbox, variables)
+
+        # Feistel structure and permutation layer in a single assignment
+        branch = {target: i for i, (source, target) in enumerate(self.branches)}
+        inverse = [0] * len(self.perm)
+        for j, position in enumerate(self.perm):
+            inverse[position] = j
+
+        words = []
+        for position in range(len(self.perm) - 1, -1, -1):
+            j = inverse[position]
+            word = nibble("x_in", j)
+            if j in branch:
+                word = "BVXOR({}, {})".format(word, nibble("s", branch[j]))
+                if self.keyWords:
+                    word = "BVXOR({}, {})".format(word, nibble("k", branch[j]))
+            words.append(word)
+        command += "ASSERT({{x_out}} = {});\n".format(" @ ".join(words))
+
+        self.template = command
+        return self.template
+
+    def getSbox(self):
+        #Returns sBox - Required for boomerang search
+        return self.sbox
+
+    def getSboxSize(self):
+        #Returns sBox size - Required for boomerang search
+        return 4
+
+    def getPerm(self):
+        #Returns permutation pattern - Required for boomerang search
+        return self.perm
+
+    def getDesign(self):
+        #Returns design paradigm ("gfn", "spn", "arx") - Required for boomerang search
+        return "gfn"
+
+    def getReference(self):
+        #Returns vectorized implementation - Required for empirical verification
+        #The references use independent round keys, hence there is none for related keys
+        if self.keyWords:
+            return None
+        return reference.GFNReference(self.sbox, self.perm, self.keyAfterSbox, self.branches)
+
+
+def loadSpecs(spec_dir=SPEC_DIR, reserved=()):
+    """
+    Returns the ciphers for all spec files in spec_dir by name. Specs of a
+    cipher in reserved are named <name>-gfn, the name is also used for the
+    cached bounds and differentials, which must not be shared with the
+    hand-written model.
+    """
+    ciphers = {}
+    for filename in sorted(os.listdir(spec_dir)):
+        if filename.endswith(".yaml"):
+            with open(os.path.join(spec_dir, filename), "r") as spec_file:
+                cipher = GFNCipher(yaml.safe_load(spec_file))
+            if cipher.name in reserved:
+                cipher.name = "{}-gfn".format(cipher.name)
+            ciphers[cipher.name] = cipher
+    return ciphers
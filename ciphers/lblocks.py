@@ -6,6 +6,7 @@ Created on Nov 3, 2021
 
 from parser import stpcommands
 from ciphers.cipher import AbstractCipher
+from ciphers import reference
 
 class LBlockSCipher(AbstractCipher):
     """
@@ -55,7 +56,9 @@ class LBlockSCipher(AbstractCipher):
             stpcommands.setupVariables(stp_file, r, wordsize)
             stpcommands.setupVariables(stp_file, w, wordsize)
 
-            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize)
+            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize,
+                                               encoding=parameters["weightencoding"],
+                                               zeroMSBs=wordsize // 2)
 
             for i in range(rounds):
                 self.setupLBlockSRound(stp_file, x[i], s[i], p[i], f[i], r[i], x[i+1], 
@@ -182,3 +185,7 @@ class LBlockSCipher(AbstractCipher):
     def getDesign(self):
         #Returns design paradigm ("gfn", "spn", "arx") - Required for boomerang search
         return "feistel"
+
+    def getReference(self):
+        #Returns vectorized implementation - Required for empirical verification
+        return reference.LBlockSReference(self.getSbox())
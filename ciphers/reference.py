@@ -0,0 +1,248 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Vectorized reference implementations used to verify characteristics and
+boomerangs empirically. The references are nibble-sliced: the state is an
+array of shape (nibbles, samples), where nibble j holds bits [4j+3:4j] of the
+STP words. The round keys are independent and uniformly random.
+
+For sampling, the rounds are compiled for a fixed key into bitsliced
+boolean operations on 64 samples at once (see BitslicedReference).
+'''
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class GFNReference(object):
+    """
+    Generalized Feistel network with 4-bit S-boxes (WARP, TWINE). In each
+    round S(x[a]) is added to x[b] for each branch (a, b), by default
+    (2i, 2i+1), and nibble j moves to perm[j].
+    """
+
+    def __init__(self, sbox, perm, keyAfterSbox=False, branches=None):
+        self.sbox = np.array(sbox, dtype=np.uint8)
+        self.perm = np.array(perm)
+        self.inverse = np.argsort(self.perm)
+        self.nibbles = len(perm)
+        if branches is None:
+            branches = [(2*i, 2*i + 1) for i in range(self.nibbles // 2)]
+        self.sources = np.array([a for a, b in branches])
+        self.targets = np.array([b for a, b in branches])
+        self.keyNibbles = len(branches)
+        self.keyAfterSbox = keyAfterSbox
+
+    def roundFunction(self, x, key):
+        if self.keyAfterSbox:
+            return self.sbox[x] ^ key
+        return self.sbox[x ^ key]
+
+    def encryptRound(self, state, key):
+        state = state.copy()
+        state[self.targets] ^= self.roundFunction(state[self.sources], key)
+        return state[self.inverse]
+
+    def decryptRound(self, state, key):
+        state = state[self.perm]
+        state[self.targets] ^= self.roundFunction(state[self.sources], key)
+        return state
+
+
+class LBlockSReference(object):
+    """
+    LBlock-s with the nibble order of ciphers/lblocks.py. The right half
+    (nibbles 0-7) is the input of F, the left half is rotated by 8 bits.
+    """
+
+    def __init__(self, sbox):
+        self.sbox = np.array(sbox, dtype=np.uint8)
+        # F output nibble j is S-box output fperm[j]
+        self.fperm = np.array([1, 3, 0, 2, 5, 7, 4, 6])
+        # Rotated nibble j is left nibble rotation[j]
+        self.rotation = np.array([(j + 6) % 8 for j in range(8)])
+        self.nibbles = 16
+        self.keyNibbles = 8
+
+    def function(self, x, key):
+        return self.sbox[x ^ key][self.fperm]
+
+    def encryptRound(self, state, key):
+        right = state[:8]
+        left = state[8:][self.rotation] ^ self.function(right, key)
+        return np.concatenate((left, right))
+
+    def decryptRound(self, state, key):
+        right = state[8:]
+        rotated = state[:8] ^ self.function(right, key)
+        left = np.empty_like(rotated)
+        left[self.rotation] = rotated
+        return np.concatenate((right, left))
+
+
+class SlimReference(object):
+    """
+    SLIM with the nibble order of ciphers/slim.py. The S-box output of the
+    right half is permuted bitwise before it is added to the left half.
+    """
+
+    def __init__(self, sbox, bitperm):
+        self.sbox = np.array(sbox, dtype=np.uint8)
+        self.nibbles = 8
+        self.keyNibbles = 4
+        # Bit permutation as table lookups on each S-box output
+        self.tables = np.zeros((4, 16), dtype=np.uint16)
+        for nibble in range(4):
+            for value in range(16):
+                for bit in range(4):
+                    if (value >> bit) & 1:
+                        self.tables[nibble][value] |= 1 << bitperm[4*nibble + bit]
+
+    def function(self, x, key):
+        s = self.sbox[x ^ key]
+        f = self.tables[0][s[0]] | self.tables[1][s[1]] | \
+            self.tables[2][s[2]] | self.tables[3][s[3]]
+        return np.stack([(f >> (4*j)) & 0xF for j in range(4)]).astype(np.uint8)
+
+    def encryptRound(self, state, key):
+        right = state[:4]
+        left = state[4:] ^ self.function(right, key)
+        return np.concatenate((left, right))
+
+    def decryptRound(self, state, key):
+        right = state[4:]
+        left = state[:4] ^ self.function(right, key)
+        return np.concatenate((right, left))
+
+
+class BitslicedReference(object):
+    """
+    Fast evaluation of a nibble-sliced reference. The state is a list of
+    bit planes, where bit b of all samples is packed into an array of 64-bit
+    words. Each round maps the nibbles independently and combines them by
+    XOR, hence for a fixed key every output bit is an XOR of monomials in
+    the bits of single input nibbles (algebraic normal form).
+    """
+
+    def __init__(self, ref):
+        self.ref = ref
+        self.nibbles = ref.nibbles
+        self.bits = 4 * ref.nibbles
+
+    def compileRound(self, roundFunction, key):
+        """
+        Returns the algebraic normal form of one round as list of
+        (constant, terms) for each output bit, where terms is a list of
+        (nibble, monomial).
+        """
+        state = np.zeros((self.nibbles, 16 * self.nibbles), dtype=np.uint8)
+        for j in range(self.nibbles):
+            state[j, 16*j:16*(j+1)] = np.arange(16)
+
+        zero = roundFunction(np.zeros((self.nibbles, 1), dtype=np.uint8), key)
+        contribution = (roundFunction(state, key) ^ zero).reshape(self.nibbles, self.nibbles, 16)
+
+        # anf[b, j, m] is set if monomial m of input nibble j is in output bit b
+        anf = np.stack([(contribution[b // 4] >> (b % 4)) & 1 for b in range(self.bits)])
+        for i in range(4):
+            for value in range(16):
+                if value & (1 << i):
+                    anf[:, :, value] ^= anf[:, :, value ^ (1 << i)]
+
+        compiled = []
+        for b in range(self.bits):
+            nibbles, monomials = np.nonzero(anf[b])
+            compiled.append(((int(zero[b // 4, 0]) >> (b % 4)) & 1,
+                             list(zip(nibbles.tolist(), monomials.tolist()))))
+        return compiled
+
+    def compile(self, keys):
+        """
+        Returns the encryption and decryption rounds for the round keys.
+        """
+        decryption = [self.compileRound(self.ref.decryptRound, key) for key in keys[::-1]]
+        return self.compileEncryption(keys), decryption
+
+    def compileEncryption(self, keys):
+        return [self.compileRound(self.ref.encryptRound, key) for key in keys]
+
+    def apply(self, state, rounds):
+        for compiled in rounds:
+            state = self.applyRound(state, compiled)
+        return state
+
+    def applyRound(self, state, compiled):
+        monomials = {}
+
+        def monomial(nibble, value):
+            if (nibble, value) not in monomials:
+                low = value & -value
+                if low == value:
+                    monomials[(nibble, value)] = state[4*nibble + low.bit_length() - 1]
+                else:
+                    monomials[(nibble, value)] = monomial(nibble, low) & monomial(nibble, value ^ low)
+            return monomials[(nibble, value)]
+
+        output = []
+        for constant, terms in compiled:
+            if not terms:
+                plane = np.zeros_like(state[0])
+            elif len(terms) == 1:
+                plane = monomial(*terms[0])
+            else:
+                plane = monomial(*terms[0]) ^ monomial(*terms[1])
+                for term in terms[2:]:
+                    plane ^= monomial(*term)
+            if constant:
+                plane = ~plane
+            output.append(plane)
+        return output
+
+    def random(self, rng, samples):
+        """
+        Returns samples (a multiple of 64) random states.
+        """
+        planes = rng.integers(0, 2**64 - 1, size=(self.bits, samples // 64),
+                              dtype=np.uint64, endpoint=True)
+        return list(planes)
+
+    def addDifference(self, state, difference):
+        value = int(difference, 16)
+        return [~plane if (value >> b) & 1 else plane for b, plane in enumerate(state)]
+
+    def countDifference(self, state, other, difference):
+        """
+        Returns the number of samples where state ^ other = difference.
+        """
+        value = int(difference, 16)
+        matches = None
+        for b in range(self.bits):
+            plane = state[b] ^ other[b]
+            if not (value >> b) & 1:
+                plane = ~plane
+            if matches is None:
+                matches = plane
+            else:
+                matches &= plane
+        return int(np.unpackbits(matches.view(np.uint8)).sum())
+
+
+def toNibbles(value, nibbles):
+    """
+    Converts a difference given as hex string into a nibble column.
+    """
+    value = int(value, 16)
+    return np.array([(value >> (4*j)) & 0xF for j in range(nibbles)],
+                    dtype=np.uint8).reshape(nibbles, 1)
+
+
+def randomState(rng, reference, samples):
+    return rng.integers(0, 16, size=(reference.nibbles, samples), dtype=np.uint8)
+
+
+def randomKeys(rng, reference, rounds):
+    return rng.integers(0, 16, size=(rounds, reference.keyNibbles, 1), dtype=np.uint8)
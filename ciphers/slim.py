@@ -6,6 +6,7 @@ Created on Nov 3, 2021
 
 from parser import stpcommands
 from ciphers.cipher import AbstractCipher
+from ciphers import reference
 
 class Slim(AbstractCipher):
     """
@@ -53,7 +54,9 @@ class Slim(AbstractCipher):
             stpcommands.setupVariables(stp_file, f, wordsize)
             stpcommands.setupVariables(stp_file, w, wordsize)
 
-            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize)
+            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize,
+                                               encoding=parameters["weightencoding"],
+                                               zeroMSBs=wordsize // 2)
 
             for i in range(rounds):
                 self.setupLBlockSRound(stp_file, x[i], s[i], p[i], f[i], x[i+1], 
@@ -152,4 +155,28 @@ class Slim(AbstractCipher):
 
 
         stp_file.write(command)
-        return
\ No newline at end of file
+        return
+
+
+    def getSbox(self):
+        #Returns sBox - Required for boomerang search
+        sBox = [0xC, 5, 6, 0xB, 9, 0, 0xA, 0xD, 3, 0xE, 0xF, 8, 4, 7, 1, 2]
+        return sBox
+
+    def getSboxSize(self):
+        #Returns sBox size - Required for boomerang search
+        return 4
+
+    def getPerm(self):
+        #Returns permutation pattern - Required for boomerang search
+        perm = [4, 5, 6, 7, 0, 1, 2, 3]
+        return perm
+
+    def getDesign(self):
+        #Returns design paradigm ("gfn", "spn", "arx") - Required for boomerang search
+        return "feistel"
+
+    def getReference(self):
+        #Returns vectorized implementation - Required for empirical verification
+        bitperm = [7, 13, 1, 8, 11, 14, 2, 5, 4, 10, 15, 0, 3, 6, 9, 12]
+        return reference.SlimReference(self.getSbox(), bitperm)
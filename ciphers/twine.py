@@ -8,6 +8,7 @@ Edited with additional boomerang search functions - jesenteh
 
 from parser import stpcommands
 from ciphers.cipher import AbstractCipher
+from ciphers import reference
 
 class TwineCipher(AbstractCipher):
     """
@@ -52,7 +53,9 @@ class TwineCipher(AbstractCipher):
             stpcommands.setupVariables(stp_file, p, wordsize)
             stpcommands.setupVariables(stp_file, w, wordsize)
 
-            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize)
+            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize,
+                                               encoding=parameters["weightencoding"],
+                                               zeroMSBs=wordsize // 2)
 
             for i in range(rounds):
                 self.setupTwineRound(stp_file, x[i], s[i], p[i], x[i+1], 
@@ -163,3 +166,7 @@ class TwineCipher(AbstractCipher):
     def getDesign(self):
         #Returns design paradigm ("gfn", "spn", "arx") - Required for boomerang search
         return "gfn"
+
+    def getReference(self):
+        #Returns vectorized implementation - Required for empirical verification
+        return reference.GFNReference(self.getSbox(), self.getPerm())
@@ -6,6 +6,7 @@ Created on Sep 24, 2021
 
 from parser import stpcommands
 from ciphers.cipher import AbstractCipher
+from ciphers import reference
 
 class WarpCipher(AbstractCipher):
     """
@@ -50,7 +51,9 @@ class WarpCipher(AbstractCipher):
             stpcommands.setupVariables(stp_file, p, wordsize)
             stpcommands.setupVariables(stp_file, w, wordsize)
 
-            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize)
+            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize,
+                                               encoding=parameters["weightencoding"],
+                                               zeroMSBs=wordsize // 2)
 
             for i in range(rounds):
                 self.setupWarpRound(stp_file, x[i], s[i], p[i], x[i+1], 
@@ -200,4 +203,8 @@ class WarpCipher(AbstractCipher):
     def getDesign(self):
         #Returns design paradigm ("gfn", "spn", "arx") - Required for boomerang search
         return "gfn"
+
+    def getReference(self):
+        #Returns vectorized implementation - Required for empirical verification
+        return reference.GFNReference(self.getSbox(), self.getPerm(), keyAfterSbox=True)
     
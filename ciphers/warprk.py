@@ -52,7 +52,9 @@ class WarpRKCipher(AbstractCipher):
             stpcommands.setupVariables(stp_file, k, wordsize)
             stpcommands.setupVariables(stp_file, w, wordsize)
 
-            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize)
+            stpcommands.setupWeightComputation(stp_file, weight, w, wordsize,
+                                               encoding=parameters["weightencoding"],
+                                               zeroMSBs=wordsize // 2)
 
             for i in range(rounds):
                 self.setupWarpRound(stp_file, x[i], s[i], p[i], k[i%2], x[i+1], 
@@ -0,0 +1,170 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Runs many search configurations on a local pool of worker processes and
+collects the results in a single table.
+'''
+
+import concurrent.futures
+import contextlib
+import csv
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+
+RESULT_COLUMNS = ["job", "config", "status", "cipher", "uppertrail", "lowertrail",
+                  "uweight", "lweight", "probability", "X0", "Xr", "trails", "time"]
+
+
+def findConfigurations(paths):
+    """
+    Returns all yaml files in the given list of files and directories.
+    """
+    configurations = []
+    for path in paths:
+        if os.path.isdir(path):
+            for filename in sorted(os.listdir(path)):
+                if filename.endswith(".yaml") or filename.endswith(".yml"):
+                    configurations.append(os.path.join(path, filename))
+        else:
+            configurations.append(path)
+    return configurations
+
+
+def getJobs(configurations, batchdir):
+    """
+    Assigns each configuration a unique job name and working directory.
+    """
+    jobs = []
+    names = set()
+    for config in configurations:
+        name = os.path.splitext(os.path.basename(config))[0]
+        unique_name = name
+        count = 1
+        while unique_name in names:
+            count += 1
+            unique_name = "{}-{}".format(name, count)
+        names.add(unique_name)
+
+        with open(config, "rb") as config_file:
+            digest = hashlib.sha256(config_file.read()).hexdigest()
+
+        jobs.append({"job": unique_name,
+                     "config": config,
+                     "hash": digest,
+                     "workdir": os.path.join(batchdir, unique_name)})
+    return jobs
+
+
+def runBatch(configurations, loadparameters, startsearch, batchdir, workers):
+    """
+    Runs all configurations on a bounded process pool. Jobs which already
+    completed with an unchanged configuration are skipped, failed or
+    interrupted jobs are run again.
+    """
+    os.makedirs(batchdir, exist_ok=True)
+    state_file = os.path.join(batchdir, "jobs.json")
+    state = {}
+    if os.path.isfile(state_file):
+        with open(state_file, "r") as input_file:
+            state = json.load(input_file)
+
+    pending = []
+    for job in getJobs(configurations, batchdir):
+        previous = state.get(job["job"])
+        if previous is not None and previous["status"] == "done" and \
+           previous["hash"] == job["hash"]:
+            print("Skipping completed job {}".format(job["job"]))
+            continue
+        job["parameters"] = loadparameters(job["config"])
+        job["parameters"]["tmpdir"] = os.path.join(job["workdir"], "tmp")
+        state[job["job"]] = {"config": job["config"], "hash": job["hash"],
+                             "status": "pending"}
+        pending.append(job)
+
+    writeBatchState(state_file, state)
+    print("Running {} jobs on {} workers".format(len(pending), workers))
+
+    context = multiprocessing.get_context("fork")
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers,
+                                                mp_context=context) as executor:
+        futures = {executor.submit(runBatchJob, job, startsearch): job
+                   for job in pending}
+        for future in concurrent.futures.as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as error:
+                result = {"status": "failed", "error": str(error)}
+            state[job["job"]].update(result)
+            writeBatchState(state_file, state)
+            writeResultTable(os.path.join(batchdir, "results.csv"), state)
+            print("Job {} finished: {}".format(job["job"], result["status"]))
+
+    return state
+
+
+def runBatchJob(job, startsearch):
+    """
+    Runs a single job in its own working directory. The output of the job is
+    written to output.log in the working directory.
+    """
+    parameters = job["parameters"]
+    os.makedirs(parameters["tmpdir"], exist_ok=True)
+    start_time = time.time()
+    result = {"status": "done"}
+
+    with open(os.path.join(job["workdir"], "output.log"), "w") as log_file, \
+         contextlib.redirect_stdout(log_file):
+        try:
+            startsearch(parameters)
+        except SystemExit:
+            result["status"] = "failed"
+            result["error"] = "search stopped"
+        except Exception as error:
+            result["status"] = "failed"
+            result["error"] = repr(error)
+
+    result["time"] = round(time.time() - start_time, 2)
+    for key in ["cipher", "uppertrail", "lowertrail", "uweight", "lweight"]:
+        result[key] = parameters[key]
+
+    if "boomerangResult" in parameters:
+        boomerang_result = parameters["boomerangResult"]
+        result["probability"] = boomerang_result["probability"]
+        result["X0"] = boomerang_result["X0"]
+        result["Xr"] = boomerang_result["Xr"]
+        result["trails"] = len(boomerang_result["trails"])
+        with open(os.path.join(job["workdir"], "result.json"), "w") as output_file:
+            json.dump(boomerang_result, output_file, indent=1)
+    elif result["status"] == "done":
+        result["status"] = "failed"
+        result["error"] = "no boomerang found"
+
+    return result
+
+
+def writeBatchState(state_file, state):
+    tmp_file = state_file + ".tmp"
+    with open(tmp_file, "w") as output_file:
+        json.dump(state, output_file, indent=1, sort_keys=True)
+    os.replace(tmp_file, state_file)
+    return
+
+
+def writeResultTable(table_file, state):
+    """
+    Writes the results of all jobs as csv table.
+    """
+    with open(table_file, "w", newline="") as output_file:
+        writer = csv.DictWriter(output_file, RESULT_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for name in sorted(state):
+            row = dict(state[name])
+            row["job"] = name
+            writer.writerow(row)
+    return
@@ -5,7 +5,9 @@ Created on Oct 8, 2021
 '''
 
 from parser import parsesolveroutput, stpcommands
-from cryptanalysis import search
+from cryptanalysis import search, bounds, solvers, resultcache, uppertrails, pipeline, warmstart, \
+    weightsearch, cnfcache, resultstore, workspace, modelstats, solverstats, trace, \
+    metrics, candidates
 from config import (PATH_STP, PATH_BOOLECTOR, PATH_CRYPTOMINISAT, MAX_WEIGHT,
                     MAX_CHARACTERISTICS)
 
@@ -16,8 +18,7 @@ import os
 import time
 import sys
 
-from fractions import gcd
-
+@trace.traced
 def computeFeistelBoomerangDifferential(cipher, parameters):
     """
     Performs the complete boomerang differential search
@@ -36,14 +37,75 @@ def computeFeistelBoomerangDifferential(cipher, parameters):
         quit()
     start_time = time.time()
     createBCT(parameters, cipher)
+    #Compare several endpoints instead of committing to the first valid one
+    if parameters["candidates"] > 1 and \
+       "X{}".format(parameters["lowertrail"]) not in parameters["boomerangVariables"]:
+        boomerangProb = candidates.searchCandidates(cipher, parameters, start_time)
+    else:
+        boomerangProb = searchEndpoints(cipher, parameters, start_time)
+    print("\n----")
+    print("Boomerang search completed for the following:")
+    print("X0 = {}".format(parameters["boomerangVariables"]["X0"]))
+    print("X{} = {}".format(parameters["lowertrail"], parameters["boomerangVariables"]["X{}".format(parameters["lowertrail"])]))
+    print("Final boomerang probability = " + str(math.log(boomerangProb, 2)))
+    print("Pruned {} candidates, saved about {}s".format(parameters["pruning"]["pruned"],
+                                                        round(parameters["pruning"]["saved"], 2)))
+    for boomerangFace, statistics in sorted(parameters["clusterStatistics"].items()):
+        if statistics["count"] > 0:
+            print("Clustered {} {} differentials to an average depth of {}".format(
+                statistics["count"], boomerangFace, round(statistics["depth"]/statistics["count"], 2)))
+    resultcache.printStatistics(parameters)
+    warmstart.printStatistics(parameters)
+    weightsearch.printStatistics(parameters)
+    cnfcache.printStatistics(parameters)
+    modelstats.printStatistics(parameters)
+    solverstats.printStatistics(parameters)
+    print("----\n")
+
+    #Keep the result for batch runs
+    parameters["boomerangResult"] = {"X0": parameters["boomerangVariables"]["X0"],
+                                     "Xr": parameters["boomerangVariables"]["X{}".format(parameters["lowertrail"])],
+                                     "probability": math.log(boomerangProb, 2),
+                                     "trails": parameters["boomerangTrails"],
+                                     "pruned": parameters["pruning"]["pruned"],
+                                     "cacheHits": parameters["resultCache"]["hits"]}
+    resultstore.recordBoomerang(parameters, parameters["boomerangResult"])
+    resultstore.flush(parameters)
+        
+        #Clear the start/end points to start new boomerang search
+        #parameters["boomerangVariables"].clear()
+
+    return 0
+
+
+@trace.traced
+def searchEndpoints(cipher, parameters, start_time):
+    """
+    Fixes X0 and X(lowertrail) to the first valid boomerang trail (unless
+    set) and enumerates the boomerang trails between them
+    """
+    #Clustering runs in the background while the trail search continues
+    parameters["clusterPipeline"] = None
+    if parameters["clusterworkers"] > 0:
+        parameters["clusterPipeline"] = pipeline.ClusterPipeline(parameters["clusterworkers"])
     #while not search.reachedTimelimit(start_time, parameters["timelimit"]):
     print("----")
     print("Running initial boomerang search")
     print("----")
     #Finds the input and output differences of the entire boomerang then starts enumerating
     boomerangProb = feistelBoomerangTrailSearch(cipher, parameters, start_time)
+    reportProgress(parameters, boomerangProb)
+    reportedProb = getBoomerangProb(parameters, boomerangProb)
     #Compute other boomerang trails for the given input and output differences
     while not search.reachedTimelimit(start_time, parameters["timelimit"]):
+        #Upper trails are independent once X0 and the end point are fixed
+        if parameters["trailworkers"] > 1 and "X0" in parameters["boomerangVariables"] and \
+           "X{}".format(parameters["lowertrail"]) in parameters["boomerangVariables"]:
+            #Known trails are needed to skip duplicates
+            if parameters["clusterPipeline"] is not None:
+                parameters["clusterPipeline"].collect(parameters, wait=True)
+            boomerangProb = uppertrails.exploreUpperTrails(cipher, parameters, start_time, boomerangProb)
+            break
         prob = feistelBoomerangTrailSearch(cipher, parameters, start_time, boomerangProb)
         if prob == 99: #No more upper trails for the given input
             break
@@ -51,43 +113,56 @@ def computeFeistelBoomerangDifferential(cipher, parameters):
             print("Trying a different upper trail")
         else:
             boomerangProb = prob
+        #Include the boomerang trails clustered in the background so far
+        if getBoomerangProb(parameters, boomerangProb) > reportedProb:
+            reportedProb = getBoomerangProb(parameters, boomerangProb)
             print("---")
-            print("Improved boomerang probability = " + str(math.log(boomerangProb, 2)))
-    print("\n----")
-    print("Boomerang search completed for the following:")
-    print("X0 = {}".format(parameters["boomerangVariables"]["X0"]))
-    print("X{} = {}".format(parameters["lowertrail"], parameters["boomerangVariables"]["X{}".format(parameters["lowertrail"])]))
-    print("Final boomerang probability = " + str(math.log(boomerangProb, 2)))
-    print("----\n")
-        
-        #Clear the start/end points to start new boomerang search
-        #parameters["boomerangVariables"].clear()
+            print("Improved boomerang probability = " + str(math.log(reportedProb, 2)))
+            reportProgress(parameters, boomerangProb)
+        elif prob != 0: #Upper trail pruned or no valid switch
+            print("No improvement from this upper trail")
+    #Wait for the clustering jobs still running in the background
+    if parameters["clusterPipeline"] is not None:
+        print("Waiting for {} pending boomerang trails".format(len(parameters["clusterPipeline"].pending)))
+        parameters["clusterPipeline"].collect(parameters, wait=True)
+        parameters["clusterPipeline"].shutdown()
+        boomerangProb += parameters["clusterPipeline"].probability
+        parameters["clusterPipeline"] = None
+    metrics.recordProbability(parameters, boomerangProb)
+    return boomerangProb
 
-    return 0
+
+def getBoomerangProb(parameters, boomerangProb):
+    """
+    Boomerang probability including the trails clustered in the background
+    """
+    if parameters["clusterPipeline"] is not None:
+        boomerangProb += parameters["clusterPipeline"].probability
+    return boomerangProb
+
+
+def reportProgress(parameters, boomerangProb):
+    """
+    Publish an improved boomerang probability to the parent process (if any)
+    """
+    boomerangProb = getBoomerangProb(parameters, boomerangProb)
+    metrics.recordProbability(parameters, boomerangProb)
+    if parameters["progressQueue"] is not None and 0 < boomerangProb < 1:
+        parameters["progressQueue"].put(("progress", parameters["uppertrail"], math.log(boomerangProb, 2)))
+    return
 
 
+@trace.traced
 def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0):
     """
     Automatically enumerate boomerang differentials starting from a fixed upper trail
     """
-    switchProb = 0
-    alpha = ""
-    beta = ""
-    delta = ""
-    gamma = ""
-    upperCharacteristic = ""
-    lowerCharacteristic = "" 
-    diff_upper = 0
-    diff_lower = 0
-    start_time = timestamp
-        
     #Search Upper Trail
     upperCharacteristic = boomerangTrail(cipher, parameters, timestamp, "upper")
 
-    #Store output difference
+    #Check that an upper trail has been found
     try:
-        alpha = upperCharacteristic.getInputDiff()
-        beta = upperCharacteristic.getOutputDiff()
+        upperCharacteristic.getOutputDiff()
     except:
         print("No characteristic found for the given limits")
         #If no more upper characteristics can be found, best boomerang differential for the given input has been found
@@ -97,8 +172,43 @@ def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0
         return 99
     upperWeight = parameters["sweight"] #Store optimal weight found for upper trail
 
+    return lowerTrailSearch(cipher, parameters, timestamp, upperCharacteristic, upperWeight, boomerangProb)
+
+
+@trace.traced
+def lowerTrailSearch(cipher, parameters, timestamp, upperCharacteristic, upperWeight, boomerangProb = 0):
+    """
+    Enumerate the lower trails and boomerang differentials for a fixed upper trail.
+    Trails clustered in the background are added to clusterPipeline.probability
+    instead of the returned probability
+    """
+    switchProb = 0
+    alpha = upperCharacteristic.getInputDiff()
+    beta = upperCharacteristic.getOutputDiff()
+    delta = ""
+    gamma = ""
+    lowerCharacteristic = ""
+    diff_upper = 0
+    diff_lower = 0
+    start_time = timestamp
+
     #Keep searching for another optimal lower characteristic, otherwise move on to different upper
     lowerWeight = parameters["lweight"]
+    #Weights below the last lower trail have been proven to be infeasible
+    lowerStart = parameters["lweight"]
+
+    #Skip the upper trail if not even the lightest lower trail can contribute enough
+    maxSwitchProb = getMaxSwitchProb(beta, parameters)
+    if not isPromising(parameters, boomerangProb,
+                       estimateCluster(parameters, "upper", upperWeight),
+                       estimateCluster(parameters, "lower", lowerStart), maxSwitchProb):
+        print("Pruned upper trail of weight {}".format(upperWeight))
+        print("----")
+        recordPruning(parameters, ["upper", "lower"])
+        parameters["blockedUpperCharacteristics"].append(upperCharacteristic)
+        parameters["blockedLowerCharacteristics"].clear()
+        parameters["uweight"] = upperWeight
+        return boomerangProb
 
     #Calculate weight limit of lower trails
     if parameters["lweight"] < parameters["wordsize"]/parameters["sboxSize"]:
@@ -109,8 +219,22 @@ def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0
     while not search.reachedTimelimit(start_time, parameters["timelimit"]) and \
         lowerWeight < parameters["lweight"]+searchLimit: 
 
+        #Add the boomerang trails clustered in the background so far
+        if parameters["clusterPipeline"] is not None:
+            parameters["clusterPipeline"].collect(parameters)
+            diff_upper = parameters["clusterPipeline"].getUpperProb(alpha, beta, upperWeight)
+
+        #Remaining lower trails are at least as heavy as lowerStart
+        if diff_upper != 0 and not isPromising(parameters, boomerangProb, diff_upper,
+                                               estimateCluster(parameters, "lower", lowerStart),
+                                               maxSwitchProb):
+            print("Pruned lower trails from weight {}".format(lowerStart))
+            print("----")
+            recordPruning(parameters, ["lower"])
+            break
+
         #Search Lower Trail
-        lowerCharacteristic = boomerangTrail(cipher, parameters, timestamp, "lower", beta)
+        lowerCharacteristic = boomerangTrail(cipher, parameters, timestamp, "lower", beta, lowerStart)
 
         #Store output difference
         try:
@@ -122,15 +246,18 @@ def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0
             parameters["blockedLowerCharacteristics"].clear()
             return 0
         lowerWeight = parameters["sweight"] #Store optimal weight found for lower trail
+        lowerStart = lowerWeight
 
         #Block characteristics
         parameters["blockedLowerCharacteristics"].append(lowerCharacteristic)
 
         #Check for match
-        switchProb = checkBCT(beta, gamma, parameters, cipher)
+        with trace.span("BCT check"):
+            switchProb = checkBCT(beta, gamma, parameters, cipher)
 
         #Successful switch has been found
         if switchProb != 0: 
+            resultstore.recordSwitch(parameters, beta, gamma, switchProb)
             #Fix starting point if it has not been set in boomerang Variables
             if "X0" not in parameters["boomerangVariables"]:
                 parameters["boomerangVariables"]["X0"] = alpha
@@ -141,6 +268,26 @@ def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0
                 parameters["boomerangVariables"]["X{}".format(parameters["lowertrail"])] = delta
                 print("Fixed X{} in boomerang to {}".format(parameters["lowertrail"], parameters["boomerangVariables"]["X{}".format(parameters["lowertrail"])]))
                 print("----")
+                #Switches are no longer restricted, lighter lower trails may exist
+                lowerStart = parameters["lweight"]
+            #Bound the contribution of this trail before clustering it
+            upperEstimate = diff_upper
+            if upperEstimate == 0:
+                upperEstimate = estimateCluster(parameters, "upper", upperWeight)
+            if not isPromising(parameters, boomerangProb, upperEstimate,
+                               estimateCluster(parameters, "lower", lowerWeight), switchProb):
+                print("Pruned boomerang trail with weights {}, {}".format(upperWeight, lowerWeight))
+                print("----")
+                recordPruning(parameters, ["lower"] if diff_upper != 0 else ["upper", "lower"])
+                continue
+            #Cluster in the background and continue with the next lower trail
+            if parameters["clusterPipeline"] is not None:
+                parameters["clusterPipeline"].submit(cipher, parameters, timestamp,
+                                                     {"alpha": alpha, "beta": beta,
+                                                      "gamma": gamma, "delta": delta,
+                                                      "upperWeight": upperWeight,
+                                                      "lowerWeight": lowerWeight}, switchProb)
+                continue
             #Perform clustering for upper if not done, then cluster lower
             while not search.reachedTimelimit(start_time, parameters["timelimit"]) and diff_upper == 0:
                 diff_upper = boomerangDifferential(cipher, parameters, alpha, beta, upperWeight, timestamp, "upper")
@@ -152,6 +299,13 @@ def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0
                 return 99
             
             boomerangProb += diff_upper*diff_upper*diff_lower*diff_lower*switchProb
+            parameters["boomerangTrails"].append({"alpha": alpha, "beta": beta,
+                                                  "gamma": gamma, "delta": delta,
+                                                  "upperWeight": upperWeight,
+                                                  "lowerWeight": lowerWeight,
+                                                  "upperProb": math.log(diff_upper, 2),
+                                                  "lowerProb": math.log(diff_lower, 2),
+                                                  "switchProb": math.log(switchProb, 2)})
             print("Found boomerang trail: {}, {}, {}".format(math.log(diff_upper, 2), math.log(diff_lower, 2),math.log(switchProb, 2)))
             print("Boomerang probability: {}".format(math.log(boomerangProb, 2)))
             print("----")
@@ -160,7 +314,11 @@ def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0
             print("----")
    
     #After searching for all possible optimal lower trails for the given upper trail, block upper trail
-    print("Completed trail search with boomerang probability of {}".format(math.log(boomerangProb, 2)))
+    totalProb = getBoomerangProb(parameters, boomerangProb)
+    if totalProb > 0:
+        print("Completed trail search with boomerang probability of {}".format(math.log(totalProb, 2)))
+    else:
+        print("Completed trail search without a boomerang trail")
     #Block upper trail to find another upper trail
     parameters["blockedUpperCharacteristics"].append(upperCharacteristic)
     #Clear lower trails because the same lower trails can be matched to a different upper trail
@@ -169,7 +327,8 @@ def feistelBoomerangTrailSearch(cipher, parameters, timestamp, boomerangProb = 0
     return boomerangProb
 
 
-def boomerangTrail(cipher, parameters, timestamp, boomerangFace="upper", switchInput=""):
+@trace.traced
+def boomerangTrail(cipher, parameters, timestamp, boomerangFace="upper", switchInput="", minWeight=0):
     """
     Search top or bottom trail (characteristic) of a boomerang
     """
@@ -186,6 +345,7 @@ def boomerangTrail(cipher, parameters, timestamp, boomerangFace="upper", switchI
         trail = "lowertrail"
         block = "blockedLowerCharacteristics"
         beta = switchInput
+    parameters["phase"] = boomerangFace
 
     print(("Starting search for characteristic with minimal weight for {} trail\n"
            "{} - Rounds: {} Wordsize: {}".format( boomerangFace, 
@@ -196,17 +356,18 @@ def boomerangTrail(cipher, parameters, timestamp, boomerangFace="upper", switchI
     start_time = timestamp
 
     #Set target weight for trail
-    parameters["sweight"] = parameters[weight]
-    characteristic = ""
-    
-    while not search.reachedTimelimit(start_time, parameters["timelimit"]) and \
-        parameters["sweight"] < parameters["endweight"]:
-
-        print("Weight: {} Time: {}s".format(parameters["sweight"],
-                                            round(time.time() - start_time, 2)))
-
-        # Construct problem instance for given parameters
-        stp_file = "tmp/{}-{}{}-{}-{}.stp".format(boomerangFace, cipher.name,
+    parameters["sweight"] = max(parameters[weight], minWeight)
+
+    #Start at the proven lower bound for the number of rounds
+    if parameters["autobounds"]:
+        lowerBound = bounds.getLowerBound(cipher, parameters, parameters[trail], timestamp)
+        if lowerBound > parameters["sweight"]:
+            print("Starting at lower bound {} for {} rounds".format(lowerBound, parameters[trail]))
+            parameters["sweight"] = lowerBound
+
+    #Model for the current target weight
+    def createModel():
+        stp_file = "{}/{}-{}{}-{}-{}.stp".format(parameters["tmpdir"], boomerangFace, cipher.name,
                                          parameters["wordsize"], parameters[trail], timestamp)
         
         #Fix number of rounds
@@ -222,16 +383,34 @@ def boomerangTrail(cipher, parameters, timestamp, boomerangFace="upper", switchI
         parameters["blockedCharacteristics"].clear()
         parameters["blockedCharacteristics"] = parameters[block].copy()
 
-        cipher.createSTP(stp_file, parameters)
+        with trace.span("createSTP", face=boomerangFace, weight=parameters["sweight"]):
+            cipher.createSTP(stp_file, parameters)
         #Block invalid switches in the stp file
         if beta != "":
             print("Blocking invalid switching differences for {}".format(beta))
             blockInvalidSwitches(beta, parameters, stp_file)
-        result = ""
-        if parameters["boolector"]:
-            result = search.solveBoolector(stp_file)
-        else:
-            result = search.solveSTP(stp_file)
+        modelstats.recordModel(parameters, stp_file)
+        return stp_file
+
+    #Skip weights without trails with the selected strategy
+    if parameters["weightsearch"] != "linear":
+        weightsearch.findMinimalWeight(parameters, start_time, createModel)
+
+    characteristic = ""
+    
+    while not search.reachedTimelimit(start_time, parameters["timelimit"]) and \
+        parameters["sweight"] < parameters["endweight"]:
+
+        print("Weight: {} Time: {}s".format(parameters["sweight"],
+                                            round(time.time() - start_time, 2)))
+
+        # Construct problem instance for given parameters
+        with trace.span("{} weight {}".format(boomerangFace, parameters["sweight"])):
+            stp_file = createModel()
+            solve_time = time.time()
+            result, configuration = warmstart.solveWarm(stp_file, parameters, boomerangFace)
+            weightsearch.recordCall(parameters, solve_time)
+            workspace.release(parameters, stp_file)
         characteristic = ""
 
         # Check if a characteristic was found
@@ -245,12 +424,16 @@ def boomerangTrail(cipher, parameters, timestamp, boomerangFace="upper", switchI
                                                  parameters["wordsize"],
                                                  parameters["sweight"],
                                                  current_time)))
-            if parameters["boolector"]:
+            if solvers.isBoolectorOutput(configuration):
                 characteristic = parsesolveroutput.getCharBoolectorOutput(
                     result, cipher, parameters[trail])
             else:
                 characteristic = parsesolveroutput.getCharSTPOutput(
                     result, cipher, parameters[trail])
+            warmstart.recordHint(parameters, boomerangFace, characteristic, parameters[trail],
+                                 parameters["sweight"])
+            resultstore.recordCharacteristic(parameters, characteristic, boomerangFace,
+                                             parameters[trail], parameters["sweight"])
             characteristic.printText()
             print("----")
             break
@@ -264,6 +447,7 @@ def boomerangTrail(cipher, parameters, timestamp, boomerangFace="upper", switchI
     return characteristic
 
 
+@trace.traced
 def boomerangDifferential(cipher, parameters, input, output, weight, timestamp, boomerangFace="upper"):
     """
     Perform clustering for one face of a boomerang differential
@@ -279,6 +463,16 @@ def boomerangDifferential(cipher, parameters, input, output, weight, timestamp,
     start_time = timestamp
     
     print("Cluster {} differential".format(boomerangFace))
+    parameters["phase"] = "clustering"
+    #Number of trails for each weight of the cluster
+    parameters["clusterWeights"] = []
+
+    #Reuse clustering results shared between runs (e.g. round splits)
+    cacheKey = "{}-{}-{}-{}-{}-{}-{}".format(cipher.name, parameters["wordsize"], parameters[trail],
+                                             input, output, weight, parameters[limit])
+    if parameters["differentialCache"] is not None and cacheKey in parameters["differentialCache"]:
+        print("Using cached {} differential".format(boomerangFace))
+        return parameters["differentialCache"][cacheKey]
     
     #Clear blocked characteristics
     parameters["blockedCharacteristics"].clear()
@@ -288,7 +482,8 @@ def boomerangDifferential(cipher, parameters, input, output, weight, timestamp,
     diff_prob = 0
     boomerangProb = 1
     characteristics_found = 0
-    sat_logfile = "tmp/satlog{}.tmp".format(timestamp)
+    sat_logfile = "{}/satlog{}.tmp".format(parameters["tmpdir"], timestamp)
+    cluster_time = time.time()
 
     parameters["fixedVariables"].clear()
     parameters["fixedVariables"]["X0"] = input
@@ -302,43 +497,32 @@ def boomerangDifferential(cipher, parameters, input, output, weight, timestamp,
     #Fix number of rounds
     parameters["rounds"] = parameters[trail]
 
-    #Search until optimal weight + wordsize/8
+    #Search until optimal weight + wordsize/limit, or until the cluster converges
+    maxWeight = weight+parameters["wordsize"]/parameters[limit]
+    converged = None
+    stopped = None
     while not search.reachedTimelimit(start_time, parameters["timelimit"]) and \
-        parameters["sweight"] < weight+parameters["wordsize"]/parameters[limit]:
+        parameters["sweight"] < maxWeight and converged is None and stopped is None:
 
         if os.path.isfile(sat_logfile):
             os.remove(sat_logfile)
 
-        stp_file = "tmp/{}{}-{}.stp".format(cipher.name, trail,timestamp)
-        cipher.createSTP(stp_file, parameters)
-
-        # Start solver
-        sat_process = search.startSATsolver(stp_file)
-        log_file = open(sat_logfile, "w")
-
-        # Find the number of solutions with the SAT solver
-        print("Finding all trails of weight {}".format(parameters["sweight"]))
-
-        # Watch the process and count solutions
-        solutions = 0
-        while sat_process.poll() is None:
-            line = sat_process.stdout.readline().decode("utf-8")
-            log_file.write(line)
-            if "s SATISFIABLE" in line:
-                solutions += 1
-            if solutions % 100 == 0:
-                print("\tSolutions: {}\r".format(solutions // 2), end="")
-
-        log_file.close()
-        print("\tSolutions: {}".format(solutions // 2))
-
-        assert solutions == search.countSolutionsLogfile(sat_logfile)
+        with trace.span("clustering weight {}".format(parameters["sweight"]), face=boomerangFace):
+            stp_file = "{}/{}{}-{}.stp".format(parameters["tmpdir"], cipher.name, trail,timestamp)
+            with trace.span("createSTP", face=boomerangFace, weight=parameters["sweight"]):
+                cipher.createSTP(stp_file, parameters)
+            modelstats.recordModel(parameters, stp_file)
 
-        # The encoded CNF contains every solution twice
-        solutions //= 2
+            # Find the number of solutions with the SAT solver
+            print("Finding all trails of weight {}".format(parameters["sweight"]))
+            level_time = time.time()
+            solutions = solvers.countSolutions(stp_file, parameters, sat_logfile)
+            workspace.release(parameters, stp_file, sat_logfile)
+        print("\tSolutions: {}".format(solutions))
 
         # Print result
         diff_prob += math.pow(2, -parameters["sweight"]) * solutions
+        parameters["clusterWeights"].append((parameters["sweight"], solutions))
         characteristics_found += solutions
         if diff_prob > 0.0:
             #print("\tSolutions: {}".format(solutions))
@@ -346,11 +530,130 @@ def boomerangDifferential(cipher, parameters, input, output, weight, timestamp,
             print("\tCurrent Probability: " + str(math.log(diff_prob, 2)))
             print("\tTime: {}s".format(round(time.time() - start_time, 2)))
         parameters["sweight"] += 1
+        if parameters["clusterdepth"] == "adaptive":
+            converged = isClusterConverged(parameters, diff_prob)
+            levelTime = time.time() - level_time
+            if converged is None and parameters["clusterbudget"] > 0 and \
+               levelTime > parameters["clusterbudget"]:
+                stopped = "level took {}s".format(round(levelTime, 2))
+
+    complete = parameters["sweight"] >= maxWeight or converged is not None
+    if complete or stopped is not None:
+        depth = parameters["sweight"] - weight
+        reason = converged or stopped
+        print("Clustered {} differential to depth {}{}".format(
+            boomerangFace, depth, " ({})".format(reason) if reason is not None else ""))
+        recordCluster(parameters, boomerangFace, weight, diff_prob, time.time() - cluster_time, depth)
+    #Only complete clusters are shared, the next levels of a cluster stopped
+    #by clusterbudget may still add to the probability
+    if complete:
+        resultstore.recordCluster(parameters, boomerangFace, parameters[trail], input, output,
+                                  weight, diff_prob, depth)
+        if parameters["differentialCache"] is not None:
+            parameters["differentialCache"][cacheKey] = diff_prob
 
     print("----")
     return diff_prob
 
 
+def isClusterConverged(parameters, diff_prob):
+    """
+    Adaptive cluster depth: returns why the clustering stops after the
+    last level in clusterWeights, or None. Levels are compared in pairs, as
+    many ciphers only have trails of every other weight. The remaining
+    levels are projected as a geometric series of the last pairs.
+    """
+    contributions = [math.pow(2, -level)*solutions for level, solutions in parameters["clusterWeights"]]
+    if len(contributions) < 4 or diff_prob == 0:
+        return None
+    last = contributions[-1] + contributions[-2]
+    previous = contributions[-3] + contributions[-4]
+    if previous == 0 or last >= previous:
+        return None
+    ratio = last/previous
+    projected = last*ratio/(1 - ratio)
+    if projected >= parameters["clusterthreshold"]*diff_prob:
+        return None
+    if projected == 0:
+        return "no trails in the last levels"
+    return "projected gain 2^{}".format(round(math.log(projected/diff_prob, 2), 2))
+
+
+def recordCluster(parameters, boomerangFace, weight, diff_prob, cluster_time, depth):
+    """
+    Keep the largest gain of clustering over a single trail, the time
+    spent clustering and the depth of the clusters for each face
+    """
+    statistics = parameters["clusterStatistics"].setdefault(boomerangFace, {"gain": None, "time": 0, "count": 0,
+                                                                           "depth": 0})
+    if diff_prob > 0:
+        gain = math.log(diff_prob, 2) + weight
+        if statistics["gain"] is None or gain > statistics["gain"]:
+            statistics["gain"] = gain
+    statistics["time"] += cluster_time
+    statistics["count"] += 1
+    statistics["depth"] += depth
+    return
+
+
+def estimateCluster(parameters, boomerangFace, weight):
+    """
+    Estimated differential probability for a trail of the given weight from
+    the largest clustering gain seen so far, or None if no cluster of this
+    face has been computed yet
+    """
+    statistics = parameters["clusterStatistics"].get(boomerangFace)
+    if statistics is None or statistics["gain"] is None:
+        return None
+    return math.pow(2, -weight + statistics["gain"])
+
+
+def isPromising(parameters, boomerangProb, upperProb, lowerProb, switchProb):
+    """
+    Returns False if the estimated probability of a boomerang trail does not
+    contribute more than prunefraction of the current boomerang probability.
+    The cluster estimates are a heuristic, not a bound: a pruned trail may
+    cluster better than any trail seen so far
+    """
+    boomerangProb = getBoomerangProb(parameters, boomerangProb)
+    if boomerangProb <= 0 or parameters["prunefraction"] <= 0 or \
+        upperProb is None or lowerProb is None:
+        return True
+    estimatedProb = upperProb*upperProb*lowerProb*lowerProb*switchProb
+    return estimatedProb >= parameters["prunefraction"]*boomerangProb
+
+
+def recordPruning(parameters, boomerangFaces):
+    """
+    Count a pruned candidate and the clustering time it would have taken
+    """
+    parameters["pruning"]["pruned"] += 1
+    for boomerangFace in boomerangFaces:
+        statistics = parameters["clusterStatistics"].get(boomerangFace)
+        if statistics is not None and statistics["count"] > 0:
+            parameters["pruning"]["saved"] += statistics["time"]/statistics["count"]
+    return
+
+
+def getMaxSwitchProb(beta, parameters):
+    """
+    Best switching probability for beta over all possible gamma
+    """
+    switchProb = 1.0
+    positions = []
+    #Same S-box positions as in checkBCT
+    if parameters["design"] == "gfn":
+        nibbles = int(parameters["wordsize"]/parameters["sboxSize"])
+        positions = range(-1, -nibbles, -2)
+    if parameters["design"] == "feistel":
+        nibbles = int(parameters["wordsize"]/parameters["sboxSize"]/2)
+        positions = range(-1, -nibbles, -1)
+    for x in positions:
+        input = int(beta[x],16)
+        switchProb = switchProb * max(parameters["bct"][input])/(parameters["sboxSize"]*parameters["sboxSize"])
+    return switchProb
+
+
 def createBCT(parameters, cipher):
     """
     Create BCT or FBCT - Ensure that these functions are available in cipher model
@@ -407,7 +710,8 @@ def blockInvalidSwitches(beta, parameters, stp_filename):
                             b = "{}".format(hex(output))
                             blockVariableValue(stp_file, a, b)
                         #If this is the initial trail, only allow switching probability of 1 (not necessarily the best results)
-                        if ("X{}".format(parameters["lowertrail"]) not in parameters["boomerangVariables"] and parameters["bct"][input][output] != 16): 
+                        #Candidates are ranked including the switch, hence every valid switch is allowed
+                        if (parameters["candidates"] == 1 and "X{}".format(parameters["lowertrail"]) not in parameters["boomerangVariables"] and parameters["bct"][input][output] != 16): 
                             a = "X0[{0}:{1}]".format((parameters["perm"][n]*4)+3, parameters["perm"][n]*4)
                             b = "{}".format(hex(output))
                             blockVariableValue(stp_file, a, b)
@@ -427,7 +731,8 @@ def blockInvalidSwitches(beta, parameters, stp_filename):
                             b = "{}".format(hex(output))
                             blockVariableValue(stp_file, a, b)
                         #If this is the initial trail, only allow switching probability of 1 (not necessarily the best results)
-                        if ("X{}".format(parameters["lowertrail"]) not in parameters["boomerangVariables"] and parameters["bct"][input][output] != 16): 
+                        #Candidates are ranked including the switch, hence every valid switch is allowed
+                        if (parameters["candidates"] == 1 and "X{}".format(parameters["lowertrail"]) not in parameters["boomerangVariables"] and parameters["bct"][input][output] != 16): 
                             a = "X0[{0}:{1}]".format((parameters["perm"][n]*4)+3, parameters["perm"][n]*4)
                             b = "{}".format(hex(output))
                             blockVariableValue(stp_file, a, b)
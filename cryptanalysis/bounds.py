@@ -0,0 +1,141 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Computes and caches lower bounds on the weight of differential
+characteristics, which are used as starting weights for the trail search.
+'''
+
+from parser import parsesolveroutput
+from cryptanalysis import search, solvers, warmstart, workspace
+
+import json
+import os
+
+
+def getLowerBound(cipher, parameters, rounds, timestamp):
+    """
+    Returns a lower bound on the weight of any characteristic for the given
+    number of rounds. Bounds are computed incrementally from smaller rounds
+    (Matsui-style) and cached on disk.
+    """
+    key = getBoundsKey(cipher, parameters)
+    entry = loadBounds(parameters).get(key, {}).get(str(rounds))
+
+    if entry is not None and entry["exact"]:
+        return entry["weight"]
+
+    weight = 0
+    if entry is not None:
+        weight = entry["weight"]
+
+    # Each r-round characteristic consists of an i-round and (r-i)-round
+    # characteristic, hence B_r >= B_i + B_{r-i}
+    for i in range(1, rounds // 2 + 1):
+        weight = max(weight,
+                     getLowerBound(cipher, parameters, i, timestamp) +
+                     getLowerBound(cipher, parameters, rounds - i, timestamp))
+
+    print("Computing lower bound for {} - Rounds: {} Starting weight: {}".format(
+        cipher.name, rounds, weight))
+
+    # Search for the minimal weight without any fixed or blocked values
+    bound_parameters = dict(parameters)
+    bound_parameters["rounds"] = rounds
+    bound_parameters["iterative"] = False
+    bound_parameters["fixedVariables"] = {}
+    bound_parameters["blockedCharacteristics"] = []
+
+    stp_file = "{}/bound-{}{}-{}-{}.stp".format(parameters["tmpdir"], cipher.name,
+                                               parameters["wordsize"],
+                                               rounds, timestamp)
+
+    while not search.reachedTimelimit(timestamp, parameters["timelimit"]) and \
+        weight < parameters["endweight"]:
+        bound_parameters["sweight"] = weight
+        cipher.createSTP(stp_file, bound_parameters)
+        result, configuration = warmstart.solveWarm(stp_file, bound_parameters, "bound")
+        workspace.release(parameters, stp_file)
+
+        if search.foundSolution(result):
+            print("Lower bound for {} rounds: {}".format(rounds, weight))
+            # The characteristic seeds the search for more rounds
+            if parameters["warmstart"]:
+                if solvers.isBoolectorOutput(configuration):
+                    characteristic = parsesolveroutput.getCharBoolectorOutput(result, cipher, rounds)
+                else:
+                    characteristic = parsesolveroutput.getCharSTPOutput(result, cipher, rounds)
+                warmstart.recordHint(parameters, "bound", characteristic, rounds, weight)
+            storeBound(parameters, key, rounds, weight, True)
+            return weight
+
+        weight += 1
+        storeBound(parameters, key, rounds, weight, False)
+
+    return weight
+
+
+def getCachedBound(cipher, parameters, rounds):
+    """
+    Returns the lower bound which follows from the cached bounds alone,
+    without calling a solver.
+    """
+    cached = loadBounds(parameters).get(getBoundsKey(cipher, parameters), {})
+    weights = [0]
+    for r in range(1, rounds + 1):
+        entry = cached.get(str(r))
+        weight = entry["weight"] if entry is not None else 0
+        for i in range(1, r // 2 + 1):
+            weight = max(weight, weights[i] + weights[r - i])
+        weights.append(weight)
+    return weights[rounds]
+
+
+def getBoundsKey(cipher, parameters):
+    """
+    Bounds are cached per cipher and wordsize.
+    """
+    return "{}-{}".format(cipher.name, parameters["wordsize"])
+
+
+def getBoundsFile(parameters):
+    return os.path.join(parameters["cachedir"], "bounds.json")
+
+
+def loadBounds(parameters):
+    """
+    Returns the cached bounds as {key: {rounds: {"weight", "exact"}}}.
+    A bound is exact if a characteristic with this weight was found.
+    """
+    bounds_file = getBoundsFile(parameters)
+    if not os.path.isfile(bounds_file):
+        return {}
+
+    with open(bounds_file, "r") as input_file:
+        try:
+            return json.load(input_file)
+        except ValueError:
+            return {}
+
+
+def storeBound(parameters, key, rounds, weight, exact):
+    """
+    Stores a bound, unless a better bound is already cached. The file is
+    re-read before writing to keep bounds found by concurrent runs.
+    """
+    os.makedirs(parameters["cachedir"], exist_ok=True)
+    bounds = loadBounds(parameters)
+    entry = bounds.setdefault(key, {}).get(str(rounds))
+
+    if entry is not None and (entry["exact"] or entry["weight"] > weight):
+        return
+
+    bounds[key][str(rounds)] = {"weight": weight, "exact": exact}
+
+    bounds_file = getBoundsFile(parameters)
+    tmp_file = "{}.{}".format(bounds_file, os.getpid())
+    with open(tmp_file, "w") as output_file:
+        json.dump(bounds, output_file, indent=1, sort_keys=True)
+    os.replace(tmp_file, bounds_file)
+    return
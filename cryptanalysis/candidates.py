@@ -0,0 +1,241 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Boomerang search over several endpoints (candidates). Instead of fixing X0
+and X(lowertrail) to the first upper/lower pair with a valid switch, the
+first phase collects the endpoints (alpha, delta) of all upper trails up
+to candidatewindow above the first one with a valid switch, and keeps the
+best candidates ranked by the estimate
+2^(-2*upperWeight - 2*lowerWeight) * switchProb. Each candidate is then
+searched and clustered in its own worker and the best boomerang is kept.
+'''
+
+from cryptanalysis import boomerang, search, processes, resultstore, trace
+
+import copy
+import math
+import multiprocessing
+import queue
+
+
+def searchCandidates(cipher, parameters, start_time):
+    """
+    Searches the best candidates in parallel and returns the boomerang
+    probability of the best one. X0, X(lowertrail) and boomerangTrails are
+    set to the best candidate.
+    """
+    endpoint = "X{}".format(parameters["lowertrail"])
+    uweight = parameters["uweight"]
+    lweight = parameters["lweight"]
+    candidates = collectCandidates(cipher, parameters, start_time)
+    if not candidates:
+        print("No candidate found, falling back to the first valid boomerang trail")
+        return searchFirstEndpoints(cipher, parameters, start_time)
+
+    # Each candidate starts its own trail search from the initial weights
+    parameters["uweight"] = uweight
+    parameters["lweight"] = lweight
+    parameters["blockedUpperCharacteristics"].clear()
+    parameters["blockedLowerCharacteristics"].clear()
+
+    print("----")
+    print("Searching {} candidates with {} workers".format(len(candidates), parameters["workers"]))
+    print("----")
+    initial = copy.deepcopy(processes.getStatistics(parameters))
+    results = runWorkers(cipher, parameters, start_time, candidates)
+
+    best = None
+    print("----")
+    for index, candidate in enumerate(candidates):
+        if index not in results:
+            print("Candidate {} failed".format(index))
+            continue
+        probability, trails, statistics = results[index]
+        processes.mergeStatistics(parameters, statistics, initial)
+        candidate["probability"] = probability
+        candidate["trails"] = trails
+        print("Candidate {}: X0 = {}, {} = {}, estimate {}, probability {}, {} boomerang trails".format(
+            index, candidate["alpha"], endpoint, candidate["delta"], candidate["estimate"],
+            probability, len(trails)))
+        if probability is not None and (best is None or probability > best["probability"]):
+            best = candidate
+    print("----")
+
+    if best is None:
+        print("No candidate completed, falling back to the first valid boomerang trail")
+        return searchFirstEndpoints(cipher, parameters, start_time)
+
+    print("Best candidate: X0 = {}, {} = {}".format(best["alpha"], endpoint, best["delta"]))
+    parameters["boomerangVariables"]["X0"] = best["alpha"]
+    parameters["boomerangVariables"][endpoint] = best["delta"]
+    parameters["boomerangTrails"] = best["trails"]
+    boomerangProb = math.pow(2, best["probability"])
+    boomerang.reportProgress(parameters, boomerangProb)
+    return boomerangProb
+
+
+def searchFirstEndpoints(cipher, parameters, start_time):
+    """
+    Single endpoint search, the first boomerang trail is restricted to
+    switches with probability 1 again (see blockInvalidSwitches).
+    """
+    count = parameters["candidates"]
+    parameters["candidates"] = 1
+    try:
+        return boomerang.searchEndpoints(cipher, parameters, start_time)
+    finally:
+        parameters["candidates"] = count
+
+
+@trace.traced
+def collectCandidates(cipher, parameters, start_time):
+    """
+    Searches the upper trails up to candidatewindow above the first one
+    with a valid switch and their lower trails. Returns the best candidates
+    ordered by their estimate.
+    """
+    found = {}
+    maxWeight = None
+    while not search.reachedTimelimit(start_time, parameters["timelimit"]):
+        try:
+            upperCharacteristic = boomerang.boomerangTrail(cipher, parameters, start_time, "upper")
+        except SystemExit:
+            # Weight limit reached
+            break
+        try:
+            upperCharacteristic.getOutputDiff()
+        except:
+            print("No characteristic found for the given limits")
+            break
+        upperWeight = parameters["sweight"]
+        if maxWeight is not None and upperWeight > maxWeight:
+            break
+        parameters["uweight"] = upperWeight
+        collectLowerTrails(cipher, parameters, start_time, upperCharacteristic, upperWeight, found)
+        parameters["blockedUpperCharacteristics"].append(upperCharacteristic)
+        parameters["blockedLowerCharacteristics"].clear()
+        if maxWeight is None and found:
+            maxWeight = upperWeight + parameters["candidatewindow"]
+
+    candidates = sorted(found.values(), key=lambda candidate: candidate["estimate"], reverse=True)
+    print("Collected {} candidates, keeping the best {}".format(len(candidates), parameters["candidates"]))
+    return candidates[:parameters["candidates"]]
+
+
+def collectLowerTrails(cipher, parameters, start_time, upperCharacteristic, upperWeight, found):
+    """
+    Adds the endpoints of the lower trails with a valid switch for one upper
+    trail, within the same weight window as lowerTrailSearch. Endpoints
+    found again keep their best estimate.
+    """
+    alpha = upperCharacteristic.getInputDiff()
+    beta = upperCharacteristic.getOutputDiff()
+    lowerStart = parameters["lweight"]
+    if parameters["lweight"] < parameters["wordsize"]/parameters["sboxSize"]:
+        searchLimit = parameters["wordsize"]/parameters["sboxSize"] - parameters["lweight"]
+    else:
+        searchLimit = 1
+
+    while not search.reachedTimelimit(start_time, parameters["timelimit"]) and \
+          lowerStart < parameters["lweight"] + searchLimit:
+        lowerCharacteristic = boomerang.boomerangTrail(cipher, parameters, start_time, "lower",
+                                                       beta, lowerStart)
+        try:
+            gamma = lowerCharacteristic.getInputDiff()
+            delta = lowerCharacteristic.getOutputDiff()
+        except:
+            print("No characteristic found for the given limits")
+            return
+        lowerWeight = parameters["sweight"]
+        lowerStart = lowerWeight
+        parameters["blockedLowerCharacteristics"].append(lowerCharacteristic)
+
+        with trace.span("BCT check"):
+            switchProb = boomerang.checkBCT(beta, gamma, parameters, cipher)
+        if switchProb == 0:
+            print("Invalid switch, search for new boomerang differential")
+            print("----")
+            continue
+        resultstore.recordSwitch(parameters, beta, gamma, switchProb)
+        estimate = -2*upperWeight - 2*lowerWeight + math.log(switchProb, 2)
+        if (alpha, delta) not in found or found[(alpha, delta)]["estimate"] < estimate:
+            found[(alpha, delta)] = {"alpha": alpha, "delta": delta, "estimate": estimate,
+                                     "upperWeight": upperWeight, "lowerWeight": lowerWeight}
+            print("Candidate X0 = {}, X{} = {} with estimate {}".format(
+                alpha, parameters["lowertrail"], delta, estimate))
+            print("----")
+    return
+
+
+def runWorkers(cipher, parameters, start_time, candidates):
+    """
+    Searches each candidate in its own worker, at most workers at a time,
+    and returns the results by index.
+    """
+    results = multiprocessing.Queue()
+    pending = list(enumerate(candidates))
+    workers = {}
+    collected = {}
+    while pending or len(collected) < len(workers):
+        while pending and len(workers) - len(collected) < parameters["workers"]:
+            index, candidate = pending.pop(0)
+            worker = multiprocessing.Process(target=runCandidate,
+                                             args=(cipher, getWorkerParameters(parameters, index),
+                                                   start_time, candidate, index, results))
+            worker.start()
+            workers[index] = worker
+
+        # Results of exited workers are in the queue, hence the workers are
+        # checked before the queue is read
+        exited = [index for index in workers
+                  if index not in collected and not workers[index].is_alive()]
+        try:
+            index, probability, trails, statistics = results.get(timeout=1)
+            collected[index] = (probability, trails, statistics)
+            # Killing the worker could leave the queue locked for the others
+            workers[index].join()
+        except queue.Empty:
+            # Workers which exited without a result
+            for index in exited:
+                collected.setdefault(index, None)
+
+    for worker in workers.values():
+        processes.stopWorker(worker)
+    return {index: result for index, result in collected.items() if result is not None}
+
+
+def getWorkerParameters(parameters, index):
+    """
+    Each candidate keeps its own best probability.
+    """
+    worker_parameters = processes.getWorkerParameters(parameters, "candidate-{}".format(index))
+    worker_parameters["bestProbability"] = None
+    return worker_parameters
+
+
+def runCandidate(cipher, parameters, start_time, candidate, index, results):
+    """
+    Worker for a single candidate.
+    """
+    parameters["boomerangVariables"]["X0"] = candidate["alpha"]
+    parameters["boomerangVariables"]["X{}".format(parameters["lowertrail"])] = candidate["delta"]
+    with processes.workerOutput(parameters, "candidate {}".format(index)):
+        try:
+            boomerangProb = boomerang.searchEndpoints(cipher, parameters, start_time)
+        except (SystemExit, Exception) as error:
+            # The trails found so far are kept
+            print("Candidate stopped: {}".format(repr(error)))
+            boomerangProb = getTrailsProb(parameters["boomerangTrails"])
+    probability = math.log(boomerangProb, 2) if boomerangProb > 0 else None
+    results.put((index, probability, parameters["boomerangTrails"], processes.getStatistics(parameters)))
+    return
+
+
+def getTrailsProb(trails):
+    """
+    Boomerang probability of the given boomerang trails.
+    """
+    return sum(math.pow(2, 2*trail["upperProb"] + 2*trail["lowerProb"] + trail["switchProb"])
+               for trail in trails)
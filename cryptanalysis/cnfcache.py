@@ -0,0 +1,302 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Cache for the CNF translation of counting models. The models of a
+clustering only differ in the fixed variables and the weight, hence the
+remaining static part is translated by STP once and stored in cachedir/cnf
+together with the CNF variables of the fixed bits. The CNF of a model is
+the cached CNF plus one unit clause per fixed bit.
+
+The variables are found by translating the static part with the fixed
+variables set to a few bit patterns. The translation is only used if each
+of them adds exactly one unit clause per fixed bit to the static CNF,
+which is the CNF STP writes for the full model as well.
+'''
+
+from cryptanalysis import solvers, processes
+
+import asyncio
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+
+
+def getTranslation(stp_file, parameters, variables=None):
+    """
+    Returns the cached translation of stp_file as {"key", "entry",
+    "values"}, or None if it can not be used. variables are fixed later
+    (e.g. the cubes) and are mapped as well.
+    """
+    if not parameters["cnfcache"]:
+        return None
+
+    with open(stp_file, "r") as model_file:
+        model = model_file.read()
+    static, values = getStaticModel(model, parameters)
+    widths = getWidths(model)
+    names = sorted(set(values) | set(variables or []))
+    if any(name not in widths for name in names):
+        return None
+
+    key = getStaticHash(static, names)
+    entry = loadEntry(parameters, key)
+    if entry is None or (entry["supported"] and not os.path.isfile(getCNFFile(parameters, key))):
+        entry = translateStatic(parameters, key, static, [(name, widths[name]) for name in names])
+    if not entry["supported"]:
+        return None
+    return {"key": key, "entry": entry, "values": values}
+
+
+def getStaticModel(model, parameters):
+    """
+    Removes the asserts of fixed variables and of the weight and returns
+    the static model and the removed values.
+    """
+    static = ""
+    values = {}
+    for line in model.splitlines(True):
+        match = re.match(r"ASSERT\((\w+) = (\w+)\);\s*$", line)
+        if match and (match.group(1) in parameters["fixedVariables"] or
+                      match.group(1) == "weight"):
+            value = parseConstant(match.group(2))
+            if value is not None and match.group(1) not in values:
+                values[match.group(1)] = value
+                continue
+        static += line
+    return static, values
+
+
+def parseConstant(constant):
+    """
+    Returns the value of a bitvector constant or None.
+    """
+    for prefix, base in [("0hex", 16), ("0bin", 2), ("0x", 16), ("0b", 2)]:
+        if constant.startswith(prefix):
+            try:
+                return int(constant[len(prefix):], base)
+            except ValueError:
+                return None
+    return None
+
+
+def getWidths(model):
+    """
+    Returns the width of each bitvector variable.
+    """
+    widths = {}
+    for match in re.finditer(r"^(.*): BITVECTOR\((\d+)\);", model, re.MULTILINE):
+        for name in match.group(1).replace(" ", "").split(","):
+            widths[name] = int(match.group(2))
+    return widths
+
+
+def getStaticHash(static, names):
+    """
+    The static model is hashed like a result cache entry, together with
+    the mapped variables.
+    """
+    static_hash = hashlib.sha256(",".join(names).encode("utf-8"))
+    for line in sorted(set(re.sub(r"\s+", " ", line).strip() for line in static.splitlines())):
+        if line and not line.startswith("%"):
+            static_hash.update(line.encode("utf-8"))
+            static_hash.update(b"\n")
+    return static_hash.hexdigest()
+
+
+def getCacheDir(parameters):
+    return os.path.join(parameters["cachedir"], "cnf")
+
+
+def getCNFFile(parameters, key):
+    return os.path.join(getCacheDir(parameters), key + ".cnf")
+
+
+def loadEntry(parameters, key):
+    try:
+        with open(os.path.join(getCacheDir(parameters), key + ".json"), "r") as input_file:
+            return json.load(input_file)
+    except (OSError, ValueError):
+        return None
+
+
+def translateStatic(parameters, key, static, variables):
+    """
+    Translates the static model and the probes, and stores the static CNF
+    and the CNF variable of each fixed bit. variables is the list of
+    (name, width) to map.
+    """
+    start_time = time.time()
+    bits = [(name, bit) for name, width in variables for bit in range(width)]
+    patterns = getProbePatterns(len(bits))
+
+    work_dir = os.path.join(parameters["tmpdir"], "cnf-{}".format(key[:16]))
+    models = [static]
+    for pattern in patterns:
+        models.append(getProbeModel(static, variables, pattern))
+
+    async def translate(manager):
+        jobs = []
+        for index, model in enumerate(models):
+            probe_dir = os.path.join(work_dir, str(index))
+            os.makedirs(probe_dir, exist_ok=True)
+            stp_file = os.path.join(probe_dir, "model.stp")
+            with open(stp_file, "w") as model_file:
+                model_file.write(model)
+            cnf_command, cnf_dir = solvers.getCNFCommand(stp_file)
+            jobs.append(manager.check(cnf_command, cwd=cnf_dir))
+        await asyncio.gather(*jobs)
+
+    processes.runManaged(parameters, translate)
+    base = readCNF(os.path.join(work_dir, "0", "output_0.cnf"))
+    probes = [readCNF(os.path.join(work_dir, str(index + 1), "output_0.cnf"))
+              for index in range(len(patterns))]
+    literals = getLiterals(base, probes, len(bits))
+
+    entry = {"supported": literals is not None, "variables": base[0], "clauses": len(base[1])}
+    os.makedirs(getCacheDir(parameters), exist_ok=True)
+    if literals is not None:
+        entry["literals"] = {}
+        for (name, bit), literal in zip(bits, literals):
+            entry["literals"].setdefault(name, []).append(literal)
+        cnf_file = getCNFFile(parameters, key)
+        tmp_file = "{}.{}".format(cnf_file, os.getpid())
+        shutil.copyfile(os.path.join(work_dir, "0", "output_0.cnf"), tmp_file)
+        os.replace(tmp_file, cnf_file)
+    else:
+        print("\tCNF of the static model can not be reused, translating every model")
+    entry["time"] = time.time() - start_time
+
+    entry_file = os.path.join(getCacheDir(parameters), key + ".json")
+    tmp_file = "{}.{}".format(entry_file, os.getpid())
+    with open(tmp_file, "w") as output_file:
+        json.dump(entry, output_file)
+    os.replace(tmp_file, entry_file)
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    recordTranslation(parameters, entry["time"])
+    return entry
+
+
+def getProbePatterns(bits):
+    """
+    Probe j sets bit i to bit j of i, the last probe sets all bits. Hence
+    the signs of the unit clauses of a CNF variable give the index of its
+    bit (decoded by getLiterals).
+    """
+    patterns = [[(index >> j) & 1 for index in range(bits)]
+                for j in range(max(1, (bits - 1).bit_length()))]
+    patterns.append([1] * bits)
+    return patterns
+
+
+def getProbeModel(static, variables, pattern):
+    """
+    Fixes the mapped variables to the given bits.
+    """
+    constraints = ""
+    index = 0
+    for name, width in variables:
+        value = 0
+        for bit in range(width):
+            value |= pattern[index] << bit
+            index += 1
+        constraints += "ASSERT({0} = 0bin{1:0{2}b});\n".format(name, value, width)
+    return static.replace("QUERY(FALSE);", constraints + "QUERY(FALSE);")
+
+
+def readCNF(cnf_file):
+    """
+    Returns the number of variables and the clauses of a DIMACS file.
+    """
+    variables = 0
+    clauses = []
+    with open(cnf_file, "r") as input_file:
+        for line in input_file:
+            if line.startswith("p cnf"):
+                variables = int(line.split()[2])
+            elif line.strip() and not line.startswith("c"):
+                clauses.append(" ".join(line.split()))
+    return variables, clauses
+
+
+def getLiterals(base, probes, bits):
+    """
+    Returns the CNF variable of each fixed bit, or None if a probe differs
+    from the static CNF by more than one unit clause per bit.
+    """
+    clauses = set(base[1])
+    signs = {}
+    for index, (variables, probe) in enumerate(probes):
+        added = set(probe) - clauses
+        if variables != base[0] or len(added) != bits or not clauses <= set(probe):
+            return None
+        for clause in added:
+            literal = clause.split()
+            if len(literal) != 2 or literal[1] != "0":
+                return None
+            signs.setdefault(abs(int(literal[0])), []).append(int(literal[0]) > 0)
+
+    literals = [None] * bits
+    for variable, variable_signs in signs.items():
+        # Every bit is set by the last probe
+        if len(variable_signs) != len(probes) or not variable_signs[-1]:
+            return None
+        index = sum(sign << j for j, sign in enumerate(variable_signs[:-1]))
+        if index >= bits or literals[index] is not None:
+            return None
+        literals[index] = variable
+    if None in literals:
+        return None
+    return literals
+
+
+def writeCNF(parameters, translation, cnf_dir, bits=None):
+    """
+    Writes the CNF of the model to cnf_dir/output_0.cnf, like
+    solvers.getCNFCommand. bits are additional fixed bits (name, bit,
+    value).
+    """
+    start_time = time.time()
+    entry = translation["entry"]
+    units = []
+    for name, value in translation["values"].items():
+        for bit, variable in enumerate(entry["literals"][name]):
+            units.append((variable, (value >> bit) & 1))
+    for name, bit, value in bits or []:
+        units.append((entry["literals"][name][bit], value))
+
+    with open(getCNFFile(parameters, translation["key"]), "r") as input_file, \
+         open(os.path.join(cnf_dir, "output_0.cnf"), "w") as output_file:
+        for line in input_file:
+            if line.startswith("p cnf"):
+                line = "p cnf {} {}\n".format(entry["variables"], entry["clauses"] + len(units))
+            output_file.write(line)
+        for variable, value in units:
+            output_file.write("{}{} 0\n".format("" if value else "-", variable))
+
+    statistics = parameters["cnfCache"]
+    statistics["reused"] += 1
+    statistics["reuseTime"] += time.time() - start_time
+    return
+
+
+def recordTranslation(parameters, translation_time):
+    statistics = parameters["cnfCache"]
+    statistics["translated"] += 1
+    statistics["translationTime"] += translation_time
+    return
+
+
+def printStatistics(parameters):
+    statistics = parameters["cnfCache"]
+    if statistics["translated"] + statistics["reused"] == 0:
+        return
+    print("CNF translation: {} models translated in {}s, {} from the cache in {}s".format(
+        statistics["translated"], round(statistics["translationTime"], 2),
+        statistics["reused"], round(statistics["reuseTime"], 2)))
+    return
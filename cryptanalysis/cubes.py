@@ -0,0 +1,141 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Cube-and-conquer solution counting. The model is split into disjoint cubes
+by fixing nibbles of the middle state of the trail. The cubes are counted
+in parallel and cubes which take too long are split further by the next
+nibble. Every solution lies in exactly one cube, hence the sum equals the
+sequential count.
+'''
+
+from cryptanalysis import solvers, processes, cnfcache, solverstats
+from config import MAX_CHARACTERISTICS
+
+import asyncio
+import os
+import re
+import shutil
+import time
+
+
+def countSolutionsCubes(stp_file, parameters):
+    """
+    Returns the number of solutions of the STP model using
+    parameters["countworkers"] parallel solvers, or None if the model can
+    not be split.
+    """
+    split_variable = getSplitVariable(stp_file, parameters)
+    if split_variable is None:
+        return None
+
+    variable, nibbles = split_variable
+    with open(stp_file, "r") as model_file:
+        model = model_file.read()
+
+    translation = cnfcache.getTranslation(stp_file, parameters, [variable])
+
+    cube_dir = "{}-cubes".format(os.path.splitext(stp_file)[0])
+    os.makedirs(cube_dir, exist_ok=True)
+    start_time = time.time()
+
+    async def countCubes(manager):
+        # A cube is the list of fixed nibbles
+        pending = [[(variable, 0, value)] for value in range(16)]
+        running = {}
+        solutions = 0
+        counted = 0
+        resplit = 0
+        cube_id = 0
+        while pending or running:
+            while pending and len(running) < parameters["countworkers"]:
+                cube = pending.pop(0)
+                # The last nibble is always counted to completion
+                timeout = parameters["cubetimeout"] if len(cube) < nibbles else None
+                task = asyncio.ensure_future(countCube(manager, parameters, model, translation,
+                                                       cube, os.path.join(cube_dir, str(cube_id)),
+                                                       timeout))
+                running[task] = cube
+                cube_id += 1
+
+            done, _ = await asyncio.wait(running, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                cube = running.pop(task)
+                result = task.result()
+                if result is None:
+                    # Too slow or too large, split by the next nibble
+                    pending += [cube + [(variable, len(cube), value)] for value in range(16)]
+                    resplit += 1
+                else:
+                    solutions += result
+                    counted += 1
+            manager.details["cubes"] = "{} counted, {} pending, {} re-split".format(
+                counted, len(pending) + len(running), resplit)
+        return solutions, counted
+
+    solutions, counted = processes.runManaged(parameters, countCubes)
+
+    shutil.rmtree(cube_dir, ignore_errors=True)
+    print("\tCounted {} cubes in {}s".format(counted, round(time.time() - start_time, 2)))
+
+    # Same limit as for a single solver run
+    return min(solutions, MAX_CHARACTERISTICS // 2)
+
+
+def getSplitVariable(stp_file, parameters):
+    """
+    Returns the middle state of the trail and its number of nibbles if it
+    is a free variable of the model.
+    """
+    if parameters["rounds"] < 2:
+        return None
+
+    variable = "X{}".format(parameters["rounds"] // 2)
+    if variable in parameters["fixedVariables"]:
+        return None
+
+    with open(stp_file, "r") as model_file:
+        for line in model_file:
+            match = re.match(r"(.*): BITVECTOR\((\d+)\);", line)
+            if match and variable in match.group(1).replace(" ", "").split(","):
+                return variable, int(match.group(2)) // 4
+    return None
+
+
+async def countCube(manager, parameters, model, translation, cube, cube_dir, timeout):
+    """
+    Returns the number of solutions in the cube, or None if the solver did
+    not finish within timeout seconds or exceeded the memory limit. The CNF
+    is composed from the cached translation if it is given.
+    """
+    os.makedirs(cube_dir, exist_ok=True)
+    stp_file = os.path.join(cube_dir, "cube.stp")
+    cnf_command, cnf_dir = solvers.getCNFCommand(stp_file)
+
+    if translation is not None:
+        bits = [(variable, 4*nibble + bit, (value >> bit) & 1)
+                for variable, nibble, value in cube for bit in range(4)]
+        cnfcache.writeCNF(parameters, translation, cnf_dir, bits)
+    else:
+        constraints = ""
+        for variable, nibble, value in cube:
+            constraints += "ASSERT({0}[{1}:{2}] = 0bin{3:04b});\n".format(variable, 4*nibble + 3,
+                                                                         4*nibble, value)
+        with open(stp_file, "w") as cube_file:
+            cube_file.write(model.replace("QUERY(FALSE);", constraints + "QUERY(FALSE);"))
+        result = await manager.check(cnf_command, cwd=cnf_dir)
+        cnfcache.recordTranslation(parameters, result["time"])
+
+    result = await manager.run(solvers.getSATCommand(cnf_dir, parameters), timeout=timeout)
+    solverstats.recordCall(parameters, "cryptominisat", result["time"], result["statistics"])
+
+    shutil.rmtree(cube_dir, ignore_errors=True)
+    if result["status"] == "memory" and timeout is None:
+        raise RuntimeError("CryptoMiniSat exceeded the memory limit for a cube of {}".format(
+            cube_dir))
+    if result["status"] != "done":
+        return None
+
+    # The encoded CNF contains every solution twice
+    return result["solutions"] // 2
@@ -0,0 +1,202 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Metrics of a running search in the Prometheus text format. They are served
+on http://127.0.0.1:<metricsport>/metrics and/or rewritten to metricsfile
+every metricsinterval seconds (e.g. for the textfile collector of the node
+exporter). The metrics are read from the parameters of the main process,
+workers are included once their statistics have been merged.
+'''
+
+import atexit
+import http.server
+import math
+import os
+import threading
+import time
+
+# Exporter of this run
+exporter = None
+
+
+class MetricsHandler(http.server.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path not in ["/", "/metrics"]:
+            self.send_error(404)
+            return
+        body = getMetrics(self.server.parameters, self.server.start_time).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        return
+
+    def log_message(self, format, *args):
+        # Scrapes would end up in the search output
+        return
+
+
+class MetricsExporter:
+    """
+    Serves and writes the metrics from background threads.
+    """
+
+    def __init__(self, parameters):
+        self.parameters = parameters
+        self.start_time = time.time()
+        self.pid = os.getpid()
+        self.stopped = threading.Event()
+        self.server = None
+        self.writer = None
+        if parameters["metricsport"]:
+            self.server = http.server.ThreadingHTTPServer(("127.0.0.1", parameters["metricsport"]),
+                                                          MetricsHandler)
+            self.server.daemon_threads = True
+            self.server.parameters = parameters
+            self.server.start_time = self.start_time
+            threading.Thread(target=self.server.serve_forever, daemon=True).start()
+            print("Serving metrics on http://127.0.0.1:{}/metrics".format(parameters["metricsport"]))
+        if parameters["metricsfile"]:
+            self.writer = threading.Thread(target=self.writePeriodically, daemon=True)
+            self.writer.start()
+
+    def writePeriodically(self):
+        while not self.stopped.wait(self.parameters["metricsinterval"]):
+            self.write()
+        return
+
+    def write(self):
+        # Collectors must never see a partial file
+        metrics_file = self.parameters["metricsfile"]
+        try:
+            with open(metrics_file + ".tmp", "w") as output_file:
+                output_file.write(getMetrics(self.parameters, self.start_time))
+            os.replace(metrics_file + ".tmp", metrics_file)
+        except Exception as error:
+            # A failed write must not end the writer thread
+            print("Writing the metrics to {} failed: {}".format(metrics_file, repr(error)))
+        return
+
+    def stop(self):
+        self.stopped.set()
+        if self.writer is not None:
+            self.writer.join()
+            self.write()
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+        return
+
+
+def start(parameters):
+    """
+    Starts exporting the metrics of parameters if metricsport or
+    metricsfile is set.
+    """
+    global exporter
+    if not parameters["metricsport"] and not parameters["metricsfile"]:
+        return
+    exporter = MetricsExporter(parameters)
+    # The search ends with quit() once the weight limit is reached
+    atexit.register(stop)
+    return
+
+
+def stop():
+    global exporter
+    if exporter is None or exporter.pid != os.getpid():
+        return
+    exporter.stop()
+    exporter = None
+    return
+
+
+def recordSolverCall(parameters, start_time):
+    statistics = parameters["solverTime"]
+    statistics["calls"] += 1
+    statistics["time"] += time.time() - start_time
+    return
+
+
+def recordProbability(parameters, boomerangProb):
+    """
+    Keeps the best boomerang probability found so far (log2).
+    """
+    if 0 < boomerangProb <= 1:
+        probability = math.log(boomerangProb, 2)
+        if parameters["bestProbability"] is None or probability > parameters["bestProbability"]:
+            parameters["bestProbability"] = probability
+    return
+
+
+def escapeLabel(value):
+    """
+    Escapes a label value, e.g. a cipher name from a spec file.
+    """
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def getMetrics(parameters, start_time):
+    """
+    Returns the metrics in the Prometheus text format. The search changes
+    the statistics while they are read, hence they are copied first.
+    """
+    lines = []
+    clusters = sorted((face, dict(statistics))
+                      for face, statistics in dict(parameters["clusterStatistics"]).items())
+    solverTime = dict(parameters["solverTime"])
+    resultCache = dict(parameters["resultCache"])
+    cnfCache = dict(parameters["cnfCache"])
+    warmStart = dict(parameters["warmStart"])
+
+    def metric(name, kind, description, samples):
+        lines.append("# HELP cryptosmt_{} {}".format(name, description))
+        lines.append("# TYPE cryptosmt_{} {}".format(name, kind))
+        for labels, value in samples:
+            label = ",".join('{}="{}"'.format(key, escapeLabel(text)) for key, text in labels)
+            lines.append("cryptosmt_{}{} {}".format(name, "{" + label + "}" if label else "", value))
+
+    elapsed = time.time() - start_time
+    metric("info", "gauge", "Cipher and rounds of the search.",
+           [((("cipher", parameters["cipher"]), ("uppertrail", parameters["uppertrail"]),
+              ("lowertrail", parameters["lowertrail"])), 1)])
+    metric("phase", "gauge", "Current phase of the search.", [((("phase", parameters["phase"]),), 1)])
+    if parameters["bestProbability"] is not None:
+        metric("boomerang_probability_log2", "gauge", "Best boomerang probability found (log2).",
+               [((), parameters["bestProbability"])])
+    metric("boomerang_trails", "gauge", "Boomerang trails found.",
+           [((), len(parameters["boomerangTrails"]))])
+    metric("target_weight", "gauge", "Weight of the current model.", [((), parameters["sweight"])])
+
+    metric("solver_calls_total", "counter", "Solver runs (without cached results).",
+           [((), solverTime["calls"])])
+    metric("solver_seconds_total", "counter", "Time spent in solver runs.",
+           [((), round(solverTime["time"], 3))])
+
+    metric("clustered_differentials_total", "counter", "Differentials clustered.",
+           [((("face", face),), statistics["count"]) for face, statistics in clusters])
+    metric("clustering_levels_total", "counter", "Weight levels clustered.",
+           [((("face", face),), statistics["depth"]) for face, statistics in clusters])
+    metric("clustering_seconds_total", "counter", "Time spent clustering.",
+           [((("face", face),), round(statistics["time"], 3)) for face, statistics in clusters])
+
+    caches = [("result", resultCache["hits"], resultCache["hits"] + resultCache["misses"]),
+              ("cnf", cnfCache["reused"], cnfCache["reused"] + cnfCache["translated"]),
+              ("warmstart", warmStart["hits"], warmStart["warm"])]
+    metric("cache_hits_total", "counter", "Cache hits.",
+           [((("cache", cache),), hits) for cache, hits, lookups in caches])
+    metric("cache_lookups_total", "counter", "Cache lookups.",
+           [((("cache", cache),), lookups) for cache, hits, lookups in caches])
+    metric("cache_hit_ratio", "gauge", "Fraction of the cache lookups which were hits.",
+           [((("cache", cache),), round(hits / lookups, 4)) for cache, hits, lookups in caches
+            if lookups > 0])
+
+    metric("elapsed_seconds", "gauge", "Time since the search was started.", [((), round(elapsed, 1))])
+    if parameters["timelimit"] != -1:
+        metric("time_left_seconds", "gauge", "Time left before timelimit.",
+               [((), round(max(parameters["timelimit"] - elapsed, 0), 1))])
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,110 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Sizes of the generated solver inputs. Every STP model and CNF is measured
+and the sizes are summed per phase of the search (parameters["phase"]:
+upper, lower, clustering, ...), such that growing models can be related
+to slow phases.
+'''
+
+import os
+import re
+
+# Summed fields, the remaining fields are maxima
+SUMS = ["models", "variables", "bits", "asserts", "bytes", "blocked",
+        "cnfs", "cnfVariables", "cnfClauses"]
+MAXIMA = ["maxBytes", "maxBlocked", "maxClauses"]
+
+
+def getPhaseStatistics(parameters):
+    return parameters["modelStatistics"].setdefault(
+        parameters["phase"], {name: 0 for name in SUMS + MAXIMA})
+
+
+def recordModel(parameters, stp_file):
+    """
+    Records the number of variables, bits and asserts, the size and the
+    number of blocked characteristics of an STP model.
+    """
+    statistics = getPhaseStatistics(parameters)
+    variables = 0
+    bits = 0
+    asserts = 0
+    with open(stp_file, "r") as model_file:
+        for line in model_file:
+            if line.startswith("ASSERT"):
+                asserts += 1
+                continue
+            match = re.match(r"(.*): BITVECTOR\((\d+)\);", line)
+            if match:
+                names = len(match.group(1).split(","))
+                variables += names
+                bits += names*int(match.group(2))
+
+    size = os.path.getsize(stp_file)
+    blocked = len(parameters["blockedCharacteristics"])
+    statistics["models"] += 1
+    statistics["variables"] += variables
+    statistics["bits"] += bits
+    statistics["asserts"] += asserts
+    statistics["bytes"] += size
+    statistics["blocked"] += blocked
+    statistics["maxBytes"] = max(statistics["maxBytes"], size)
+    statistics["maxBlocked"] = max(statistics["maxBlocked"], blocked)
+    return
+
+
+def recordCNF(parameters, cnf_file):
+    """
+    Records the number of variables and clauses of a DIMACS file.
+    """
+    with open(cnf_file, "r") as input_file:
+        for line in input_file:
+            if line.startswith("p cnf"):
+                variables, clauses = [int(value) for value in line.split()[2:4]]
+                break
+        else:
+            return
+
+    statistics = getPhaseStatistics(parameters)
+    statistics["cnfs"] += 1
+    statistics["cnfVariables"] += variables
+    statistics["cnfClauses"] += clauses
+    statistics["maxClauses"] = max(statistics["maxClauses"], clauses)
+    return
+
+
+def mergeStatistics(parameters, statistics, initial=None):
+    """
+    Adds the model statistics of a worker, initial are the statistics when
+    the worker was started.
+    """
+    initial = initial or {}
+    for phase, entry in statistics.items():
+        base = initial.get(phase, {})
+        merged = parameters["modelStatistics"].setdefault(phase, {name: 0 for name in SUMS + MAXIMA})
+        for name in SUMS:
+            merged[name] += entry[name] - base.get(name, 0)
+        for name in MAXIMA:
+            merged[name] = max(merged[name], entry[name])
+    return
+
+
+def printStatistics(parameters):
+    for phase, statistics in sorted(parameters["modelStatistics"].items()):
+        models = statistics["models"]
+        if models > 0:
+            print("Models ({}): {} models with {} variables ({} bits), {} asserts and {} KB "
+                  "on average, largest {} KB, up to {} blocked trails".format(
+                      phase, models, statistics["variables"] // models, statistics["bits"] // models,
+                      statistics["asserts"] // models, round(statistics["bytes"] / models / 1024, 1),
+                      round(statistics["maxBytes"] / 1024, 1), statistics["maxBlocked"]))
+        cnfs = statistics["cnfs"]
+        if cnfs > 0:
+            print("CNF ({}): {} CNFs with {} variables and {} clauses on average, "
+                  "up to {} clauses".format(phase, cnfs, statistics["cnfVariables"] // cnfs,
+                                            statistics["cnfClauses"] // cnfs,
+                                            statistics["maxClauses"]))
+    return
@@ -0,0 +1,113 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Pipelined clustering. The clustering of a boomerang trail runs on a
+background process pool while the lower trail search continues. The
+contributions of finished trails are collected in probability.
+'''
+
+from cryptanalysis import boomerang, search, processes
+
+import concurrent.futures
+import math
+import multiprocessing
+
+
+class ClusterPipeline(object):
+    """
+    Background clustering of the upper and lower differentials of boomerang
+    trails. Each upper differential is clustered once.
+    """
+
+    def __init__(self, workers):
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("fork"))
+        self.upper = {}
+        self.pending = []
+        self.jobs = 0
+        self.probability = 0
+
+    def submit(self, cipher, parameters, timestamp, trail, switchProb):
+        """
+        Starts the clustering of a boomerang trail given as dict with alpha,
+        beta, gamma, delta, upperWeight and lowerWeight.
+        """
+        upperKey = (trail["alpha"], trail["beta"], trail["upperWeight"])
+        if upperKey not in self.upper:
+            self.upper[upperKey] = self.submitJob(cipher, parameters, timestamp, trail["alpha"],
+                                                  trail["beta"], trail["upperWeight"], "upper")
+        lower = self.submitJob(cipher, parameters, timestamp, trail["gamma"], trail["delta"],
+                               trail["lowerWeight"], "lower")
+        self.pending.append((self.upper[upperKey], lower, trail, switchProb))
+        print("Submitted clustering of boomerang trail with weights {}, {} ({} pending)".format(
+            trail["upperWeight"], trail["lowerWeight"], len(self.pending)))
+        return
+
+    def submitJob(self, cipher, parameters, timestamp, input, output, weight, boomerangFace):
+        job_parameters = processes.getWorkerParameters(parameters, "cluster-{}".format(self.jobs),
+                                                       statistics=True)
+        self.jobs += 1
+        return self.executor.submit(clusterJob, cipher, job_parameters, input, output,
+                                    weight, timestamp, boomerangFace)
+
+    def getUpperProb(self, alpha, beta, upperWeight):
+        """
+        Returns the clustered upper differential if it is known, otherwise 0.
+        """
+        future = self.upper.get((alpha, beta, upperWeight))
+        if future is None or not future.done():
+            return 0
+        return future.result()[0]
+
+    def collect(self, parameters, wait=False):
+        """
+        Adds the contributions of the finished boomerang trails. With wait,
+        all pending trails are finished first.
+        """
+        pending = []
+        for upper, lower, trail, switchProb in self.pending:
+            if not wait and not (upper.done() and lower.done()):
+                pending.append((upper, lower, trail, switchProb))
+                continue
+            diff_upper, upper_statistics = upper.result()
+            diff_lower, lower_statistics = lower.result()
+            # Statistics of shared upper clusterings are only merged once
+            for statistics in [upper_statistics, lower_statistics]:
+                if statistics:
+                    processes.mergeStatistics(parameters, statistics)
+                    statistics.clear()
+            if diff_upper == 0 or diff_lower == 0:
+                # Time limit reached while clustering
+                continue
+
+            self.probability += diff_upper*diff_upper*diff_lower*diff_lower*switchProb
+            trail = dict(trail)
+            trail["upperProb"] = math.log(diff_upper, 2)
+            trail["lowerProb"] = math.log(diff_lower, 2)
+            trail["switchProb"] = math.log(switchProb, 2)
+            parameters["boomerangTrails"].append(trail)
+            print("Found boomerang trail: {}, {}, {}".format(trail["upperProb"], trail["lowerProb"],
+                                                            trail["switchProb"]))
+            print("Boomerang probability: {}".format(math.log(self.probability, 2)))
+            print("----")
+        self.pending = pending
+        return
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+        return
+
+
+def clusterJob(cipher, parameters, input, output, weight, timestamp, boomerangFace):
+    """
+    Clusters one differential. The jobs run on the processes of the pool,
+    hence they do not have their own process group.
+    """
+    diff_prob = 0
+    with processes.workerOutput(parameters, "clustering", group=False):
+        while not search.reachedTimelimit(timestamp, parameters["timelimit"]) and diff_prob == 0:
+            diff_prob = boomerang.boomerangDifferential(cipher, parameters, input, output,
+                                                        weight, timestamp, boomerangFace)
+    return diff_prob, processes.getStatistics(parameters)
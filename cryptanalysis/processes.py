@@ -0,0 +1,290 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Supervises solver processes from a single asyncio event loop. The output
+of each process is parsed incrementally, deadlines and memory limits are
+enforced per job, and the progress of all jobs is published at most every
+progressinterval seconds, either as a single status line or as a stream
+of json events (progressformat).
+
+The worker processes of the parallel searches (round splits, upper trails,
+candidates and clustering jobs) are set up, stopped and merged with the
+helpers at the end of this module.
+'''
+
+from cryptanalysis import solverstats, modelstats, resultstore, trace
+
+import asyncio
+import contextlib
+import json
+import os
+import signal
+import subprocess
+import time
+
+LINE_LIMIT = 2**26
+
+# Statistics which each worker collects in its own copy of the parameters
+STATISTICS = ["clusterStatistics", "pruning", "resultCache", "warmStart", "weightSearch",
+              "cnfCache", "modelStatistics", "solverCalls", "solverTime"]
+COUNTERS = ["pruning", "resultCache", "warmStart", "weightSearch", "cnfCache", "solverTime"]
+
+
+class ProcessManager(object):
+    """
+    Runs solver processes and reports their progress. details can be set
+    by the caller and is included in the progress reports.
+    """
+
+    def __init__(self, parameters):
+        self.interval = parameters["progressinterval"]
+        self.format = parameters["progressformat"]
+        self.memorylimit = parameters["memorylimit"]
+        self.statistics = parameters["solverstats"]
+        self.jobs = {}
+        self.details = {}
+        self.started = 0
+        self.finished = 0
+        self.solutions = 0
+        self.start_time = time.time()
+
+    async def supervise(self, main):
+        """
+        Runs main(manager) and reports the progress until it returns.
+        """
+        reporter = asyncio.ensure_future(self.report())
+        try:
+            return await main(self)
+        finally:
+            reporter.cancel()
+            self.publish(final=True)
+
+    async def run(self, command, cwd=None, timeout=None, log_file=None):
+        """
+        Runs command and returns {"status", "returncode", "solutions",
+        "time", "statistics"}. status is "done", "timeout" (after timeout
+        seconds) or "memory" (resident memory above memorylimit MB).
+        solutions is the number of "s SATISFIABLE" lines. statistics are
+        parsed from the comment lines with solverstats.
+        """
+        # Solutions are printed on a single line
+        process = await asyncio.create_subprocess_exec(*command, cwd=cwd, limit=LINE_LIMIT,
+                                                       stdout=asyncio.subprocess.PIPE,
+                                                       stderr=asyncio.subprocess.DEVNULL)
+        job = {"status": "done", "solutions": 0, "start": time.time(), "memory": 0}
+        comments = []
+        key = self.started
+        self.started += 1
+        self.jobs[key] = job
+        watchdog = asyncio.ensure_future(self.watch(process, job, timeout))
+
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                if log_file is not None:
+                    log_file.write(line.decode("utf-8"))
+                if b"s SATISFIABLE" in line:
+                    job["solutions"] += 1
+                elif self.statistics and line.startswith(b"c "):
+                    comments.append(line.decode("utf-8"))
+            returncode = await process.wait()
+        finally:
+            watchdog.cancel()
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+            del self.jobs[key]
+
+        self.finished += 1
+        if job["status"] == "done":
+            self.solutions += job["solutions"] // 2
+        statistics = {}
+        if self.statistics:
+            statistics = solverstats.parseStatistics("".join(comments))
+            if job["memory"] > 0:
+                statistics.setdefault("memory", job["memory"])
+        return {"status": job["status"],
+                "returncode": returncode,
+                "solutions": job["solutions"],
+                "time": time.time() - job["start"],
+                "statistics": statistics}
+
+    async def check(self, command, cwd=None):
+        """
+        Runs command like subprocess.check_output.
+        """
+        result = await self.run(command, cwd=cwd)
+        if result["returncode"] != 0:
+            raise subprocess.CalledProcessError(result["returncode"], command)
+        return result
+
+    async def watch(self, process, job, timeout):
+        """
+        Kills the process if it exceeds its deadline or the memory limit.
+        """
+        while process.returncode is None:
+            delay = self.interval
+            if timeout is not None:
+                remaining = job["start"] + timeout - time.time()
+                if remaining <= 0:
+                    job["status"] = "timeout"
+                    process.kill()
+                    return
+                delay = min(delay, remaining)
+            await asyncio.sleep(delay)
+            if self.statistics:
+                job["memory"] = max(job["memory"], getResidentMemory(process.pid, "VmHWM"))
+            if self.memorylimit > 0 and getResidentMemory(process.pid) > self.memorylimit:
+                job["status"] = "memory"
+                process.kill()
+                return
+        return
+
+    async def report(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.publish()
+
+    def publish(self, final=False):
+        """
+        Prints the progress of all jobs. Solutions are counted once (the
+        encoded CNF contains every solution twice).
+        """
+        elapsed = time.time() - self.start_time
+        solutions = self.solutions + sum(job["solutions"] // 2 for job in self.jobs.values())
+        rate = solutions / elapsed if elapsed > 0 else 0
+        if self.format == "json":
+            event = {"event": "finished" if final else "progress",
+                     "running": len(self.jobs),
+                     "finished": self.finished,
+                     "solutions": solutions,
+                     "rate": round(rate, 2),
+                     "elapsed": round(elapsed, 2)}
+            event.update(self.details)
+            print(json.dumps(event), flush=True)
+        else:
+            details = "".join(" - {}: {}".format(key, value) for key, value in self.details.items())
+            print("\r\tSolutions: {} ({}/s) - Processes: {} running, {} finished{} - Time: {}s".format(
+                solutions, round(rate, 2), len(self.jobs), self.finished, details,
+                round(elapsed, 2)), end="\n" if final else "", flush=True)
+        return
+
+
+def runManaged(parameters, main):
+    """
+    Runs the coroutine main(manager) with a new process manager.
+    """
+    manager = ProcessManager(parameters)
+    return asyncio.run(manager.supervise(main))
+
+
+def getResidentMemory(pid, field="VmRSS"):
+    """
+    Returns the resident memory (VmRSS) or its peak (VmHWM) of the process
+    in MB, or 0 if it is not available.
+    """
+    try:
+        with open("/proc/{}/status".format(pid), "r") as status_file:
+            for line in status_file:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return 0
+
+
+def getWorkerParameters(parameters, name, statistics=False):
+    """
+    Returns the parameters of a worker. Each worker has its own temporary
+    directory tmpdir/name, fixed variables, trails and blocked
+    characteristics. With statistics, the worker starts with empty
+    statistics.
+    """
+    worker_parameters = dict(parameters)
+    worker_parameters["tmpdir"] = os.path.join(parameters["tmpdir"], name)
+    worker_parameters["fixedVariables"] = {}
+    worker_parameters["boomerangVariables"] = dict(parameters["boomerangVariables"])
+    worker_parameters["blockedCharacteristics"] = []
+    worker_parameters["blockedUpperCharacteristics"] = []
+    worker_parameters["blockedLowerCharacteristics"] = []
+    worker_parameters["boomerangTrails"] = []
+    worker_parameters["clusterPipeline"] = None
+    if statistics:
+        worker_parameters.update(getEmptyStatistics(parameters))
+    return worker_parameters
+
+
+def getEmptyStatistics(parameters):
+    statistics = {"clusterStatistics": {}, "modelStatistics": {}, "solverCalls": []}
+    for key in COUNTERS:
+        statistics[key] = {name: 0 for name in parameters[key]}
+    return statistics
+
+
+def getStatistics(parameters):
+    """
+    Returns the statistics of a worker, which are sent to the parent.
+    """
+    return {key: parameters[key] for key in STATISTICS}
+
+
+@contextlib.contextmanager
+def workerOutput(parameters, name, group=True):
+    """
+    Runs the enclosed code of a worker with the output written to
+    output.log in its temporary directory. With group, the worker has its
+    own process group, such that stopWorker also kills its solvers.
+    Buffered results and trace events are written at the end.
+    """
+    if group:
+        os.setsid()
+    os.makedirs(parameters["tmpdir"], exist_ok=True)
+    trace.nameProcess(name)
+    try:
+        with open(os.path.join(parameters["tmpdir"], "output.log"), "w") as log_file, \
+             contextlib.redirect_stdout(log_file):
+            yield
+    finally:
+        resultstore.flush(parameters)
+        trace.flush()
+
+
+def stopWorker(worker):
+    """
+    Kills a worker together with its solver processes.
+    """
+    if worker.is_alive():
+        try:
+            os.killpg(worker.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+    worker.join()
+    return
+
+
+def mergeStatistics(parameters, statistics, initial=None):
+    """
+    Adds the statistics collected by a worker, initial are the statistics
+    when the worker was started (by default none).
+    """
+    initial = initial or getEmptyStatistics(parameters)
+    for face, entry in statistics["clusterStatistics"].items():
+        base = initial["clusterStatistics"].get(face, {"gain": None, "time": 0, "count": 0, "depth": 0})
+        merged = parameters["clusterStatistics"].setdefault(face, {"gain": None, "time": 0, "count": 0,
+                                                                   "depth": 0})
+        if entry["gain"] is not None and (merged["gain"] is None or entry["gain"] > merged["gain"]):
+            merged["gain"] = entry["gain"]
+        merged["time"] += entry["time"] - base["time"]
+        merged["count"] += entry["count"] - base["count"]
+        merged["depth"] += entry["depth"] - base["depth"]
+
+    for key in COUNTERS:
+        for name, value in statistics[key].items():
+            parameters[key][name] += value - initial[key][name]
+    modelstats.mergeStatistics(parameters, statistics["modelStatistics"], initial["modelStatistics"])
+    parameters["solverCalls"] += statistics["solverCalls"][len(initial["solverCalls"]):]
+    return
@@ -0,0 +1,167 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Content-addressed cache for solver results. The key is a hash of the
+canonical model text, hence identical models from restarts, batch runs or
+round splits are only solved once. The entries are stored as json files in
+cachedir/results and the least recently used entries are evicted once the
+cache exceeds resultcachesize MB.
+'''
+
+import hashlib
+import json
+import os
+import re
+import time
+
+# Estimated size of each cache directory in bytes, the cache is only
+# scanned on the first store and when the estimate exceeds the limit
+cacheSizes = {}
+
+
+def getModelHash(stp_file, kind):
+    """
+    Returns the hash of the canonical model. Comments, whitespace and the
+    order of the lines do not change the model, hence they are removed
+    before hashing. kind separates the result types of the same model.
+    """
+    lines = set()
+    with open(stp_file, "r") as model_file:
+        for line in model_file:
+            line = re.sub(r"\s+", " ", line).strip()
+            if line and not line.startswith("%"):
+                lines.add(line)
+
+    model_hash = hashlib.sha256(kind.encode("utf-8"))
+    for line in sorted(lines):
+        model_hash.update(line.encode("utf-8"))
+        model_hash.update(b"\n")
+    return model_hash.hexdigest()
+
+
+def getCacheDir(parameters):
+    return os.path.join(parameters["cachedir"], "results")
+
+
+def getEntryFile(parameters, key):
+    return os.path.join(getCacheDir(parameters), key[:2], key + ".json")
+
+
+def isEnabled(parameters):
+    return parameters["resultcachesize"] > 0
+
+
+def lookup(parameters, key):
+    """
+    Returns the cached entry for key or None. Hits mark the entry as
+    recently used.
+    """
+    statistics = parameters["resultCache"]
+    entry_file = getEntryFile(parameters, key)
+    try:
+        with open(entry_file, "r") as input_file:
+            entry = json.load(input_file)
+        os.utime(entry_file)
+    except (OSError, ValueError):
+        # Missing, evicted by another process or partially written
+        statistics["misses"] += 1
+        return None
+
+    statistics["hits"] += 1
+    statistics["saved"] += entry["time"]
+    return entry
+
+
+def store(parameters, key, entry, solve_time):
+    """
+    Stores the result of a completed solver run and evicts old entries if
+    the cache is too large.
+    """
+    entry = dict(entry)
+    entry["time"] = solve_time
+    entry_file = getEntryFile(parameters, key)
+    os.makedirs(os.path.dirname(entry_file), exist_ok=True)
+
+    tmp_file = "{}.{}".format(entry_file, os.getpid())
+    with open(tmp_file, "w") as output_file:
+        json.dump(entry, output_file)
+    os.replace(tmp_file, entry_file)
+
+    cache_dir = getCacheDir(parameters)
+    if cache_dir not in cacheSizes:
+        cacheSizes[cache_dir] = getEntries(cache_dir)[1]
+    else:
+        cacheSizes[cache_dir] += os.path.getsize(entry_file)
+    if cacheSizes[cache_dir] > parameters["resultcachesize"] * 2**20:
+        evict(parameters)
+    return
+
+
+def evict(parameters):
+    """
+    Removes the least recently used entries until the cache is within 90%
+    of resultcachesize MB, such that the next stores do not evict again.
+    """
+    limit = 0.9 * parameters["resultcachesize"] * 2**20
+    entries, total = getEntries(getCacheDir(parameters))
+
+    entries.sort()
+    for mtime, size, entry_file in entries:
+        if total <= limit:
+            break
+        try:
+            os.remove(entry_file)
+        except OSError:
+            pass
+        total -= size
+    cacheSizes[getCacheDir(parameters)] = total
+    return
+
+
+def getEntries(cache_dir):
+    """
+    Returns the entries as (mtime, size, file) and their total size.
+    """
+    entries = []
+    total = 0
+    for root, dirs, files in os.walk(cache_dir):
+        for name in files:
+            try:
+                status = os.stat(os.path.join(root, name))
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, os.path.join(root, name)))
+            total += status.st_size
+    return entries, total
+
+
+def cached(parameters, stp_file, kind, solve):
+    """
+    Returns the cached entry for the model, or runs solve() which returns
+    the entry (a json serializable dict) and caches it.
+    """
+    if not isEnabled(parameters):
+        return solve()
+
+    key = getModelHash(stp_file, kind)
+    entry = lookup(parameters, key)
+    if entry is not None:
+        return entry
+
+    start_time = time.time()
+    entry = solve()
+    store(parameters, key, entry, time.time() - start_time)
+    return entry
+
+
+def printStatistics(parameters):
+    statistics = parameters["resultCache"]
+    requests = statistics["hits"] + statistics["misses"]
+    if requests == 0:
+        return
+    print("Result cache: {} hits, {} misses ({}% hit rate), saved about {}s".format(
+        statistics["hits"], statistics["misses"],
+        round(100 * statistics["hits"] / requests, 1), round(statistics["saved"], 2)))
+    return
@@ -0,0 +1,215 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Persistent store for the results of the boomerang search. Characteristics,
+clustered differentials, switches and boomerangs are kept in an SQLite
+database (cachedir/resultstore) with indexes on cipher, rounds, X0, X(r)
+and weight, such that past results can be queried without searching again
+(see cryptosmt-query.py). The store is only kept if resultstore is set.
+Rows are buffered and written in batches of storebatch rows, each process
+has its own buffer and connection.
+'''
+
+import atexit
+import json
+import math
+import os
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS characteristics (
+    cipher TEXT, wordsize INTEGER, rounds INTEGER, face TEXT, weight INTEGER,
+    x0 TEXT, xr TEXT, data TEXT, created REAL);
+CREATE INDEX IF NOT EXISTS characteristics_search
+    ON characteristics (cipher, rounds, face, weight);
+CREATE INDEX IF NOT EXISTS characteristics_x0 ON characteristics (x0);
+CREATE INDEX IF NOT EXISTS characteristics_xr ON characteristics (xr);
+
+CREATE TABLE IF NOT EXISTS clusters (
+    cipher TEXT, wordsize INTEGER, rounds INTEGER, face TEXT, weight INTEGER,
+    x0 TEXT, xr TEXT, probability REAL, depth INTEGER, histogram TEXT, created REAL);
+CREATE INDEX IF NOT EXISTS clusters_search ON clusters (cipher, rounds, face, probability);
+CREATE INDEX IF NOT EXISTS clusters_x0 ON clusters (x0);
+CREATE INDEX IF NOT EXISTS clusters_xr ON clusters (xr);
+
+CREATE TABLE IF NOT EXISTS switches (
+    cipher TEXT, wordsize INTEGER, beta TEXT, gamma TEXT, probability REAL, created REAL);
+CREATE INDEX IF NOT EXISTS switches_search ON switches (cipher, beta, gamma);
+
+CREATE TABLE IF NOT EXISTS boomerangs (
+    cipher TEXT, wordsize INTEGER, uppertrail INTEGER, lowertrail INTEGER,
+    x0 TEXT, xr TEXT, probability REAL, trails TEXT, created REAL);
+CREATE INDEX IF NOT EXISTS boomerangs_search
+    ON boomerangs (cipher, uppertrail, lowertrail, probability);
+CREATE INDEX IF NOT EXISTS boomerangs_x0 ON boomerangs (x0);
+CREATE INDEX IF NOT EXISTS boomerangs_xr ON boomerangs (xr);
+"""
+
+# Order of the query results for each table
+TABLE_ORDER = {"characteristics": "weight ASC",
+               "clusters": "probability DESC",
+               "switches": "probability DESC",
+               "boomerangs": "probability DESC"}
+
+# Buffered writers by (process, store file), forked processes start empty
+writers = {}
+
+
+class ResultWriter(object):
+    """
+    Buffers rows and writes them in a single transaction.
+    """
+
+    def __init__(self, store_file, batch):
+        self.store_file = store_file
+        self.batch = batch
+        self.rows = []
+
+    def add(self, table, row):
+        self.rows.append((table, row))
+        if len(self.rows) >= self.batch:
+            self.flush()
+        return
+
+    def flush(self):
+        if not self.rows:
+            return
+        connection = connect(self.store_file)
+        try:
+            with connection:
+                for table, row in self.rows:
+                    connection.execute("INSERT INTO {} ({}) VALUES ({})".format(
+                        table, ", ".join(row), ", ".join("?" * len(row))), list(row.values()))
+        finally:
+            connection.close()
+        self.rows = []
+        return
+
+
+def connect(store_file):
+    """
+    Opens the store and creates the tables if necessary. Concurrent writers
+    wait for each other.
+    """
+    directory = os.path.dirname(store_file)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    connection = sqlite3.connect(store_file, timeout=60)
+    connection.executescript(SCHEMA)
+    return connection
+
+
+def getStoreFile(parameters):
+    return os.path.join(parameters["cachedir"], parameters["resultstore"])
+
+
+def getWriter(parameters):
+    """
+    Returns the writer of this process, or None if the store is disabled.
+    """
+    if not parameters["resultstore"]:
+        return None
+    key = (os.getpid(), getStoreFile(parameters))
+    if key not in writers:
+        writers[key] = ResultWriter(key[1], parameters["storebatch"])
+        # The search ends with quit() once the weight limit is reached
+        atexit.register(writers[key].flush)
+    return writers[key]
+
+
+def record(parameters, table, row):
+    writer = getWriter(parameters)
+    if writer is None:
+        return
+    row = dict(row)
+    row["cipher"] = parameters["cipher"]
+    row["wordsize"] = parameters["wordsize"]
+    row["created"] = time.time()
+    writer.add(table, row)
+    return
+
+
+def recordCharacteristic(parameters, characteristic, boomerangFace, rounds, weight):
+    try:
+        data = characteristic.characteristic_data
+    except AttributeError:
+        return
+    record(parameters, "characteristics",
+           {"rounds": rounds, "face": boomerangFace, "weight": weight,
+            "x0": data.get("X0"), "xr": data.get("X{}".format(rounds)),
+            "data": json.dumps(data, sort_keys=True)})
+    return
+
+
+def recordCluster(parameters, boomerangFace, rounds, input, output, weight, diff_prob, depth):
+    """
+    Keeps a complete cluster with its histogram (weight, trails).
+    """
+    record(parameters, "clusters",
+           {"rounds": rounds, "face": boomerangFace, "weight": weight, "x0": input,
+            "xr": output, "probability": getLogProbability(diff_prob), "depth": depth,
+            "histogram": json.dumps(parameters["clusterWeights"])})
+    return
+
+
+def recordSwitch(parameters, beta, gamma, switchProb):
+    record(parameters, "switches",
+           {"beta": beta, "gamma": gamma, "probability": getLogProbability(switchProb)})
+    return
+
+
+def recordBoomerang(parameters, result):
+    """
+    Keeps the final result of a boomerang search (boomerangResult).
+    """
+    record(parameters, "boomerangs",
+           {"uppertrail": parameters["uppertrail"], "lowertrail": parameters["lowertrail"],
+            "x0": result["X0"], "xr": result["Xr"], "probability": result["probability"],
+            "trails": json.dumps(result["trails"])})
+    return
+
+
+def getLogProbability(probability):
+    if probability <= 0:
+        return None
+    return math.log(probability, 2)
+
+
+def flush(parameters):
+    """
+    Writes the buffered rows of this process.
+    """
+    writer = getWriter(parameters)
+    if writer is not None:
+        writer.flush()
+    return
+
+
+def query(store_file, table, filters, limit):
+    """
+    Returns the best rows of a table as dicts, filters maps columns to
+    values.
+    """
+    if table not in TABLE_ORDER:
+        raise ValueError("Unknown table {}".format(table))
+
+    statement = "SELECT * FROM {}".format(table)
+    if filters:
+        statement += " WHERE " + " AND ".join("{} = ?".format(column) for column in filters)
+    statement += " ORDER BY {} LIMIT ?".format(TABLE_ORDER[table])
+
+    connection = connect(store_file)
+    connection.row_factory = sqlite3.Row
+    try:
+        columns = [row["name"] for row in connection.execute("PRAGMA table_info({})".format(table))]
+        unknown = [column for column in filters if column not in columns]
+        if unknown:
+            raise ValueError("{} can not be filtered by {} (columns: {})".format(
+                table, ", ".join(unknown), ", ".join(columns)))
+        rows = connection.execute(statement, list(filters.values()) + [limit]).fetchall()
+    finally:
+        connection.close()
+    return [dict(row) for row in rows]
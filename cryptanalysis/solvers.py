@@ -0,0 +1,356 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Runs the solvers on STP models. Several solver configurations can be raced
+as a portfolio, where the first definitive answer is used. The STP command
+line has no seed option, the cms-r* configurations solve the CNF of the
+model with CryptoMiniSat and different random seeds instead.
+'''
+
+from cryptanalysis import search, resultcache, cubes, processes, cnfcache, workspace, \
+    modelstats, solverstats, trace, metrics
+from config import PATH_STP, PATH_CRYPTOMINISAT, MAX_CHARACTERISTICS
+
+import json
+import multiprocessing
+import os
+import queue
+import shutil
+import signal
+import subprocess
+import tempfile
+import time
+
+# Solver configurations for the portfolio: name -> (backend, options)
+SOLVER_CONFIGURATIONS = {"stp" : ("stp", []),
+                         "stp-minisat" : ("stp", ["--minisat"]),
+                         "stp-cms" : ("stp", ["--cryptominisat"]),
+                         "stp-cms-t2" : ("stp", ["--cryptominisat", "--threads", "2"]),
+                         "stp-cms-t4" : ("stp", ["--cryptominisat", "--threads", "4"]),
+                         "cms-r1" : ("cryptominisat", ["--random", "1"]),
+                         "cms-r2" : ("cryptominisat", ["--random", "2"]),
+                         "cms-r3" : ("cryptominisat", ["--random", "3"]),
+                         "cms-r4" : ("cryptominisat", ["--random", "4"]),
+                         "boolector" : ("boolector", [])}
+
+
+def solveModel(stp_file, parameters):
+    """
+    Solves the STP model and returns the solver output and the name of the
+    solver configuration which produced it. Results of identical models are
+    taken from the result cache.
+    """
+    def solve():
+        try:
+            solve_time = time.time()
+            with trace.span("solver", model=os.path.basename(stp_file)):
+                result, configuration = runSolver(stp_file, parameters)
+            metrics.recordSolverCall(parameters, solve_time)
+        except (subprocess.CalledProcessError, RuntimeError):
+            workspace.keepFailedModel(parameters, stp_file)
+            raise
+        return {"result": result, "configuration": configuration}
+
+    entry = resultcache.cached(parameters, stp_file, "solve", solve)
+    return entry["result"], entry["configuration"]
+
+
+def runSolver(stp_file, parameters):
+    if parameters["portfolio"]:
+        return solvePortfolio(stp_file, parameters)
+    if parameters["boolector"]:
+        return search.solveBoolector(stp_file), "boolector"
+    if parameters["solverstats"]:
+        start_time = time.time()
+        result, statistics = solverstats.solveSTP(stp_file)
+        solverstats.recordCall(parameters, "stp", time.time() - start_time, statistics)
+        return result, "stp"
+    return search.solveSTP(stp_file), "stp"
+
+
+def isBoolectorOutput(configuration):
+    """
+    Returns True if the output of this configuration has to be parsed as
+    boolector output.
+    """
+    return SOLVER_CONFIGURATIONS[configuration][0] == "boolector"
+
+
+def solveSTP(stp_file, options=None):
+    """
+    Returns the solution for the given SMT problem using STP with
+    additional options.
+    """
+    stp_parameters = [PATH_STP, stp_file, "--CVC"] + (options or [])
+    result = subprocess.check_output(stp_parameters)
+    return result.decode("utf-8")
+
+
+def solveCryptoMiniSat(stp_file, options):
+    """
+    Decides the model with CryptoMiniSat and additional options on the CNF
+    written by STP. The assignment of the CNF can not be mapped back to the
+    STP variables, hence a satisfiable model is solved again with STP for
+    the counterexample. In the search most models are unsatisfiable.
+    """
+    # The CNF is written next to the model, each configuration has its own copy
+    cnf_dir = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(stp_file)))
+    try:
+        model_file = os.path.join(cnf_dir, os.path.basename(stp_file))
+        shutil.copyfile(stp_file, model_file)
+        cnf_command, cnf_dir = getCNFCommand(model_file)
+        subprocess.check_output(cnf_command, cwd=cnf_dir)
+
+        sat_command = [PATH_CRYPTOMINISAT, "--verb", "0"] + options + \
+                      [os.path.join(cnf_dir, "output_0.cnf")]
+        output = subprocess.run(sat_command, stdout=subprocess.PIPE).stdout.decode("utf-8")
+    finally:
+        shutil.rmtree(cnf_dir, ignore_errors=True)
+
+    if "s UNSATISFIABLE" in output:
+        return "Valid.\n"
+    if "s SATISFIABLE" not in output:
+        raise subprocess.CalledProcessError(1, sat_command, output)
+    return solveSTP(stp_file, ["--cryptominisat"])
+
+
+def startSATsolver(stp_file):
+    """
+    Return CryptoMiniSat process started with the given stp_file. The CNF is
+    written next to the STP file, such that concurrent runs do not collide.
+    """
+    cnf_command, cnf_dir = getCNFCommand(stp_file)
+    subprocess.check_output(cnf_command, cwd=cnf_dir)
+
+    sat_process = subprocess.Popen(getSATCommand(cnf_dir), stderr=subprocess.PIPE,
+                                   stdout=subprocess.PIPE)
+    return sat_process
+
+
+def getCNFCommand(stp_file):
+    """
+    Returns the STP command which writes the CNF of stp_file and the
+    directory it has to run in.
+    """
+    stp_file = os.path.abspath(stp_file)
+    cnf_dir = os.path.dirname(stp_file)
+
+    # STP writes the CNF to the working directory
+    stp_path = PATH_STP
+    if os.path.exists(stp_path):
+        stp_path = os.path.abspath(stp_path)
+    return [stp_path, "--exit-after-CNF", "--output-CNF", stp_file, "--CVC",
+            "--disable-simplifications"], cnf_dir
+
+
+def getSATCommand(cnf_dir, parameters=None):
+    """
+    Returns the CryptoMiniSat command which enumerates the solutions of the
+    CNF written by getCNFCommand. The statistics are printed with
+    solverstats.
+    """
+    verbosity = "1" if parameters is not None and parameters["solverstats"] else "0"
+    return [PATH_CRYPTOMINISAT, "--maxsol", str(MAX_CHARACTERISTICS),
+            "--verb", verbosity, "-s", "0", os.path.join(cnf_dir, "output_0.cnf")]
+
+
+def countSolutions(stp_file, parameters, sat_logfile):
+    """
+    Returns the number of solutions of the STP model (up to
+    MAX_CHARACTERISTICS). With countworkers > 1 the model is counted in
+    parallel cubes. Counts of identical models are taken from the result
+    cache.
+    """
+    def count():
+        solutions = None
+        count_time = time.time()
+        with trace.span("count", model=os.path.basename(stp_file)):
+            if parameters["countworkers"] > 1:
+                solutions = cubes.countSolutionsCubes(stp_file, parameters)
+            try:
+                if solutions is None:
+                    solutions = runSATsolver(stp_file, parameters, sat_logfile)
+            except (subprocess.CalledProcessError, RuntimeError):
+                workspace.keepFailedModel(parameters, stp_file)
+                raise
+        metrics.recordSolverCall(parameters, count_time)
+        return {"solutions": solutions}
+
+    kind = "count-{}".format(MAX_CHARACTERISTICS)
+    return resultcache.cached(parameters, stp_file, kind, count)["solutions"]
+
+
+def runSATsolver(stp_file, parameters, sat_logfile):
+    """
+    Counts the solutions with CryptoMiniSat, the output is written to
+    sat_logfile. The CNF is composed from the CNF cache if possible.
+    """
+    translation = cnfcache.getTranslation(stp_file, parameters)
+
+    async def count(manager):
+        cnf_command, cnf_dir = getCNFCommand(stp_file)
+        if translation is not None:
+            cnfcache.writeCNF(parameters, translation, cnf_dir)
+        else:
+            result = await manager.check(cnf_command, cwd=cnf_dir)
+            cnfcache.recordTranslation(parameters, result["time"])
+        modelstats.recordCNF(parameters, os.path.join(cnf_dir, "output_0.cnf"))
+        with open(sat_logfile, "w") as log_file:
+            return await manager.run(getSATCommand(cnf_dir, parameters), log_file=log_file)
+
+    result = processes.runManaged(parameters, count)
+    solverstats.recordCall(parameters, "cryptominisat", result["time"], result["statistics"])
+    workspace.release(parameters, os.path.join(os.path.dirname(os.path.abspath(stp_file)),
+                                               "output_0.cnf"))
+    if result["status"] == "memory":
+        raise RuntimeError("CryptoMiniSat exceeded the memory limit for {}".format(stp_file))
+    solutions = result["solutions"]
+
+    assert solutions == search.countSolutionsLogfile(sat_logfile)
+
+    # The encoded CNF contains every solution twice
+    return solutions // 2
+
+
+def solvePortfolio(stp_file, parameters):
+    """
+    Runs all portfolio configurations on the same model at once. The first
+    definitive answer is returned and the remaining solvers are killed.
+    """
+    configurations = getPortfolioOrder(parameters)
+    start_time = time.time()
+
+    results = multiprocessing.Queue()
+    workers = []
+    for configuration in configurations:
+        worker = multiprocessing.Process(target=runConfiguration,
+                                         args=(configuration, stp_file, results))
+        worker.start()
+        workers.append(worker)
+
+    winner = None
+    result = None
+    failed = 0
+    while winner is None and failed < len(workers):
+        try:
+            configuration, output = results.get(timeout=1)
+        except queue.Empty:
+            # Worker died without reporting (e.g. out of memory)
+            if not any(worker.is_alive() for worker in workers) and results.empty():
+                break
+            continue
+        if output is None:
+            failed += 1
+        else:
+            winner = configuration
+            result = output
+
+    # Kill the remaining solvers including their subprocesses
+    for worker in workers:
+        if worker.is_alive():
+            try:
+                os.killpg(worker.pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        worker.join()
+
+    if winner is None:
+        raise RuntimeError("No solver configuration could solve {}".format(stp_file))
+
+    solve_time = time.time() - start_time
+    print("Solved by {} in {}s".format(winner, round(solve_time, 2)))
+    recordPortfolioResult(parameters, configurations, winner, solve_time)
+    return result, winner
+
+
+def runConfiguration(configuration, stp_file, results):
+    """
+    Worker for a single portfolio configuration.
+    """
+    # Own process group, such that the solver is killed with the worker
+    os.setsid()
+    backend, options = SOLVER_CONFIGURATIONS[configuration]
+    try:
+        if backend == "boolector":
+            output = search.solveBoolector(stp_file)
+        elif backend == "cryptominisat":
+            output = solveCryptoMiniSat(stp_file, options)
+        else:
+            output = solveSTP(stp_file, options)
+    except (subprocess.CalledProcessError, OSError):
+        output = None
+    results.put((configuration, output))
+    return
+
+
+def getPortfolioKey(parameters):
+    """
+    Win rates are recorded per cipher and number of rounds.
+    """
+    return "{}-{}".format(parameters["cipher"], parameters["rounds"])
+
+
+def getPortfolioFile(parameters):
+    return os.path.join(parameters["cachedir"], "portfolio.json")
+
+
+def loadPortfolioStatistics(parameters):
+    """
+    Returns the recorded statistics as {key: {configuration: {"runs",
+    "wins", "time"}}}.
+    """
+    portfolio_file = getPortfolioFile(parameters)
+    if not os.path.isfile(portfolio_file):
+        return {}
+
+    with open(portfolio_file, "r") as input_file:
+        try:
+            return json.load(input_file)
+        except ValueError:
+            return {}
+
+
+def getPortfolioOrder(parameters):
+    """
+    Orders the portfolio by the recorded win rates. If portfoliosize is set
+    only the best configurations are used.
+    """
+    for configuration in parameters["portfolio"]:
+        if configuration not in SOLVER_CONFIGURATIONS:
+            raise ValueError("Unknown solver configuration {}".format(configuration))
+
+    statistics = loadPortfolioStatistics(parameters).get(getPortfolioKey(parameters), {})
+
+    def winRate(configuration):
+        entry = statistics.get(configuration, {"runs": 0, "wins": 0})
+        return (entry["wins"] + 1) / (entry["runs"] + 2)
+
+    configurations = sorted(parameters["portfolio"], key=winRate, reverse=True)
+    if parameters["portfoliosize"] > 0:
+        configurations = configurations[:parameters["portfoliosize"]]
+    return configurations
+
+
+def recordPortfolioResult(parameters, configurations, winner, solve_time):
+    """
+    Updates the win rates of the configurations which took part in a race.
+    """
+    os.makedirs(parameters["cachedir"], exist_ok=True)
+    statistics = loadPortfolioStatistics(parameters)
+    entries = statistics.setdefault(getPortfolioKey(parameters), {})
+
+    for configuration in configurations:
+        entry = entries.setdefault(configuration, {"runs": 0, "wins": 0, "time": 0})
+        entry["runs"] += 1
+        if configuration == winner:
+            entry["wins"] += 1
+            entry["time"] += solve_time
+
+    portfolio_file = getPortfolioFile(parameters)
+    tmp_file = "{}.{}".format(portfolio_file, os.getpid())
+    with open(tmp_file, "w") as output_file:
+        json.dump(statistics, output_file, indent=1, sort_keys=True)
+    os.replace(tmp_file, portfolio_file)
+    return
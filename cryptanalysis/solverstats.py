@@ -0,0 +1,100 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Internal statistics of the solver calls (solverstats). STP is run with
+--print-stats and CryptoMiniSat with --verb 1, the conflicts, decisions,
+propagations, restarts, preprocessing time and peak memory are parsed from
+their output and kept as one record per call in
+parameters["solverCalls"], together with the phase and weight of the
+caller.
+'''
+
+from config import PATH_STP
+
+import re
+import resource
+import subprocess
+import time
+
+# Last value of each statistic in the solver output
+PATTERNS = {"conflicts": r"conflicts\s*:\s*(\d+)",
+            "decisions": r"decisions\s*:\s*(\d+)",
+            "propagations": r"propagations\s*:\s*(\d+)",
+            "restarts": r"restarts\s*:\s*(\d+)",
+            "preprocessing": r"(?:simplification|preprocessing) time\s*:\s*([\d.]+)",
+            "memory": r"(?:Mem used|Max Memory \(rss\) used|Peak memory)\s*:\s*([\d.]+)\s*MB"}
+
+COUNTERS = ["conflicts", "decisions", "propagations", "restarts"]
+
+
+def parseStatistics(output):
+    """
+    Returns the statistics found in the solver output.
+    """
+    statistics = {}
+    for name, pattern in PATTERNS.items():
+        matches = re.findall(pattern, output, re.IGNORECASE)
+        if matches:
+            value = float(matches[-1])
+            statistics[name] = int(value) if name in COUNTERS else value
+    return statistics
+
+
+def solveSTP(stp_file, options=None):
+    """
+    Runs STP with statistics and returns the output and the statistics
+    including the CPU time and peak memory of the process. Only stdout is
+    returned (and cached), the statistics are parsed from both streams.
+    """
+    before = resource.getrusage(resource.RUSAGE_CHILDREN)
+    process = subprocess.run([PATH_STP, stp_file, "--CVC", "--print-stats"] + (options or []),
+                             stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    after = resource.getrusage(resource.RUSAGE_CHILDREN)
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, stp_file)
+    output = process.stdout.decode("utf-8")
+
+    statistics = parseStatistics(output + process.stderr.decode("utf-8", "replace"))
+    statistics["cpu"] = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+    # The peak memory of the children is a maximum over all of them, it is
+    # only known to be this process if it grew
+    if after.ru_maxrss > before.ru_maxrss:
+        statistics.setdefault("memory", after.ru_maxrss / 1024)
+    return output, statistics
+
+
+def recordCall(parameters, solver, call_time, statistics):
+    """
+    Keeps the statistics of a solver call for the current phase and weight.
+    """
+    if not parameters["solverstats"]:
+        return
+    record = {"phase": parameters["phase"], "weight": parameters["sweight"], "solver": solver,
+              "time": round(call_time, 3), "end": round(time.time(), 3)}
+    record.update(statistics)
+    parameters["solverCalls"].append(record)
+    return
+
+
+def printStatistics(parameters):
+    """
+    Prints the solver statistics per phase and weight.
+    """
+    groups = {}
+    for record in parameters["solverCalls"]:
+        groups.setdefault((record["phase"], record["weight"]), []).append(record)
+    if not groups:
+        return
+
+    print("Solver statistics (phase, weight: calls, time, conflicts, propagations, peak memory):")
+    for (phase, weight), records in sorted(groups.items()):
+        conflicts = [record["conflicts"] for record in records if "conflicts" in record]
+        propagations = [record["propagations"] for record in records if "propagations" in record]
+        memory = [record["memory"] for record in records if "memory" in record]
+        print("\t{}, {}: {} calls, {}s, {} conflicts, {} propagations, {} MB".format(
+            phase, weight, len(records), round(sum(record["time"] for record in records), 2),
+            sum(conflicts) if conflicts else "-", sum(propagations) if propagations else "-",
+            round(max(memory), 1) if memory else "-"))
+    return
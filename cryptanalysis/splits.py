@@ -0,0 +1,204 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Finds the best split of a total number of rounds into the upper and lower
+trail of a boomerang.
+'''
+
+from cryptanalysis import boomerang, bounds, processes
+
+import multiprocessing
+import queue
+import time
+
+
+def findBestRoundSplit(cipher, parameters):
+    """
+    Runs the boomerang search for every split of parameters["rounds"] in
+    parallel under a shared time budget, the splits with the lightest
+    trails first. With splitslack, splits whose estimate can no longer beat
+    the current leader are abandoned.
+    """
+    start_time = time.time()
+    total_rounds = parameters["rounds"]
+
+    print("----")
+    print("Searching best round split for {} - Rounds: {}".format(cipher.name, total_rounds))
+    print("----")
+
+    # The splits are ordered by the cached bounds, the workers compute the
+    # exact bounds of their splits and share them via the bounds cache
+    splits = [{"uppertrail": upper, "lowertrail": total_rounds - upper, "bound": 0,
+               "status": "pending", "probability": None}
+              for upper in range(1, total_rounds)]
+    updateEstimates(cipher, parameters, splits)
+
+    for split in splits:
+        print("Split {}-{}: cached bound {}".format(split["uppertrail"], split["lowertrail"],
+                                                    split["bound"]))
+    print("----")
+
+    # Clustering results and progress are shared between the workers
+    manager = multiprocessing.Manager()
+    differentialCache = manager.dict()
+    progressQueue = manager.Queue()
+
+    pending = list(splits)
+    running = {}
+    leader = None
+
+    while pending or running:
+        remaining = -1
+        if parameters["timelimit"] != -1:
+            remaining = parameters["timelimit"] - (time.time() - start_time)
+            if remaining <= 0:
+                break
+
+        # Start the most promising splits first, with the bounds found so far
+        if pending and len(running) < parameters["workers"]:
+            updateEstimates(cipher, parameters, pending)
+        while pending and len(running) < parameters["workers"]:
+            split = pending.pop(0)
+            if isBeaten(parameters, split, leader):
+                split["status"] = "abandoned"
+                print("Abandoning split {}-{}".format(split["uppertrail"], split["lowertrail"]))
+                continue
+            split_parameters = getSplitParameters(parameters, split, remaining,
+                                                  differentialCache, progressQueue)
+            worker = multiprocessing.Process(target=runSplit,
+                                             args=(cipher, split_parameters))
+            worker.start()
+            split["status"] = "running"
+            running[split["uppertrail"]] = (split, worker)
+
+        # Messages of exited workers are in the queue, hence the workers are
+        # checked before the queue is drained
+        exited = [upper for upper, (split, worker) in running.items()
+                  if not worker.is_alive()]
+        messages = []
+        try:
+            messages.append(progressQueue.get(timeout=1))
+            while True:
+                messages.append(progressQueue.get_nowait())
+        except queue.Empty:
+            pass
+
+        for message, upper, value in messages:
+            if upper not in running:
+                continue
+            split = running[upper][0]
+            if message == "bound":
+                split["bound"] = value + (parameters["splitslack"] or 0)
+                print("Split {}-{}: bound {}".format(split["uppertrail"], split["lowertrail"],
+                                                     split["bound"]))
+                continue
+            if value is not None and (split["probability"] is None or
+                                      value > split["probability"]):
+                split["probability"] = value
+            if split["probability"] is not None and \
+               (leader is None or split["probability"] > leader["probability"]):
+                leader = split
+                parameters["bestProbability"] = split["probability"]
+                print("Leading split {}-{}: {}".format(split["uppertrail"],
+                                                       split["lowertrail"],
+                                                       split["probability"]))
+            if message == "done":
+                split["status"] = "done"
+
+        # Abandon splits which can not reach the leader anymore
+        for upper, (split, worker) in list(running.items()):
+            if split["status"] == "running" and split is not leader and \
+               isBeaten(parameters, split, leader):
+                split["status"] = "abandoned"
+                print("Abandoning split {}-{}".format(split["uppertrail"], split["lowertrail"]))
+            if split["status"] != "running" or upper in exited:
+                processes.stopWorker(worker)
+                if split["status"] == "running":
+                    split["status"] = "failed"
+                del running[upper]
+
+    for split, worker in running.values():
+        processes.stopWorker(worker)
+        split["status"] = "timeout"
+    manager.shutdown()
+
+    print("\n----")
+    print("Round split search completed for {} rounds".format(total_rounds))
+    for split in splits:
+        print("Split {}-{}: {} (bound {}, probability {})".format(split["uppertrail"],
+                                                                 split["lowertrail"],
+                                                                 split["status"],
+                                                                 split["bound"],
+                                                                 split["probability"]))
+    if leader is not None:
+        print("Best split: uppertrail = {}, lowertrail = {}".format(leader["uppertrail"],
+                                                                   leader["lowertrail"]))
+        print("Best boomerang probability = {}".format(leader["probability"]))
+    print("----\n")
+    return leader
+
+
+def updateEstimates(cipher, parameters, splits):
+    """
+    Sets the estimate of each split from the cached bounds on the trail
+    weights and sorts the splits by their estimates. The clustering gain
+    is not bounded, hence the slack is only a heuristic.
+    """
+    for split in splits:
+        bound = -2 * (bounds.getCachedBound(cipher, parameters, split["uppertrail"]) +
+                      bounds.getCachedBound(cipher, parameters, split["lowertrail"]))
+        split["bound"] = bound + (parameters["splitslack"] or 0)
+    splits.sort(key=lambda split: split["bound"], reverse=True)
+    return
+
+
+def isBeaten(parameters, split, leader):
+    """
+    Returns if a split can be abandoned for the leader. Only with
+    splitslack, as the estimate does not bound the clustering gain.
+    """
+    if parameters["splitslack"] is None or leader is None:
+        return False
+    return split["bound"] < leader["probability"]
+
+
+def getSplitParameters(parameters, split, remaining, differentialCache, progressQueue):
+    """
+    Parameters for a single split. Each split starts its trail searches at
+    the lower bounds.
+    """
+    split_parameters = processes.getWorkerParameters(
+        parameters, "split-{}-{}".format(split["uppertrail"], split["lowertrail"]), statistics=True)
+    split_parameters["uppertrail"] = split["uppertrail"]
+    split_parameters["lowertrail"] = split["lowertrail"]
+    split_parameters["uweight"] = 0
+    split_parameters["lweight"] = 0
+    split_parameters["autobounds"] = True
+    split_parameters["timelimit"] = remaining
+    split_parameters["bct"] = [[0] * 16 for _ in range(16)]
+    split_parameters["differentialCache"] = differentialCache
+    split_parameters["progressQueue"] = progressQueue
+    return split_parameters
+
+
+def runSplit(cipher, parameters):
+    """
+    Worker for a single split. The bounds of the split are computed first
+    and reported, such that the split can be abandoned early.
+    """
+    probability = None
+    upper = parameters["uppertrail"]
+    with processes.workerOutput(parameters, "split {}".format(upper)):
+        try:
+            start_time = time.time()
+            bound = -2 * (bounds.getLowerBound(cipher, parameters, upper, start_time) +
+                          bounds.getLowerBound(cipher, parameters, parameters["lowertrail"], start_time))
+            parameters["progressQueue"].put(("bound", upper, bound))
+            boomerang.computeFeistelBoomerangDifferential(cipher, parameters)
+            probability = parameters["boomerangResult"]["probability"]
+        except (SystemExit, Exception) as error:
+            print("Split stopped: {}".format(repr(error)))
+    parameters["progressQueue"].put(("done", upper, probability))
+    return
@@ -0,0 +1,137 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Timeline of the search as Chrome Trace Event JSON (trace), which can be
+opened in chrome://tracing or Perfetto. Spans are recorded per process and
+written to trace.parts/<pid>.jsonl, the process which started the trace
+merges them into the trace file at the end of the run. Without trace,
+span() returns a shared no-op context and traced functions are called
+directly.
+'''
+
+import atexit
+import contextlib
+import functools
+import glob
+import json
+import os
+import shutil
+import time
+
+# Trace file of this run, None if tracing is disabled
+tracefile = None
+# Process which merges the trace
+owner = None
+# Recorded events by process, forked processes start empty
+events = {}
+
+NULL_SPAN = contextlib.nullcontext()
+
+
+def start(parameters):
+    """
+    Starts tracing if parameters["trace"] is set.
+    """
+    global tracefile, owner
+    if not parameters["trace"]:
+        return
+    tracefile = parameters["trace"]
+    owner = os.getpid()
+    shutil.rmtree(getPartsDir(), ignore_errors=True)
+    nameProcess("search")
+    # The search ends with quit() once the weight limit is reached
+    atexit.register(finish)
+    return
+
+
+def getPartsDir():
+    return "{}.parts".format(tracefile)
+
+
+def span(name, **args):
+    """
+    Returns a context which records the enclosed code as a span.
+    """
+    if tracefile is None:
+        return NULL_SPAN
+    return recordSpan(name, args)
+
+
+@contextlib.contextmanager
+def recordSpan(name, args):
+    start_time = time.time()
+    try:
+        yield
+    finally:
+        getEvents().append({"name": name, "ph": "X", "pid": os.getpid(), "tid": 0,
+                            "ts": int(start_time * 1e6),
+                            "dur": int((time.time() - start_time) * 1e6), "args": args})
+
+
+def traced(function):
+    """
+    Records each call of the decorated function as a span.
+    """
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if tracefile is None:
+            return function(*args, **kwargs)
+        with recordSpan(function.__name__, {}):
+            return function(*args, **kwargs)
+    return wrapper
+
+
+def nameProcess(name):
+    """
+    Names the current process (e.g. a worker) in the trace viewer.
+    """
+    if tracefile is None:
+        return
+    getEvents().append({"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0,
+                        "args": {"name": "{} ({})".format(name, os.getpid())}})
+    return
+
+
+def getEvents():
+    return events.setdefault(os.getpid(), [])
+
+
+def flush():
+    """
+    Appends the events of this process to its part of the trace.
+    """
+    if tracefile is None or not getEvents():
+        return
+    os.makedirs(getPartsDir(), exist_ok=True)
+    with open(os.path.join(getPartsDir(), "{}.jsonl".format(os.getpid())), "a") as part_file:
+        for event in getEvents():
+            part_file.write(json.dumps(event) + "\n")
+    events[os.getpid()] = []
+    return
+
+
+def finish():
+    """
+    Merges the parts of all processes into the trace file.
+    """
+    global tracefile
+    if tracefile is None or os.getpid() != owner:
+        return
+    flush()
+    trace_events = []
+    for part in sorted(glob.glob(os.path.join(getPartsDir(), "*.jsonl"))):
+        with open(part, "r") as part_file:
+            for line in part_file:
+                # The last line is incomplete if a worker was killed
+                try:
+                    trace_events.append(json.loads(line))
+                except ValueError:
+                    pass
+    with open(tracefile, "w") as output_file:
+        json.dump({"traceEvents": trace_events, "displayTimeUnit": "ms"}, output_file)
+    shutil.rmtree(getPartsDir(), ignore_errors=True)
+    print("Trace with {} events written to {}".format(len(trace_events), tracefile))
+    tracefile = None
+    return
@@ -0,0 +1,153 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Concurrent exploration of upper trails. Once X0 and the end point of the
+boomerang are fixed, the upper trails are independent: the next
+trailworkers upper trails are searched, and their lower trails are searched
+and clustered in parallel workers.
+'''
+
+from cryptanalysis import boomerang, search, processes
+
+import copy
+import math
+import multiprocessing
+import queue
+
+
+def exploreUpperTrails(cipher, parameters, start_time, boomerangProb):
+    """
+    Explores the remaining upper trails in rounds of trailworkers trails
+    and returns the merged boomerang probability. Boomerang trails with the
+    same switch (beta, gamma) are only counted once.
+    """
+    # Switches which are already part of boomerangProb
+    switches = set((trail["beta"], trail["gamma"]) for trail in parameters["boomerangTrails"])
+    finished = False
+
+    while not finished and not search.reachedTimelimit(start_time, parameters["timelimit"]):
+        upperTrails, finished = findUpperTrails(cipher, parameters, start_time)
+        if not upperTrails:
+            break
+
+        print("----")
+        print("Exploring {} upper trails concurrently".format(len(upperTrails)))
+        print("----")
+
+        initial = copy.deepcopy(processes.getStatistics(parameters))
+        results = runWorkers(cipher, parameters, start_time, upperTrails, boomerangProb)
+
+        for index, (upperCharacteristic, upperWeight) in enumerate(upperTrails):
+            if index not in results:
+                print("Upper trail {} (weight {}) failed".format(index, upperWeight))
+                continue
+            status, trails, statistics = results[index]
+            processes.mergeStatistics(parameters, statistics, initial)
+            added = 0
+            for trail in trails:
+                switch = (trail["beta"], trail["gamma"])
+                if switch in switches:
+                    print("Skipping duplicate boomerang trail {}, {}".format(*switch))
+                    continue
+                switches.add(switch)
+                boomerangProb += math.pow(2, 2*trail["upperProb"] + 2*trail["lowerProb"] +
+                                          trail["switchProb"])
+                parameters["boomerangTrails"].append(trail)
+                added += 1
+            print("Upper trail {} (weight {}): {} new boomerang trails".format(index, upperWeight,
+                                                                             added))
+            if status == 99:
+                # Time limit reached in the worker
+                finished = True
+
+        if boomerangProb > 0:
+            print("---")
+            print("Merged boomerang probability = " + str(math.log(boomerangProb, 2)))
+            boomerang.reportProgress(parameters, boomerangProb)
+
+    return boomerangProb
+
+
+def findUpperTrails(cipher, parameters, start_time):
+    """
+    Returns the next trailworkers upper trails as list of (characteristic,
+    weight), and True if there are no more upper trails.
+    """
+    upperTrails = []
+    while len(upperTrails) < parameters["trailworkers"] and \
+          not search.reachedTimelimit(start_time, parameters["timelimit"]):
+        try:
+            upperCharacteristic = boomerang.boomerangTrail(cipher, parameters, start_time, "upper")
+        except SystemExit:
+            # Weight limit reached
+            return upperTrails, True
+        try:
+            upperCharacteristic.getOutputDiff()
+        except:
+            print("No characteristic found for the given limits")
+            return upperTrails, True
+        upperTrails.append((upperCharacteristic, parameters["sweight"]))
+        parameters["uweight"] = parameters["sweight"]
+        parameters["blockedUpperCharacteristics"].append(upperCharacteristic)
+    return upperTrails, False
+
+
+def runWorkers(cipher, parameters, start_time, upperTrails, boomerangProb):
+    """
+    Runs the lower trail search for each upper trail in its own worker and
+    returns the results by index.
+    """
+    results = multiprocessing.Queue()
+    workers = {}
+    for index, (upperCharacteristic, upperWeight) in enumerate(upperTrails):
+        worker_parameters = getWorkerParameters(parameters, index)
+        worker = multiprocessing.Process(target=runUpperTrail,
+                                         args=(cipher, worker_parameters, start_time,
+                                               upperCharacteristic, upperWeight,
+                                               boomerangProb, index, results))
+        worker.start()
+        workers[index] = worker
+
+    collected = {}
+    while len(collected) < len(workers):
+        # Results of exited workers are in the queue, hence the workers are
+        # checked before the queue is read
+        alive = any(worker.is_alive() for index, worker in workers.items()
+                    if index not in collected)
+        try:
+            index, status, trails, statistics = results.get(timeout=1)
+            collected[index] = (status, trails, statistics)
+        except queue.Empty:
+            if not alive:
+                break
+
+    for worker in workers.values():
+        processes.stopWorker(worker)
+    return collected
+
+
+def getWorkerParameters(parameters, index):
+    """
+    Each worker keeps the blocked upper trails.
+    """
+    worker_parameters = processes.getWorkerParameters(parameters, "upper-{}".format(index))
+    worker_parameters["blockedUpperCharacteristics"] = list(parameters["blockedUpperCharacteristics"])
+    return worker_parameters
+
+
+def runUpperTrail(cipher, parameters, start_time, upperCharacteristic, upperWeight,
+                  boomerangProb, index, results):
+    """
+    Worker for a single upper trail.
+    """
+    status = None
+    with processes.workerOutput(parameters, "upper trail {}".format(index)):
+        try:
+            status = boomerang.lowerTrailSearch(cipher, parameters, start_time,
+                                                upperCharacteristic, upperWeight, boomerangProb)
+        except (SystemExit, Exception) as error:
+            print("Upper trail stopped: {}".format(repr(error)))
+    results.put((index, status, parameters["boomerangTrails"], processes.getStatistics(parameters)))
+    return
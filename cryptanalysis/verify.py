@@ -0,0 +1,266 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Empirical verification of boomerangs and clustered differentials with the
+vectorized reference implementations in ciphers/reference.py.
+'''
+
+from cryptanalysis import boomerang, search, solvers, workspace
+from ciphers import reference
+
+import functools
+import math
+import multiprocessing
+import time
+
+# 95% confidence
+CONFIDENCE_Z = 1.96
+
+
+def verifyBoomerang(cipher, parameters):
+    """
+    Estimates the probability of the boomerang X0 -> X_lowertrail by
+    encrypting and decrypting random quartets. The boomerang covers
+    uppertrail + 1 + lowertrail rounds, where the middle round is the
+    switch given by the FBCT. If the boomerang is not fixed in
+    boomerangVariables it is searched first.
+    """
+    if reference.np is None:
+        print("NumPy is required for the empirical verification")
+        return None
+    if cipher.getReference() is None:
+        print("No reference implementation for {}".format(cipher.name))
+        return None
+
+    endPoint = "X{}".format(parameters["lowertrail"])
+    if "X0" not in parameters["boomerangVariables"] or \
+       endPoint not in parameters["boomerangVariables"]:
+        boomerang.computeFeistelBoomerangDifferential(cipher, parameters)
+
+    ref = reference.BitslicedReference(cipher.getReference())
+    rounds = parameters["uppertrail"] + 1 + parameters["lowertrail"]
+    alpha = parameters["boomerangVariables"]["X0"]
+    delta = parameters["boomerangVariables"][endPoint]
+
+    print("----")
+    print("Verifying boomerang for {} - Rounds: {}".format(cipher.name, rounds))
+    print("X0 = {}".format(parameters["boomerangVariables"]["X0"]))
+    print("{} = {}".format(endPoint, parameters["boomerangVariables"][endPoint]))
+    print("----")
+
+    task = functools.partial(boomerangTask, ref, alpha, delta, rounds,
+                             parameters["verifybatch"], parameters["seed"])
+    result = estimateProbability(task, parameters)
+
+    if "boomerangResult" in parameters:
+        print("Theoretical boomerang probability = {}".format(
+            parameters["boomerangResult"]["probability"]))
+    printEstimate("Empirical boomerang probability", result)
+    parameters["verification"] = result
+    return result
+
+
+def boomerangTask(ref, alpha, delta, rounds, samples, seed, index):
+    """
+    Counts the returning quartets for one batch under a random key.
+    """
+    rng = reference.np.random.default_rng([seed, index])
+    encryption, decryption = ref.compile(reference.randomKeys(rng, ref.ref, rounds))
+
+    p1 = ref.random(rng, samples)
+    c1 = ref.apply(p1, encryption)
+    c2 = ref.apply(ref.addDifference(p1, alpha), encryption)
+    p3 = ref.apply(ref.addDifference(c1, delta), decryption)
+    p4 = ref.apply(ref.addDifference(c2, delta), decryption)
+
+    return samples, ref.countDifference(p3, p4, alpha)
+
+
+def verifyDifferential(cipher, parameters):
+    """
+    Compares the clustered probability of the differential X0 -> X_rounds
+    (given in fixedVariables) with an empirical estimate on random pairs.
+    The cluster starts at the minimal weight and covers wordsize/upperlimit
+    weights as for the upper trail of a boomerang (fewer with the adaptive
+    cluster depth).
+    """
+    if reference.np is None:
+        print("NumPy is required for the empirical verification")
+        return None
+    if cipher.getReference() is None:
+        print("No reference implementation for {}".format(cipher.name))
+        return None
+
+    start_time = time.time()
+    rounds = parameters["rounds"]
+    endPoint = "X{}".format(rounds)
+    alpha = parameters["fixedVariables"]["X0"]
+    beta = parameters["fixedVariables"][endPoint]
+
+    print("----")
+    print("Verifying differential for {} - Rounds: {}".format(cipher.name, rounds))
+    print("X0 = {}".format(alpha))
+    print("{} = {}".format(endPoint, beta))
+    print("----")
+
+    # Cluster the differential as in the boomerang search
+    cluster_parameters = dict(parameters)
+    cluster_parameters["uppertrail"] = rounds
+    cluster_parameters["fixedVariables"] = dict(parameters["fixedVariables"])
+    cluster_parameters["blockedCharacteristics"] = []
+    cluster_parameters["differentialCache"] = None
+    weight = findDifferentialWeight(cipher, cluster_parameters, start_time)
+    if weight is None:
+        print("No characteristic found for the given limits")
+        return None
+    clustered = boomerang.boomerangDifferential(cipher, cluster_parameters, alpha, beta,
+                                                weight, start_time, "upper")
+
+    ref = reference.BitslicedReference(cipher.getReference())
+    task = functools.partial(differentialTask, ref, alpha, beta, rounds,
+                             parameters["verifybatch"], parameters["seed"])
+    result = estimateProbability(task, parameters)
+
+    printClusterTable(cluster_parameters["clusterWeights"], result)
+    if clustered > 0:
+        print("Clustered differential probability = {}".format(math.log(clustered, 2)))
+    printEstimate("Empirical differential probability", result)
+    result["clustered"] = clustered
+    result["clusterWeights"] = cluster_parameters["clusterWeights"]
+    parameters["verification"] = result
+    return result
+
+
+def findDifferentialWeight(cipher, parameters, timestamp):
+    """
+    Returns the minimal weight of a characteristic for the fixed
+    differential, starting at sweight.
+    """
+    stp_file = "{}/verify-{}{}-{}-{}.stp".format(parameters["tmpdir"], cipher.name,
+                                                parameters["wordsize"],
+                                                parameters["rounds"], timestamp)
+    while not search.reachedTimelimit(timestamp, parameters["timelimit"]) and \
+        parameters["sweight"] < parameters["endweight"]:
+        cipher.createSTP(stp_file, parameters)
+        result, configuration = solvers.solveModel(stp_file, parameters)
+        workspace.release(parameters, stp_file)
+        if search.foundSolution(result):
+            print("Minimal weight of the differential: {}".format(parameters["sweight"]))
+            return parameters["sweight"]
+        parameters["sweight"] += 1
+    return None
+
+
+def differentialTask(ref, alpha, beta, rounds, samples, seed, index):
+    """
+    Counts the right pairs for one batch under a random key.
+    """
+    rng = reference.np.random.default_rng([seed, index])
+    encryption = ref.compileEncryption(reference.randomKeys(rng, ref.ref, rounds))
+
+    p1 = ref.random(rng, samples)
+    c1 = ref.apply(p1, encryption)
+    c2 = ref.apply(ref.addDifference(p1, alpha), encryption)
+
+    return samples, ref.countDifference(c1, c2, beta)
+
+
+def printClusterTable(clusterWeights, result):
+    """
+    Prints the contribution of the trails of each weight to the clustered
+    probability, and the share of the empirical probability covered so far.
+    """
+    print("----")
+    print("{:>8} {:>12} {:>14} {:>14} {:>10}".format("Weight", "Trails", "Contribution",
+                                                      "Cumulative", "Covered"))
+    cumulative = 0
+    for weight, solutions in clusterWeights:
+        contribution = math.pow(2, -weight) * solutions
+        cumulative += contribution
+        covered = "-"
+        if result["hits"] > 0:
+            covered = "{}%".format(round(100 * cumulative / result["probability"], 1))
+        print("{:>8} {:>12} {:>14} {:>14} {:>10}".format(
+            weight, solutions,
+            round(math.log(contribution, 2), 2) if contribution > 0 else "-",
+            round(math.log(cumulative, 2), 2) if cumulative > 0 else "-",
+            covered))
+    return
+
+
+def estimateProbability(task, parameters):
+    """
+    Runs task(index) for index = 0, 1, ... on a process pool until the
+    confidence interval is within verifyprecision of the estimate, or the
+    sample or time limit is reached. Results are counted in task order, so
+    the estimate only depends on the seed.
+    """
+    start_time = time.time()
+    workers = parameters["workers"]
+    samples = 0
+    hits = 0
+    interval = (0.0, 1.0)
+    report = parameters["verifybatch"]
+
+    context = multiprocessing.get_context("fork")
+    with context.Pool(workers) as pool:
+        running = []
+        index = 0
+        while True:
+            while len(running) < 2 * workers:
+                running.append(pool.apply_async(task, (index,)))
+                index += 1
+
+            batch_samples, batch_hits = running.pop(0).get()
+            samples += batch_samples
+            hits += batch_hits
+            interval = getConfidenceInterval(hits, samples)
+
+            if samples >= report:
+                report *= 2
+                print("Samples: 2^{} Hits: {} Time: {}s".format(
+                    round(math.log(samples, 2), 2), hits, round(time.time() - start_time, 2)))
+
+            if hits > 0 and (interval[1] - interval[0]) / 2 <= \
+               parameters["verifyprecision"] * hits / samples:
+                break
+            if samples >= parameters["verifysamples"]:
+                break
+            if parameters["timelimit"] != -1 and \
+               time.time() - start_time > parameters["timelimit"]:
+                break
+        pool.terminate()
+
+    return {"samples": samples,
+            "hits": hits,
+            "probability": hits / samples,
+            "interval": interval,
+            "time": round(time.time() - start_time, 2)}
+
+
+def getConfidenceInterval(hits, samples):
+    """
+    Wilson score interval for hits out of samples.
+    """
+    z2 = CONFIDENCE_Z * CONFIDENCE_Z
+    p = hits / samples
+    center = (p + z2 / (2 * samples)) / (1 + z2 / samples)
+    width = CONFIDENCE_Z * math.sqrt(p * (1 - p) / samples + z2 / (4 * samples * samples))
+    width /= 1 + z2 / samples
+    return (max(0.0, center - width), min(1.0, center + width))
+
+
+def printEstimate(label, result):
+    print("----")
+    print("Samples: 2^{} Hits: {} Time: {}s".format(round(math.log(result["samples"], 2), 2),
+                                                   result["hits"], result["time"]))
+    if result["hits"] > 0:
+        print("{} = {}".format(label, math.log(result["probability"], 2)))
+        print("95% confidence interval = [{}, {}]".format(
+            math.log(result["interval"][0], 2), math.log(result["interval"][1], 2)))
+    else:
+        print("{} < {} (no hits)".format(label, math.log(result["interval"][1], 2)))
+    print("----")
+    return
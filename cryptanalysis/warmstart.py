@@ -0,0 +1,128 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Warm start of the trail search from the last characteristic found. STP
+does not take phase hints and CryptoMiniSat only takes a global polarity,
+hence the hint is given as a restricted model: half of the state words are
+fixed to the previous characteristic. A solution of the restricted model is
+a solution of the full model, otherwise the full model is solved as before.
+
+A restricted call which fails costs an extra call. The restricted model is
+only tried from the weight of the hint on, below it the full model has no
+solution for at least as many rounds. Once the restricted model of a hint
+has no solution, the hint is not tried again. With solverstats the
+conflicts of the restricted and full calls are reported.
+'''
+
+from cryptanalysis import search, solvers, workspace
+
+import time
+
+
+def solveWarm(stp_file, parameters, hint):
+    """
+    Solves the STP model, first restricted to the hint given as
+    recordHint(...). Returns the solver output and configuration.
+    """
+    statistics = parameters["warmStart"]
+    entry = parameters["warmHints"].get(hint)
+    if parameters["warmstart"] and entry is not None and not entry["failed"]:
+        constraints = getHintConstraints(parameters, entry)
+        if constraints and parameters["sweight"] < entry["weight"]:
+            statistics["skipped"] += 1
+        elif constraints:
+            warm_file = "{}-warm.stp".format(stp_file[:-4])
+            with open(stp_file, "r") as model_file:
+                model = model_file.read()
+            with open(warm_file, "w") as model_file:
+                model_file.write(model.replace("QUERY(FALSE);", constraints + "QUERY(FALSE);"))
+
+            start_time = time.time()
+            calls = len(parameters["solverCalls"])
+            result, configuration = solvers.solveModel(warm_file, parameters)
+            workspace.release(parameters, warm_file)
+            statistics["warm"] += 1
+            statistics["warmTime"] += time.time() - start_time
+            statistics["warmConflicts"] += getConflicts(parameters, calls)
+            if search.foundSolution(result):
+                statistics["hits"] += 1
+                print("Solved from warm start")
+                return result, configuration
+            entry["failed"] = True
+
+    start_time = time.time()
+    calls = len(parameters["solverCalls"])
+    result, configuration = solvers.solveModel(stp_file, parameters)
+    statistics["cold"] += 1
+    statistics["coldTime"] += time.time() - start_time
+    statistics["coldConflicts"] += getConflicts(parameters, calls)
+    return result, configuration
+
+
+def getConflicts(parameters, calls):
+    """
+    Returns the conflicts of the solver calls since the first calls, which
+    are only recorded with solverstats.
+    """
+    return sum(record.get("conflicts", 0) for record in parameters["solverCalls"][calls:])
+
+
+def recordHint(parameters, hint, characteristic, rounds, weight):
+    """
+    Keeps the state words of a characteristic with the given number of
+    rounds and weight as hint for the next search.
+    """
+    try:
+        data = characteristic.characteristic_data
+    except AttributeError:
+        return
+    words = {int(name[1:]): value for name, value in data.items()
+             if name.startswith("X") and name[1:].isdigit()}
+    parameters["warmHints"][hint] = {"rounds": rounds, "weight": weight, "words": words,
+                                     "failed": False}
+    return
+
+
+def getHintConstraints(parameters, hint):
+    """
+    Fixes the half of the state words next to the fixed end of the trail.
+    A hint for r rounds seeds the search for more rounds from X0.
+    """
+    rounds = min(parameters["rounds"], hint["rounds"])
+    half = list(range(rounds // 2 + 1))
+    if "X0" not in parameters["fixedVariables"] and \
+       "X{}".format(parameters["rounds"]) in parameters["fixedVariables"] and \
+       hint["rounds"] == parameters["rounds"]:
+        half = list(range(rounds - rounds // 2, rounds + 1))
+
+    constraints = ""
+    for index in half:
+        name = "X{}".format(index)
+        value = hint["words"].get(index)
+        if value is None:
+            return ""
+        if name in parameters["fixedVariables"]:
+            # A hint for a different fixed difference does not help
+            if int(parameters["fixedVariables"][name], 16) != int(value, 16):
+                return ""
+            continue
+        constraints += "ASSERT({} = {});\n".format(name, value)
+    return constraints
+
+
+def printStatistics(parameters):
+    statistics = parameters["warmStart"]
+    if statistics["warm"] == 0 and statistics["skipped"] == 0:
+        return
+    print("Warm start: {} of {} restricted calls solved ({}s per call), {} skipped, "
+          "{} full calls ({}s per call)".format(
+              statistics["hits"], statistics["warm"],
+              round(statistics["warmTime"] / statistics["warm"], 2) if statistics["warm"] else "-",
+              statistics["skipped"], statistics["cold"],
+              round(statistics["coldTime"] / statistics["cold"], 2) if statistics["cold"] else "-"))
+    if parameters["solverstats"]:
+        print("Warm start conflicts: {} in restricted calls, {} in full calls".format(
+            statistics["warmConflicts"], statistics["coldConflicts"]))
+    return
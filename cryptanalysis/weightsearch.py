@@ -0,0 +1,159 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Strategies for finding the minimal weight of a trail (weightsearch):
+linear - solve weight = w for w = start, start + 1, ... (default)
+galloping - solve start <= weight <= k for exponentially growing k and
+            bisect the last step
+descending - start from any trail below endweight and search for a
+             lighter one until there is none
+The range models are derived from the model for weight = k, hence the
+strategies work with every cipher and weight encoding.
+'''
+
+from cryptanalysis import search, solvers, workspace
+
+import re
+import time
+
+STRATEGIES = ["linear", "galloping", "descending"]
+
+
+def findMinimalWeight(parameters, start_time, createModel):
+    """
+    Returns the smallest weight from parameters["sweight"] on for which
+    the model has a solution, or endweight if there is none.
+    createModel() writes the model for weight = parameters["sweight"] and
+    returns the file name.
+    """
+    strategy = parameters["weightsearch"]
+    if strategy not in STRATEGIES:
+        raise ValueError("Unknown weight search strategy {}".format(strategy))
+
+    start = parameters["sweight"]
+    if strategy == "galloping":
+        weight = gallopingSearch(parameters, start_time, createModel, start)
+    elif strategy == "descending":
+        weight = descendingSearch(parameters, start_time, createModel, start)
+    else:
+        weight = start
+    parameters["sweight"] = weight
+    return weight
+
+
+def gallopingSearch(parameters, start_time, createModel, lower):
+    """
+    Doubles the width of the weight range until it contains a solution and
+    bisects the last range. Weights below lower have no solution.
+    """
+    step = 1
+    upper = None
+    while lower < parameters["endweight"] and \
+          not search.reachedTimelimit(start_time, parameters["timelimit"]):
+        bound = min(lower + step - 1, parameters["endweight"] - 1)
+        found, weight = solveRange(parameters, createModel, lower, bound)
+        if found:
+            upper = weight
+            break
+        lower = bound + 1
+        step *= 2
+
+    if upper is None:
+        return lower
+
+    while lower < upper and not search.reachedTimelimit(start_time, parameters["timelimit"]):
+        middle = (lower + upper) // 2
+        found, weight = solveRange(parameters, createModel, lower, middle)
+        if found:
+            upper = weight
+        else:
+            lower = middle + 1
+    return lower
+
+
+def descendingSearch(parameters, start_time, createModel, lower):
+    """
+    Finds any solution below endweight and searches for a lighter one
+    until there is none. Each solution gives an upper bound, hence the
+    search is fast if the first trail is close to the minimal weight.
+    """
+    found, upper = solveRange(parameters, createModel, lower, parameters["endweight"] - 1)
+    if not found:
+        return parameters["endweight"]
+
+    while lower < upper and not search.reachedTimelimit(start_time, parameters["timelimit"]):
+        found, weight = solveRange(parameters, createModel, lower, upper - 1)
+        if not found:
+            break
+        upper = weight
+    return upper
+
+
+def solveRange(parameters, createModel, lower, upper):
+    """
+    Solves the model for lower <= weight <= upper. Returns if there is a
+    solution and an upper bound on its weight.
+    """
+    print("Weight range: {} - {}".format(lower, upper))
+    weight = parameters["sweight"]
+    parameters["sweight"] = upper
+    stp_file = createModel()
+    parameters["sweight"] = weight
+
+    range_file = "{}-range.stp".format(stp_file[:-4])
+    with open(stp_file, "r") as model_file:
+        model = model_file.read()
+    with open(range_file, "w") as model_file:
+        model_file.write(getRangeModel(model, lower, upper))
+
+    start_time = time.time()
+    result, configuration = solvers.solveModel(range_file, parameters)
+    recordCall(parameters, start_time)
+    workspace.release(parameters, stp_file, range_file)
+    if not search.foundSolution(result):
+        return False, None
+
+    weight = getSolutionWeight(result)
+    if weight is None or not lower <= weight <= upper:
+        weight = upper
+    return True, weight
+
+
+def getRangeModel(model, lower, upper):
+    """
+    Replaces weight = upper by lower <= weight <= upper in a model
+    written by setupWeightComputation. The counters of the cardinality
+    encodings are built for upper and remain as they are.
+    """
+    model = model.replace("ASSERT(weight = {0:#018b});\n".format(upper), "")
+    constraints = "ASSERT(BVLE(weight, {0:#018b}));\n".format(upper)
+    constraints += "ASSERT(BVGE(weight, {0:#018b}));\n".format(lower)
+    return model.replace("QUERY(FALSE);", constraints + "QUERY(FALSE);")
+
+
+def getSolutionWeight(result):
+    """
+    Returns the value of the weight variable in the solver output.
+    """
+    match = re.search(r"ASSERT\(\s*weight\s*=\s*0(x|b|bin|hex)([0-9a-fA-F]+)\s*\);", result)
+    if match is None:
+        return None
+    return int(match.group(2), 2 if match.group(1) in ["b", "bin"] else 16)
+
+
+def recordCall(parameters, start_time):
+    statistics = parameters["weightSearch"]
+    statistics["calls"] += 1
+    statistics["time"] += time.time() - start_time
+    return
+
+
+def printStatistics(parameters):
+    statistics = parameters["weightSearch"]
+    if statistics["calls"] == 0:
+        return
+    print("Weight search ({}): {} solver calls in {}s".format(
+        parameters["weightsearch"], statistics["calls"], round(statistics["time"], 2)))
+    return
@@ -0,0 +1,88 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Workspace of a run. Each run works in a unique directory below workspace
+(default: tmpdir), which can be on a RAM-backed file system such as
+/dev/shm. Workers get subdirectories of the run directory. Models, CNFs and
+solver logs are deleted as soon as they are consumed and the run directory
+is removed at the end, unless keepworkspace is set. Models on which a
+solver failed are kept compressed in cachedir/failed with keepfailed.
+'''
+
+import contextlib
+import gzip
+import os
+import shutil
+import tempfile
+import time
+
+
+def createWorkspace(parameters):
+    """
+    Creates the run directory and sets it as tmpdir.
+    """
+    base = parameters["workspace"] or parameters["tmpdir"]
+    os.makedirs(base, exist_ok=True)
+    parameters["tmpdir"] = tempfile.mkdtemp(
+        prefix="{}-{}-".format(parameters["cipher"], time.strftime("%Y%m%d-%H%M%S")), dir=base)
+    return parameters["tmpdir"]
+
+
+def removeWorkspace(parameters):
+    if not parameters["keepworkspace"]:
+        shutil.rmtree(parameters["tmpdir"], ignore_errors=True)
+    return
+
+
+@contextlib.contextmanager
+def runWorkspace(parameters):
+    """
+    Runs the enclosed search in a new workspace. The workspace is kept if
+    the search fails.
+    """
+    tmpdir = parameters["tmpdir"]
+    createWorkspace(parameters)
+    failed = False
+    try:
+        yield parameters["tmpdir"]
+    except Exception:
+        failed = True
+        print("Keeping workspace {}".format(parameters["tmpdir"]))
+        raise
+    finally:
+        # The search also ends with quit() once the weight limit is reached
+        if not failed:
+            removeWorkspace(parameters)
+        parameters["tmpdir"] = tmpdir
+
+
+def release(parameters, *files):
+    """
+    Deletes intermediate files which have been consumed.
+    """
+    if parameters["keepworkspace"]:
+        return
+    for intermediate in files:
+        try:
+            os.remove(intermediate)
+        except OSError:
+            pass
+    return
+
+
+def keepFailedModel(parameters, stp_file):
+    """
+    Keeps a compressed copy of a model on which a solver failed.
+    """
+    if not parameters["keepfailed"] or not os.path.isfile(stp_file):
+        return
+    failed_dir = os.path.join(parameters["cachedir"], "failed")
+    os.makedirs(failed_dir, exist_ok=True)
+    failed_file = os.path.join(failed_dir, "{}-{}.stp.gz".format(
+        os.path.splitext(os.path.basename(stp_file))[0], time.strftime("%Y%m%d-%H%M%S")))
+    with open(stp_file, "rb") as input_file, gzip.open(failed_file, "wb") as output_file:
+        shutil.copyfileobj(input_file, output_file)
+    print("Kept failing model as {}".format(failed_file))
+    return
@@ -9,11 +9,12 @@ Note:
 To support WARP, the modified stpcommands must be included because the state words for WARP/TWINE is missing
 '''
 
-from cryptanalysis import search, boomerang
+from cryptanalysis import search, boomerang, batch, splits, verify, resultstore, workspace, trace, \
+    metrics
 from ciphers import (simon, speck, simonlinear, keccak, keccakdiff,
                      siphash, simonrk, chaskeymachalf, simonkeyrc,
                      ketje, ascon, salsa, chacha, skinny, skinnyrk, gimli,
-                     present, craft, craftlinear, trifle, trifle, triflerk, twine, warp, warprk, lblocks, lblock)
+                     present, craft, craftlinear, trifle, trifle, triflerk, twine, warp, warprk, lblocks, lblock, slim, gfn)
 from config import PATH_STP, PATH_CRYPTOMINISAT, PATH_BOOLECTOR
 
 from argparse import ArgumentParser, RawTextHelpFormatter
@@ -52,7 +53,12 @@ def startsearch(tool_parameters):
                     "warp" : warp.WarpCipher(),
                     "warprk" : warprk.WarpRKCipher(),
                     "lblocks" : lblocks.LBlockSCipher(),
-                    "lblock" : lblock.LBlockCipher()}
+                    "lblock" : lblock.LBlockCipher(),
+                    "slim" : slim.Slim()}
+
+    # Ciphers given by a spec in ciphers/specs, specs of hand-written models
+    # are available as <name>-gfn for comparison
+    cipher_suite.update(gfn.loadSpecs(reserved=cipher_suite))
 
     cipher = None
 
@@ -62,20 +68,34 @@ def startsearch(tool_parameters):
         print("Cipher not supported!")
         return
 
-    # Handle program flow
-    if tool_parameters["mode"] == 0:
-        search.findMinWeightCharacteristic(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 1:
-        search.searchCharacteristics(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 2:
-        search.findAllCharacteristics(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 3:
-        search.findBestConstants(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 4:
-        search.computeProbabilityOfDifferentials(cipher, tool_parameters)
-    elif tool_parameters["mode"] == 5:
-        boomerang.computeFeistelBoomerangDifferential(cipher, tool_parameters)
-
+    trace.start(tool_parameters)
+    metrics.start(tool_parameters)
+
+    # Handle program flow in a workspace of its own
+    with workspace.runWorkspace(tool_parameters):
+        if tool_parameters["mode"] == 0:
+            search.findMinWeightCharacteristic(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 1:
+            search.searchCharacteristics(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 2:
+            search.findAllCharacteristics(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 3:
+            search.findBestConstants(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 4:
+            search.computeProbabilityOfDifferentials(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 5:
+            boomerang.computeFeistelBoomerangDifferential(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 6:
+            splits.findBestRoundSplit(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 7:
+            verify.verifyBoomerang(cipher, tool_parameters)
+        elif tool_parameters["mode"] == 8:
+            verify.verifyDifferential(cipher, tool_parameters)
+
+    # Write the remaining results of this run
+    resultstore.flush(tool_parameters)
+    metrics.stop()
+    trace.finish()
     return
 
 def checkenviroment():
@@ -101,7 +121,7 @@ def checkenviroment():
     return
 
 
-def loadparameters(args):
+def loadparameters(args, inputfile=None):
     """
     Get parameters from the argument list and inputfile.
     """
@@ -114,6 +134,9 @@ def loadparameters(args):
               "lowertrail" : 5,
               "lweight" : 0,
               "lowerlimit" : 16,
+              "clusterdepth" : "fixed",
+              "clusterthreshold" : 0.01,
+              "clusterbudget" : 0,
               "mode" : 0,
               "wordsize" : 16,
               "blocksize" : 64,
@@ -121,6 +144,42 @@ def loadparameters(args):
               "endweight" : 1000,
               "iterative" : False,
               "boolector" : False,
+              "weightencoding" : "bvplus",
+              "weightsearch" : "linear",
+              "autobounds" : False,
+              "cachedir" : "cache",
+              "portfolio" : [],
+              "portfoliosize" : 0,
+              "resultcachesize" : 0,
+              "cnfcache" : False,
+              "solverstats" : False,
+              "trace" : None,
+              "metricsport" : 0,
+              "metricsfile" : None,
+              "metricsinterval" : 10,
+              "resultstore" : None,
+              "storebatch" : 64,
+              "warmstart" : False,
+              "tmpdir" : "tmp",
+              "workspace" : "",
+              "keepworkspace" : False,
+              "keepfailed" : False,
+              "workers" : 1,
+              "countworkers" : 1,
+              "trailworkers" : 1,
+              "candidates" : 1,
+              "candidatewindow" : 0,
+              "clusterworkers" : 0,
+              "cubetimeout" : 60,
+              "memorylimit" : 0,
+              "progressformat" : "line",
+              "progressinterval" : 1,
+              "splitslack" : None,
+              "prunefraction" : 0,
+              "seed" : 0,
+              "verifybatch" : 2**20,
+              "verifysamples" : 2**32,
+              "verifyprecision" : 0.1,
               "dot" : None,
               "latex" : None,
               "nummessages" : 1,
@@ -134,11 +193,32 @@ def loadparameters(args):
               "bct" : [[0] * 16 for _ in range(16)],
               "blockedCharacteristics" : [],
               "blockedUpperCharacteristics" : [],
-              "blockedLowerCharacteristics" : []}
+              "blockedLowerCharacteristics" : [],
+              "boomerangTrails" : [],
+              "clusterStatistics" : {},
+              "clusterWeights" : [],
+              "pruning" : {"pruned" : 0, "saved" : 0},
+              "resultCache" : {"hits" : 0, "misses" : 0, "saved" : 0},
+              "warmStart" : {"warm" : 0, "hits" : 0, "warmTime" : 0, "warmConflicts" : 0, "skipped" : 0,
+                             "cold" : 0, "coldTime" : 0, "coldConflicts" : 0},
+              "warmHints" : {},
+              "weightSearch" : {"calls" : 0, "time" : 0},
+              "cnfCache" : {"translated" : 0, "translationTime" : 0, "reused" : 0, "reuseTime" : 0},
+              "modelStatistics" : {},
+              "phase" : "search",
+              "solverCalls" : [],
+              "solverTime" : {"calls" : 0, "time" : 0},
+              "bestProbability" : None,
+              "differentialCache" : None,
+              "clusterPipeline" : None,
+              "progressQueue" : None}
 
     # Check if there is an input file specified
-    if args.inputfile:
-        with open(args.inputfile[0], 'r') as input_file:
+    if inputfile is None and args.inputfile:
+        inputfile = args.inputfile[0]
+
+    if inputfile:
+        with open(inputfile, 'r') as input_file:
             doc = yaml.load(input_file)
             params.update(doc)
             if "fixedVariables" in doc:
@@ -207,6 +287,9 @@ def loadparameters(args):
     if args.latex:
         params["latex"] = args.latex[0]
 
+    if args.workers:
+        params["workers"] = args.workers[0]
+
     return params
 
 
@@ -242,14 +325,17 @@ def main():
     parser.add_argument('--nummessages', nargs=1, type=int,
                         help="Number of message blocks.")
     parser.add_argument('--mode', nargs=1, type=int, 
-                        choices=[0, 1, 2, 3, 4, 5], help=
+                        choices=[0, 1, 2, 3, 4, 5, 6, 7, 8], help=
                         "0 = search characteristic for fixed round\n"
                         "1 = search characteristic for all rounds starting at"
                         "the round specified\n"
                         "2 = search all characteristic for a specific weight\n"
                         "3 = used for key recovery\n"
                         "4 = determine the probability of the differential\n"
-                        "5 = boomerang differential search (please specify --uppertrail and --lowertrail)\n")
+                        "5 = boomerang differential search (please specify --uppertrail and --lowertrail)\n"
+                        "6 = best split of --rounds into upper and lower trail (boomerang)\n"
+                        "7 = empirical verification of the boomerang X0 -> X(lowertrail)\n"
+                        "8 = empirical verification of the clustered differential X0 -> X(rounds)\n")
     parser.add_argument('--timelimit', nargs=1, type=int,
                         help="Set a timelimit for the search in seconds.")
     parser.add_argument('--iterative', action="store_true",
@@ -260,14 +346,32 @@ def main():
                                                      "read the parameters.")
     parser.add_argument('--dot', nargs=1, help="Print the trail in .dot format.")
     parser.add_argument('--latex', nargs=1, help="Print the trail in .tex format.")
+    parser.add_argument('--batch', nargs='+', help="Run all yaml files in the given "
+                                                   "files and directories.")
+    parser.add_argument('--workers', nargs=1, type=int,
+                        help="Number of parallel jobs for --batch and modes 6-8.")
+    parser.add_argument('--batchdir', nargs=1, default=["batch"],
+                        help="Directory for the results of --batch.")
 
     # Parse command line arguments and construct parameter list.
     args = parser.parse_args()
-    params = loadparameters(args)
 
     # Check if enviroment is setup correctly.
     checkenviroment()
 
+    # Run each configuration as a job on the worker pool
+    if args.batch:
+        configurations = batch.findConfigurations(args.batch)
+        batch.runBatch(configurations,
+                       lambda inputfile: loadparameters(args, inputfile),
+                       startsearch, args.batchdir[0],
+                       args.workers[0] if args.workers else 1)
+        return
+
+    params = loadparameters(args)
+    if not os.path.exists(params["tmpdir"]):
+        os.makedirs(params["tmpdir"])
+
     # Start the solver
     startsearch(params)
 
@@ -0,0 +1,79 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Queries the results of past searches in the result store, e.g. the best
+known 9-round lower differentials of WARP:
+    python3 cryptosmt-query.py clusters --cipher warp --rounds 9 --face lower
+'''
+
+from cryptanalysis import resultstore
+
+from argparse import ArgumentParser
+
+import json
+import os
+
+# Columns with json data are only printed with --full
+DATA_COLUMNS = ["data", "histogram", "trails"]
+
+
+def main():
+    """
+    Parse the arguments and print the matching results.
+    """
+    parser = ArgumentParser(description="Query the results of past searches.")
+    parser.add_argument('table', choices=sorted(resultstore.TABLE_ORDER),
+                        help="Type of result.")
+    parser.add_argument('--store', nargs=1, default=[os.path.join("cache", "results.db")],
+                        help="Result store (cachedir/resultstore of the search).")
+    parser.add_argument('--cipher', nargs=1, help="Cipher name.")
+    parser.add_argument('--rounds', nargs=1, type=int,
+                        help="Number of rounds (characteristics and clusters).")
+    parser.add_argument('--face', nargs=1, choices=["upper", "lower"],
+                        help="Face of the boomerang (characteristics and clusters).")
+    parser.add_argument('--weight', nargs=1, type=int, help="Weight of the trail.")
+    parser.add_argument('--x0', nargs=1, help="Input difference.")
+    parser.add_argument('--xr', nargs=1, help="Output difference.")
+    parser.add_argument('--limit', nargs=1, type=int, default=[10],
+                        help="Maximal number of results.")
+    parser.add_argument('--full', action="store_true",
+                        help="Print the complete results as json.")
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.store[0]):
+        print("No result store at {}".format(args.store[0]))
+        return
+
+    filters = {}
+    for column in ["cipher", "rounds", "face", "weight", "x0", "xr"]:
+        if getattr(args, column):
+            filters[column] = getattr(args, column)[0]
+
+    try:
+        rows = resultstore.query(args.store[0], args.table, filters, args.limit[0])
+    except ValueError as error:
+        parser.error(str(error))
+    if args.full:
+        for row in rows:
+            for column in DATA_COLUMNS:
+                if column in row:
+                    row[column] = json.loads(row[column])
+        print(json.dumps(rows, indent=1))
+        return
+
+    if not rows:
+        print("No results")
+        return
+    columns = [column for column in rows[0] if column not in DATA_COLUMNS + ["created"]]
+    table = [columns] + [[str(row[column]) for column in columns] for row in rows]
+    widths = [max(len(line[index]) for line in table) for index in range(len(columns))]
+    for line in table:
+        print("  ".join(value.ljust(width) for value, width in zip(line, widths)).rstrip())
+    return
+
+
+if __name__ == '__main__':
+    main()
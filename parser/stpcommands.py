@@ -6,8 +6,13 @@ Provides functions for constructing the input file for STP.
 
 Update 11 October 2021 (jesenteh)
 Added additional state words to blockCharacteristic to support WARP/TWINE
+
+Update 19 October 2026 (jesenteh)
+Added sequential counter and totalizer encodings for the weight computation
+Added a compact CNF for 4-bit S-boxes
 '''
 
+import functools
 import itertools
 
 def blockCharacteristic(stpfile, characteristic, wordsize):
@@ -96,13 +101,18 @@ def getStringForNonZero(variables, wordsize):
     return command
 
 
-def limitWeight(stpfile, weight, p, wordsize, ignoreMSBs=0):
+def limitWeight(stpfile, weight, p, wordsize, ignoreMSBs=0, encoding="bvplus"):
     """
     Adds the weight computation and assertion to the stp stpfile.
     """
-    stpfile.write("limitWeight: BITVECTOR(16);\n")
-    stpfile.write(getWeightString(p, wordsize, ignoreMSBs, "limitWeight") + "\n")
-    stpfile.write("ASSERT(BVLE(limitWeight, {0:#018b}));\n".format(weight))
+    if encoding == "bvplus":
+        stpfile.write("limitWeight: BITVECTOR(16);\n")
+        stpfile.write(getWeightString(p, wordsize, ignoreMSBs, "limitWeight") + "\n")
+        stpfile.write("ASSERT(BVLE(limitWeight, {0:#018b}));\n".format(weight))
+    else:
+        stpfile.write(getCardinalityString(p, wordsize, weight, ignoreMSBs,
+                                           "limitWeight", encoding) + "\n")
+        stpfile.write("ASSERT({} = 0bin1);\n".format(getWeightBoundLiteral("limitWeight")))
     return
 
 def setupWeightComputationSum(stpfile, weight, p, wordsize, ignoreMSBs=0):
@@ -121,12 +131,28 @@ def setupWeightComputationSum(stpfile, weight, p, wordsize, ignoreMSBs=0):
     stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
     return
 
-def setupWeightComputation(stpfile, weight, p, wordsize, ignoreMSBs=0):
+def setupWeightComputation(stpfile, weight, p, wordsize, ignoreMSBs=0,
+                           encoding="bvplus", zeroMSBs=0):
     """
     Assert that weight is equal to the sum of the hamming weight of p.
+
+    The weight is always the BVPLUS sum, such that the solver output gives
+    the weight of the trail. encoding selects an additional bound:
+    bvplus - none (default)
+    sequential - weight <= w by a sequential counter in unary representation
+    totalizer - weight <= w by a totalizer tree in unary representation
+    The bound is the literal getWeightBoundLiteral() of the counter.
+
+    zeroMSBs are MSBs of p which the model asserts to be zero. They do not
+    change the weight and are only left out of the counters, the bvplus
+    model is the same for any zeroMSBs.
     """
     stpfile.write("weight: BITVECTOR(16);\n")
     stpfile.write(getWeightString(p, wordsize, ignoreMSBs) + "\n")
+    if encoding != "bvplus":
+        stpfile.write(getCardinalityString(p, wordsize, weight, max(ignoreMSBs, zeroMSBs),
+                                           "weight", encoding) + "\n")
+        stpfile.write("ASSERT({} = 0bin1);\n".format(getWeightBoundLiteral()))
     stpfile.write("ASSERT(weight = {0:#018b});\n".format(weight))
 
     return
@@ -159,6 +185,143 @@ def getWeightString(variables, wordsize, ignoreMSBs=0, weightVariable="weight"):
     return command
 
 
+def getCardinalityPrefix(weightVariable="weight"):
+    """
+    Returns the prefix for the auxiliary variables of the cardinality
+    encodings. The solver output is parsed for "weight", which must not
+    match these variables.
+    """
+    return weightVariable[0].upper() + weightVariable[1:]
+
+
+def getWeightBoundLiteral(weightVariable="weight"):
+    """
+    Returns the literal which is true iff the weight encoded by
+    getCardinalityString is at most the bound of the encoding.
+    """
+    return "{}LE".format(getCardinalityPrefix(weightVariable))
+
+
+def getCardinalityString(variables, wordsize, bound, ignoreMSBs=0,
+                         weightVariable="weight", encoding="sequential"):
+    """
+    Counts the hamming weight of the given variables in unary up to bound + 1.
+    The counter is stored in {Prefix}Count, where bit i is set iff the
+    weight is larger than i, and {Prefix}LE is set iff the weight is at most
+    bound (see getCardinalityPrefix).
+    """
+    bits = ["{0}[{1}:{1}]".format(var, bit) for var in variables
+            for bit in range(wordsize - ignoreMSBs)]
+    width = bound + 1
+
+    prefix = getCardinalityPrefix(weightVariable)
+
+    if encoding == "sequential":
+        command = getSequentialCounterString(bits, width, prefix)
+    elif encoding == "totalizer":
+        command = getTotalizerString(bits, width, prefix)
+    else:
+        raise ValueError("Unknown weight encoding {}".format(encoding))
+
+    command += "{0}LE: BITVECTOR(1);\n".format(prefix)
+    command += "ASSERT({0}LE = ~{0}Count[{1}:{1}]);".format(prefix, bound)
+    return command
+
+
+def getSequentialCounterString(bits, width, prefix="Weight"):
+    """
+    Sequential counter over the given bits, where each step shifts a one
+    into the unary counter if the current bit is set. The counter saturates
+    at width.
+    """
+    counters = ["{}C{}".format(prefix, i) for i in range(len(bits))]
+    command = ""
+    if counters:
+        command += getStringForVariables(counters, width) + "\n"
+
+    previous = "0bin{}".format("0" * width)
+    for counter, bit in zip(counters, bits):
+        command += "ASSERT({0} = IF {1} = 0bin1 THEN {2} ELSE {3} ENDIF);\n".format(
+            counter, bit, getStringUnaryIncrement(previous, width), previous)
+        previous = counter
+
+    command += "{0}Count: BITVECTOR({1});\n".format(prefix, width)
+    command += "ASSERT({0}Count = {1});\n".format(prefix, previous)
+    return command
+
+
+def getTotalizerString(bits, width, prefix="Weight"):
+    """
+    Totalizer over the given bits. Pairs of unary counters are merged in a
+    balanced tree, each node is truncated to width.
+    """
+    # Leaves are the bits themselves, stored as (expression, width)
+    nodes = [(bit, 1) for bit in bits]
+    command = ""
+    node_count = 0
+
+    if not nodes:
+        nodes = [("0bin0", 1)]
+
+    while len(nodes) > 1:
+        merged = []
+        for i in range(0, len(nodes) - 1, 2):
+            (a, a_width), (b, b_width) = nodes[i], nodes[i + 1]
+            node = "{}T{}".format(prefix, node_count)
+            node_width = min(a_width + b_width, width)
+            node_count += 1
+            command += "{}: BITVECTOR({});\n".format(node, node_width)
+            command += "ASSERT({} = {});\n".format(
+                node, getStringUnaryMerge(a, a_width, b, b_width, node_width))
+            merged.append((node, node_width))
+        if len(nodes) % 2:
+            merged.append(nodes[-1])
+        nodes = merged
+
+    root, root_width = nodes[0]
+    command += "{0}Count: BITVECTOR({1});\n".format(prefix, width)
+    if root_width < width:
+        root = "0bin{}@{}".format("0" * (width - root_width), root)
+    command += "ASSERT({0}Count = {1});\n".format(prefix, root)
+    return command
+
+
+def getStringUnaryIncrement(value, width):
+    """
+    Adds one to a counter in unary representation, saturating at width.
+    """
+    if width == 1:
+        return "0bin1"
+    return "(({0} << 1)[{1}:0] | 0bin{2}1)".format(value, width - 1,
+                                                     "0" * (width - 1))
+
+
+def getStringUnaryMerge(a, a_width, b, b_width, width):
+    """
+    Adds two counters in unary representation. The result is truncated to
+    width, which saturates the counter.
+    """
+    def extend(value, value_width):
+        if value_width == width:
+            return value
+        return "(0bin{}@{})".format("0" * (width - value_width), value)
+
+    def bit(value, value_width, index):
+        if value_width == 1:
+            return value
+        return "{0}[{1}:{1}]".format(value, index)
+
+    # a is shifted by j if b is at least j
+    terms = [extend(a, a_width)]
+    for j in range(1, min(b_width, width) + 1):
+        shifted = "(({0} << {1})[{2}:0] | 0bin{3})".format(
+            extend(a, a_width), j, width - 1, "0" * (width - j) + "1" * j)
+        terms.append("(IF {0} = 0bin1 THEN {1} ELSE 0bin{2} ENDIF)".format(
+            bit(b, b_width, j - 1), shifted, "0" * width))
+
+    return "({})".format(" | ".join(terms))
+
+
 def getStringEq(a, b, c):
     command = "(BVXOR(~{0}, {1}) & BVXOR(~{0}, {2}))".format(a, b, c)
     return command
@@ -264,3 +427,58 @@ def add4bitSbox(sbox, variables):
             cnf += "({}) &".format(clause[:-2])
 
     return "ASSERT({} = 0bin1);\n".format(cnf[:-2])
+
+
+def add4bitSboxCompact(sbox, variables):
+    """
+    Adds the same constraints as add4bitSbox, but with a reduced CNF. Each
+    clause excludes a whole cube of invalid transitions, hence the solutions
+    (and the number of solutions) are unchanged.
+    """
+    assert(len(variables) == 12)
+
+    cnf = ""
+    for clause in getSboxClauses(tuple(sbox)):
+        literals = ["{}{}".format("~" if value else "", variables[literal])
+                    for literal, value in clause]
+        cnf += "({}) &".format(" | ".join(literals))
+
+    return "ASSERT({} = 0bin1);\n".format(cnf[:-2])
+
+
+@functools.lru_cache(maxsize=None)
+def getSboxClauses(sbox):
+    """
+    Returns a CNF of the valid (input, output, weight) transitions of the
+    S-box as used in add4bitSbox. A clause is a list of (literal, value)
+    and is violated if all literals have the given value.
+    """
+    assert(len(sbox) == 16)
+
+    DDT = [[0]*16 for i in range(16)]
+    for a in range(16):
+        for b in range(16):
+            DDT[a ^ b][sbox[a] ^ sbox[b]] += 1
+
+    # Transitions as 12-bit integers, literal 0 is the MSB
+    weights = {2: 0b0111, 4: 0b0011, 8: 0b0001, 16: 0b0000}
+    valid = [(input_diff << 8) | (output_diff << 4) | weights[DDT[input_diff][output_diff]]
+             for input_diff in range(16) for output_diff in range(16)
+             if DDT[input_diff][output_diff] != 0]
+    invalid = set(range(1 << 12)) - set(valid)
+
+    # Greedily expand each uncovered invalid transition to a maximal cube
+    # which contains no valid transition
+    clauses = []
+    for point in sorted(invalid):
+        if point not in invalid:
+            continue
+        mask = (1 << 12) - 1
+        for bit in range(12):
+            reduced = mask & ~(1 << bit)
+            if all(value & reduced != point & reduced for value in valid):
+                mask = reduced
+        invalid = set(value for value in invalid if value & mask != point & mask)
+        clauses.append([(literal, (point >> (11 - literal)) & 1)
+                        for literal in range(12) if (mask >> (11 - literal)) & 1])
+    return clauses
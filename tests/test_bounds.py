@@ -0,0 +1,93 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the lower bounds with a fake cipher, whose r-round
+characteristics have weight at least 3r - 1.
+'''
+
+from cryptanalysis import bounds, warmstart
+
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+
+class Cipher(object):
+
+    name = "fake"
+
+    def createSTP(self, stp_file, parameters):
+        with open(stp_file, "w") as model_file:
+            model_file.write("% rounds={} weight={}\n".format(parameters["rounds"],
+                                                               parameters["sweight"]))
+        return
+
+
+class BoundsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parameters = {"cachedir": os.path.join(self.directory, "cache"),
+                           "tmpdir": self.directory, "wordsize": 16, "timelimit": -1,
+                           "endweight": 100, "warmstart": False, "keepworkspace": False}
+        self.calls = []
+        self.solveWarm = warmstart.solveWarm
+        warmstart.solveWarm = self.solve
+
+    def tearDown(self):
+        warmstart.solveWarm = self.solveWarm
+        shutil.rmtree(self.directory)
+
+    def solve(self, stp_file, parameters, hint):
+        self.calls.append((parameters["rounds"], parameters["sweight"]))
+        if parameters["sweight"] >= 3 * parameters["rounds"] - 1:
+            return "Invalid.", "stp"
+        return "Valid.", "stp"
+
+    def testLowerBound(self):
+        self.assertEqual(bounds.getLowerBound(Cipher(), self.parameters, 4, time.time()), 11)
+        # Each number of rounds starts from the sum of the smaller bounds
+        self.assertEqual(self.calls, [(1, 0), (1, 1), (1, 2),
+                                      (2, 4), (2, 5),
+                                      (3, 7), (3, 8),
+                                      (4, 10), (4, 11)])
+
+        # The bounds are kept on disk and exact bounds are not searched again
+        self.calls = []
+        self.assertEqual(bounds.getLowerBound(Cipher(), self.parameters, 4, time.time()), 11)
+        self.assertEqual(self.calls, [])
+        self.assertEqual(bounds.loadBounds(self.parameters)["fake-16"]["3"],
+                         {"weight": 8, "exact": True})
+
+    def testStoreBound(self):
+        bounds.storeBound(self.parameters, "fake-16", 5, 10, False)
+        # Bounds only increase
+        bounds.storeBound(self.parameters, "fake-16", 5, 8, False)
+        self.assertEqual(bounds.loadBounds(self.parameters)["fake-16"]["5"],
+                         {"weight": 10, "exact": False})
+        bounds.storeBound(self.parameters, "fake-16", 5, 12, True)
+        bounds.storeBound(self.parameters, "fake-16", 5, 13, False)
+        self.assertEqual(bounds.loadBounds(self.parameters)["fake-16"]["5"],
+                         {"weight": 12, "exact": True})
+
+        # An unfinished search continues from the stored bound
+        bounds.storeBound(self.parameters, "fake-16", 1, 2, False)
+        self.assertEqual(bounds.getLowerBound(Cipher(), self.parameters, 1, time.time()), 2)
+        self.assertEqual(self.calls, [(1, 2)])
+
+    def testCorruptFile(self):
+        os.makedirs(self.parameters["cachedir"])
+        with open(bounds.getBoundsFile(self.parameters), "w") as bounds_file:
+            bounds_file.write("{")
+        self.assertEqual(bounds.loadBounds(self.parameters), {})
+        bounds.storeBound(self.parameters, "fake-16", 1, 2, True)
+        self.assertEqual(bounds.loadBounds(self.parameters), {"fake-16": {"1": {"weight": 2,
+                                                                                 "exact": True}}})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,170 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the reuse of the static CNF with synthetic DIMACS probes.
+'''
+
+from cryptanalysis import cnfcache
+
+import os
+import shutil
+import tempfile
+import unittest
+
+STATIC = ["1 -2 0", "2 3 -4 0", "-1 4 5 0"]
+
+
+def getProbes(literals, variables=8, static=STATIC):
+    """
+    Returns the static CNF and the probes STP writes if bit i is the CNF
+    variable literals[i].
+    """
+    probes = []
+    for pattern in cnfcache.getProbePatterns(len(literals)):
+        units = ["{}{} 0".format("" if value else "-", literal)
+                 for literal, value in zip(literals, pattern)]
+        probes.append((variables, static + units))
+    return (variables, list(static)), probes
+
+
+class ProbeTest(unittest.TestCase):
+
+    def testPatterns(self):
+        self.assertEqual(cnfcache.getProbePatterns(1), [[0], [1]])
+        self.assertEqual(cnfcache.getProbePatterns(4),
+                         [[0, 1, 0, 1], [0, 0, 1, 1], [1, 1, 1, 1]])
+        # Every bit has its own signs
+        for bits in [2, 3, 5, 8, 17]:
+            signs = list(zip(*cnfcache.getProbePatterns(bits)))
+            self.assertEqual(len(set(signs)), bits)
+
+    def testProbeModel(self):
+        model = cnfcache.getProbeModel("x: BITVECTOR(4);\ny: BITVECTOR(2);\nQUERY(FALSE);\n",
+                                       [("x", 4), ("y", 2)], [1, 0, 0, 1, 0, 1])
+        self.assertIn("ASSERT(x = 0bin1001);\nASSERT(y = 0bin10);\nQUERY(FALSE);", model)
+
+    def testLiterals(self):
+        for literals in [[6], [3, 7], [8, 2, 5, 6, 7], list(range(20, 4, -1))]:
+            base, probes = getProbes(literals, variables=max(literals))
+            self.assertEqual(cnfcache.getLiterals(base, probes, len(literals)), literals)
+
+    def testVariableCount(self):
+        base, probes = getProbes([6, 7, 8])
+        probes[1] = (9, probes[1][1])
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+    def testMissingStaticClause(self):
+        base, probes = getProbes([6, 7, 8])
+        probes[0][1].remove(STATIC[1])
+        probes[0][1].append("2 3 0")
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+    def testAdditionalClause(self):
+        base, probes = getProbes([6, 7, 8])
+        probes[1][1].append("6 7 0")
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+    def testMissingUnit(self):
+        # Bit fixed by the static CNF
+        base, probes = getProbes([6, 7, 8], static=STATIC + ["8 0"])
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+    def testNonUnitClause(self):
+        base, probes = getProbes([6, 7, 8])
+        probes[0][1][-1] = "-8 5 0"
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+    def testNegatedBit(self):
+        # STP may use the negation of a bit, the last probe sets all bits
+        base, probes = getProbes([6, 7, 8])
+        for probe in probes:
+            probe[1][-1] = probe[1][-1][1:] if probe[1][-1].startswith("-") else "-" + probe[1][-1]
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+    def testSameVariable(self):
+        # Two bits are the same CNF variable
+        base, probes = getProbes([6, 6, 8])
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+    def testIndexOutOfRange(self):
+        # Signs of index 3 with three bits
+        base, probes = getProbes([6, 7, 8])
+        probes[0][1][-2:] = ["-7 0", "8 0"]
+        probes[1][1][-2:] = ["7 0", "8 0"]
+        self.assertIsNone(cnfcache.getLiterals(base, probes, 3))
+
+
+class StaticModelTest(unittest.TestCase):
+
+    def testStaticModel(self):
+        model = ("x, y: BITVECTOR(4);\n"
+                 "weight: BITVECTOR(16);\n"
+                 "ASSERT(x = 0bin1010);\n"
+                 "ASSERT(y = 0hex3);\n"
+                 "ASSERT(x = 0bin0000);\n"
+                 "ASSERT(z = 0x1);\n"
+                 "ASSERT(y = BVXOR(x, x));\n"
+                 "ASSERT(weight = 0b0000000000000101);\n"
+                 "QUERY(FALSE);\n")
+        static, values = cnfcache.getStaticModel(model, {"fixedVariables": {"x": "0x0", "y": "0x0"}})
+        self.assertEqual(values, {"x": 10, "y": 3, "weight": 5})
+        # Only the first assert of a variable is removed, z is not fixed
+        self.assertEqual(static, "x, y: BITVECTOR(4);\n"
+                                 "weight: BITVECTOR(16);\n"
+                                 "ASSERT(x = 0bin0000);\n"
+                                 "ASSERT(z = 0x1);\n"
+                                 "ASSERT(y = BVXOR(x, x));\n"
+                                 "QUERY(FALSE);\n")
+        self.assertEqual(cnfcache.getWidths(model), {"x": 4, "y": 4, "weight": 16})
+
+    def testConstants(self):
+        self.assertEqual(cnfcache.parseConstant("0hexff"), 255)
+        self.assertEqual(cnfcache.parseConstant("0bin101"), 5)
+        self.assertEqual(cnfcache.parseConstant("0x1f"), 31)
+        self.assertEqual(cnfcache.parseConstant("0b11"), 3)
+        self.assertIsNone(cnfcache.parseConstant("0binxyz"))
+        self.assertIsNone(cnfcache.parseConstant("weight"))
+
+    def testStaticHash(self):
+        # Comments, whitespace and the order of the lines are ignored
+        first = cnfcache.getStaticHash("ASSERT(a = b);\nASSERT(c  = d);\n", ["x"])
+        second = cnfcache.getStaticHash("% comment\nASSERT(c = d);\nASSERT(a = b);\n", ["x"])
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, cnfcache.getStaticHash("ASSERT(a = b);\nASSERT(c = d);\n", ["y"]))
+
+
+class WriteCNFTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parameters = {"cachedir": self.directory,
+                           "cnfCache": {"reused": 0, "reuseTime": 0}}
+        os.makedirs(cnfcache.getCacheDir(self.parameters))
+        with open(cnfcache.getCNFFile(self.parameters, "key"), "w") as cnf_file:
+            cnf_file.write("c static\np cnf 8 3\n" + "\n".join(STATIC) + "\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def testWriteCNF(self):
+        translation = {"key": "key",
+                       "entry": {"variables": 8, "clauses": 3,
+                                 "literals": {"x": [6, 7], "weight": [2, 3, 5]}},
+                       "values": {"x": 2, "weight": 5}}
+        cnfcache.writeCNF(self.parameters, translation, self.directory, bits=[("x", 0, 1)])
+        with open(os.path.join(self.directory, "output_0.cnf"), "r") as cnf_file:
+            lines = cnf_file.read().splitlines()
+        self.assertEqual(lines, ["c static", "p cnf 8 9"] + STATIC +
+                         ["-6 0", "7 0", "2 0", "-3 0", "5 0", "6 0"])
+        self.assertEqual(self.parameters["cnfCache"]["reused"], 1)
+
+        # The written CNF decodes like a probe
+        variables, clauses = cnfcache.readCNF(os.path.join(self.directory, "output_0.cnf"))
+        self.assertEqual(variables, 8)
+        self.assertEqual(len(clauses), 9)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the ciphers generated from specs.
+'''
+
+from ciphers import gfn, twine, warp
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+
+def getModelSize(cipher, wordsize, rounds):
+    """
+    Returns the number of asserts, S-box clauses and characters of the
+    model of a cipher.
+    """
+    directory = tempfile.mkdtemp()
+    try:
+        stp_file = os.path.join(directory, "model.stp")
+        parameters = {"wordsize": wordsize, "rounds": rounds, "sweight": 10,
+                      "weightencoding": "bvplus", "iterative": False,
+                      "fixedVariables": {}, "blockedCharacteristics": []}
+        cipher.createSTP(stp_file, parameters)
+        with open(stp_file, "r") as model_file:
+            model = model_file.read()
+    finally:
+        shutil.rmtree(directory)
+    asserts = len(re.findall(r"^ASSERT\(", model, re.MULTILINE))
+    clauses = sum(line.count("&") + 1 for line in model.splitlines()
+                  if line.startswith("ASSERT((") and line.endswith("= 0bin1);"))
+    return asserts, clauses, len(model)
+
+
+class SpecTest(unittest.TestCase):
+
+    def testNames(self):
+        specs = gfn.loadSpecs(reserved={"warp": None, "twine": None})
+        self.assertIn("warp-gfn", specs)
+        self.assertIn("twine-gfn", specs)
+        self.assertIn("warprk", specs)
+        # Cached bounds and differentials are keyed on the name
+        for name, cipher in specs.items():
+            self.assertEqual(cipher.name, name)
+
+    def testModelSize(self):
+        specs = gfn.loadSpecs(reserved={"warp": None, "twine": None})
+        for cipher, wordsize in [(warp.WarpCipher(), 128), (twine.TwineCipher(), 64)]:
+            spec = specs["{}-gfn".format(cipher.name)]
+            for rounds in [1, 2]:
+                asserts, clauses, size = getModelSize(cipher, wordsize, rounds)
+                spec_asserts, spec_clauses, spec_size = getModelSize(spec, wordsize, rounds)
+                self.assertLess(spec_asserts, asserts)
+                self.assertLess(spec_clauses, clauses)
+                self.assertLess(spec_size, size)
+
+    def testInvalidSpec(self):
+        spec = {"name": "broken", "sbox": list(range(16)), "perm": [0, 1, 2, 2]}
+        with self.assertRaises(ValueError):
+            gfn.GFNCipher(spec)
+
+
+if __name__ == "__main__":
+    unittest.main()
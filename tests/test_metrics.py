@@ -0,0 +1,112 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the metrics in the Prometheus text format.
+'''
+
+from cryptanalysis import metrics
+
+import os
+import re
+import shutil
+import socket
+import tempfile
+import time
+import unittest
+import urllib.request
+
+# Metric name, optional labels and the value of a sample
+SAMPLE = re.compile(r'^(cryptosmt_\w+)(?:\{((?:\w+="(?:[^"\\]|\\.)*",?)*)\})? (-?[\d.]+(?:e-?\d+)?)$')
+
+
+def parseMetrics(text):
+    """
+    Returns the samples as {(name, labels): value} and checks that each
+    metric has HELP and TYPE lines before its samples.
+    """
+    samples = {}
+    described = set()
+    for line in text.splitlines():
+        if line.startswith("# HELP ") or line.startswith("# TYPE "):
+            described.add((line[2:6], line.split()[2]))
+            continue
+        match = SAMPLE.match(line)
+        assert match, line
+        name = match.group(1)
+        assert ("HELP", name) in described and ("TYPE", name) in described, line
+        labels = tuple(re.findall(r'(\w+)="((?:[^"\\]|\\.)*)"', match.group(2) or ""))
+        samples[(name, labels)] = float(match.group(3))
+    return samples
+
+
+class MetricsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parameters = {"cipher": "warp", "uppertrail": 7, "lowertrail": 6, "phase": "upper",
+                           "bestProbability": None, "boomerangTrails": [{}, {}], "sweight": 12,
+                           "timelimit": -1, "metricsport": None, "metricsinterval": 0.1,
+                           "metricsfile": os.path.join(self.directory, "cryptosmt.prom"),
+                           "clusterStatistics": {"upper": {"gain": 1.5, "time": 2.25, "count": 4,
+                                                           "depth": 3}},
+                           "solverTime": {"calls": 10, "time": 5.5},
+                           "resultCache": {"hits": 1, "misses": 3, "saved": 0},
+                           "cnfCache": {"translated": 2, "translationTime": 0, "reused": 0,
+                                        "reuseTime": 0},
+                           "warmStart": {"warm": 0, "hits": 0}}
+
+    def tearDown(self):
+        metrics.stop()
+        shutil.rmtree(self.directory)
+
+    def testMetrics(self):
+        samples = parseMetrics(metrics.getMetrics(self.parameters, time.time()))
+        self.assertEqual(samples[("cryptosmt_info", (("cipher", "warp"), ("uppertrail", "7"),
+                                                     ("lowertrail", "6")))], 1)
+        self.assertEqual(samples[("cryptosmt_boomerang_trails", ())], 2)
+        self.assertEqual(samples[("cryptosmt_solver_seconds_total", ())], 5.5)
+        self.assertEqual(samples[("cryptosmt_clustered_differentials_total", (("face", "upper"),))], 4)
+        self.assertEqual(samples[("cryptosmt_cache_hit_ratio", (("cache", "result"),))], 0.25)
+        # Optional metrics and ratios without lookups are left out
+        names = set(name for name, labels in samples)
+        self.assertNotIn("cryptosmt_boomerang_probability_log2", names)
+        self.assertNotIn("cryptosmt_time_left_seconds", names)
+        self.assertNotIn(("cryptosmt_cache_hit_ratio", (("cache", "warmstart"),)), samples)
+
+        self.parameters["bestProbability"] = -38.5
+        self.parameters["timelimit"] = 3600
+        samples = parseMetrics(metrics.getMetrics(self.parameters, time.time()))
+        self.assertEqual(samples[("cryptosmt_boomerang_probability_log2", ())], -38.5)
+        self.assertGreater(samples[("cryptosmt_time_left_seconds", ())], 3500)
+
+    def testEscaping(self):
+        self.parameters["cipher"] = 'gfn "a\\b"\nc'
+        text = metrics.getMetrics(self.parameters, time.time())
+        self.assertIn('cipher="gfn \\"a\\\\b\\"\\nc"', text)
+        # The line structure is kept
+        parseMetrics(text)
+
+    def testExporter(self):
+        with socket.socket() as probe:
+            probe.bind(("127.0.0.1", 0))
+            self.parameters["metricsport"] = probe.getsockname()[1]
+        metrics.start(self.parameters)
+
+        with urllib.request.urlopen("http://127.0.0.1:{}/metrics".format(
+                self.parameters["metricsport"])) as response:
+            self.assertIn("text/plain", response.headers["Content-Type"])
+            samples = parseMetrics(response.read().decode("utf-8"))
+        self.assertEqual(samples[("cryptosmt_solver_calls_total", ())], 10)
+
+        # The file is rewritten periodically and once more when stopping
+        self.parameters["solverTime"]["calls"] = 11
+        metrics.stop()
+        with open(self.parameters["metricsfile"], "r") as metrics_file:
+            samples = parseMetrics(metrics_file.read())
+        self.assertEqual(samples[("cryptosmt_solver_calls_total", ())], 11)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,283 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the vectorized reference implementations. The differentials of
+weight 0 in the STP model of a cipher must hold for all samples of its
+reference, TWINE is also checked against the published test vector.
+'''
+
+from ciphers import gfn, lblocks, reference, slim, twine, warp
+
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+np = reference.np
+
+LITERALS = re.compile(r"(&)|(~?)(\w+)\[(\d+):\d+\]")
+TOKENS = re.compile(r"\s*(0x[0-9A-Fa-f]+|0bin[01]+|BVXOR|[A-Za-z_][A-Za-z0-9_]*|\d+|[\[\]():@,=])")
+
+
+def getModel(cipher, wordsize, rounds):
+    directory = tempfile.mkdtemp()
+    try:
+        stp_file = os.path.join(directory, "model.stp")
+        parameters = {"wordsize": wordsize, "rounds": rounds, "sweight": 0,
+                      "weightencoding": "bvplus", "iterative": False,
+                      "fixedVariables": {}, "blockedCharacteristics": []}
+        cipher.createSTP(stp_file, parameters)
+        with open(stp_file, "r") as model_file:
+            return model_file.read()
+    finally:
+        shutil.rmtree(directory)
+
+
+class LinearModel(object):
+    """
+    Propagates known bits through the linear asserts of a model. Each bit
+    of an assert is an equation: the XOR of its constant and variable bits
+    is zero.
+    """
+
+    def __init__(self, model):
+        self.equations = []
+        self.clauses = []
+        self.widths = {}
+        for names, width in re.findall(r"^([\w,]+): BITVECTOR\((\d+)\);", model, re.MULTILINE):
+            self.widths.update((name, int(width)) for name in names.split(","))
+        for line in model.splitlines():
+            line = line.split("#")[0].strip()
+            if not line.startswith("ASSERT(") or re.search(r"weight|Weight|NOT\(", line):
+                continue
+            if line.startswith("ASSERT(("):
+                self.clauses.append(self.parseClauses(line))
+                continue
+            self.tokens = TOKENS.findall(line[len("ASSERT("):-len(");")])
+            self.index = 0
+            left = self.parseConcat()
+            self.take("=")
+            right = self.parseConcat()
+            for a, b in zip(left, right):
+                self.equations.append((a[0] ^ b[0], a[1] + b[1]))
+
+    def getVariables(self):
+        variables = set(bit[0] for constant, bits in self.equations for bit in bits)
+        variables.update(bit[0] for bits, clauses in self.clauses for bit in bits)
+        return variables
+
+    def solve(self, known):
+        """
+        Assigns the known bits and solves the equations with a single
+        unknown bit until no more bits are defined. Returns False on a
+        contradiction.
+        """
+        self.bits = dict(known)
+        changed = True
+        while changed:
+            changed = False
+            for constant, bits in self.equations:
+                unknown = [bit for bit in bits if bit not in self.bits]
+                if len(unknown) > 1:
+                    continue
+                value = constant
+                for bit in bits:
+                    value ^= self.bits.get(bit, 0)
+                if unknown:
+                    self.bits[unknown[0]] = value
+                    changed = True
+                elif value:
+                    return False
+        return True
+
+    def isValid(self):
+        """
+        Returns whether the clauses of all S-boxes hold.
+        """
+        for bits, clauses in self.clauses:
+            value = 0
+            for position, bit in enumerate(bits):
+                value |= self.bits[bit] << position
+            if any(value & mask == point for mask, point in clauses):
+                return False
+        return True
+
+    def getValue(self, variable, wordsize):
+        value = 0
+        for bit in range(wordsize):
+            value |= self.bits[(variable, bit)] << bit
+        return value
+
+    def parseClauses(self, line):
+        """
+        Returns the bits of an S-box and its clauses, where a clause
+        excludes the values with value & mask == point.
+        """
+        positions = {}
+        clauses = []
+        mask, point = 0, 0
+        for separator, negated, variable, index in LITERALS.findall(line):
+            if separator:
+                clauses.append((mask, point))
+                mask, point = 0, 0
+                continue
+            position = positions.setdefault((variable, int(index)), len(positions))
+            mask |= 1 << position
+            point |= (1 << position) if negated else 0
+        clauses.append((mask, point))
+        return sorted(positions, key=positions.get), clauses
+
+    def take(self, expected=None):
+        token = self.tokens[self.index]
+        assert expected is None or token == expected, (expected, token)
+        self.index += 1
+        return token
+
+    def parseConcat(self):
+        """
+        Returns the bits of an expression (LSB first) as (constant, bits).
+        """
+        bits = self.parseAtom()
+        while self.index < len(self.tokens) and self.tokens[self.index] == "@":
+            self.take()
+            bits = self.parseAtom() + bits
+        return bits
+
+    def parseAtom(self):
+        token = self.take()
+        if token.startswith("0x"):
+            return [((int(token, 16) >> bit) & 1, []) for bit in range(4 * (len(token) - 2))]
+        if token.startswith("0bin"):
+            return [(int(bit), []) for bit in token[4:][::-1]]
+        if token == "BVXOR":
+            self.take("(")
+            left = self.parseConcat()
+            self.take(",")
+            right = self.parseConcat()
+            self.take(")")
+            return [(a[0] ^ b[0], a[1] + b[1]) for a, b in zip(left, right)]
+        if self.index == len(self.tokens) or self.tokens[self.index] != "[":
+            return [(0, [(token, bit)]) for bit in range(self.widths[token])]
+        self.take("[")
+        high = int(self.take())
+        self.take(":")
+        low = int(self.take())
+        self.take("]")
+        return [(0, [(token, bit)]) for bit in range(low, high + 1)]
+
+
+def getProbabilityOneDifferentials(cipher, wordsize):
+    """
+    Returns the one-round (input, output) differences of weight 0 in the
+    model for a single active nibble in the input.
+    """
+    model = LinearModel(getModel(cipher, wordsize, 1))
+    # S-box outputs, weights and key differences are zero
+    zero = [variable for variable in model.getVariables() if re.match(r"[SwK]\d+$", variable)]
+    differentials = []
+    for nibble in range(wordsize // 4):
+        difference = 0xB << (4 * nibble)
+        known = {(variable, bit): 0 for variable in zero for bit in range(wordsize)}
+        known.update({("X0", bit): (difference >> bit) & 1 for bit in range(wordsize)})
+        if model.solve(known) and model.isValid():
+            differentials.append((difference, model.getValue("X1", wordsize)))
+    return differentials
+
+
+def encrypt(ref, state, keys):
+    for key in keys:
+        state = ref.encryptRound(state, key)
+    return state
+
+
+def toHex(value):
+    return "{:x}".format(value)
+
+
+@unittest.skipIf(np is None, "numpy is not installed")
+class ReferenceTest(unittest.TestCase):
+
+    def getCiphers(self):
+        ciphers = [(warp.WarpCipher(), 128), (twine.TwineCipher(), 64),
+                   (lblocks.LBlockSCipher(), 64), (slim.Slim(), 32)]
+        for cipher in gfn.loadSpecs(reserved={"warp": None, "twine": None}).values():
+            if cipher.getReference() is not None:
+                ciphers.append((cipher, 4 * len(cipher.getPerm())))
+        return ciphers
+
+    def testProbabilityOne(self):
+        rng = np.random.default_rng(0)
+        for cipher, wordsize in self.getCiphers():
+            ref = cipher.getReference()
+            differentials = getProbabilityOneDifferentials(cipher, wordsize)
+            # Exactly the nibbles which are not an S-box input
+            self.assertEqual(len(differentials), ref.nibbles // 2, cipher.name)
+
+            keys = reference.randomKeys(rng, ref, 1)
+            state = reference.randomState(rng, ref, 64)
+            for input, output in differentials:
+                other = state ^ reference.toNibbles(toHex(input), ref.nibbles)
+                difference = encrypt(ref, state, keys) ^ encrypt(ref, other, keys)
+                expected = reference.toNibbles(toHex(output), ref.nibbles)
+                self.assertTrue((difference == expected).all(),
+                                (cipher.name, toHex(input), toHex(output)))
+
+    def testDecryption(self):
+        rng = np.random.default_rng(2)
+        for cipher, wordsize in self.getCiphers():
+            ref = cipher.getReference()
+            keys = reference.randomKeys(rng, ref, 3)
+            state = reference.randomState(rng, ref, 64)
+            decrypted = encrypt(ref, state, keys)
+            for key in keys[::-1]:
+                decrypted = ref.decryptRound(decrypted, key)
+            self.assertTrue((decrypted == state).all(), cipher.name)
+
+    def testBitsliced(self):
+        rng = np.random.default_rng(1)
+        for cipher, wordsize in self.getCiphers():
+            ref = reference.BitslicedReference(cipher.getReference())
+            keys = reference.randomKeys(rng, ref.ref, 3)
+            state = reference.randomState(rng, ref.ref, 64)
+            expected = encrypt(ref.ref, state, keys)
+
+            planes = [np.packbits((state[b // 4] >> (b % 4)) & 1, bitorder="little").view(np.uint64)
+                      for b in range(ref.bits)]
+            planes = ref.apply(planes, ref.compileEncryption(keys))
+            for b in range(ref.bits):
+                bits = np.unpackbits(planes[b].view(np.uint8), bitorder="little")
+                self.assertTrue((bits == (expected[b // 4] >> (b % 4)) & 1).all(), cipher.name)
+
+    def testTwineVector(self):
+        # TWINE-80 test vector of the specification
+        ref = twine.TwineCipher().getReference()
+        sbox = twine.TwineCipher().getSbox()
+        key = [(0x00112233445566778899 >> (4 * (19 - i))) & 0xF for i in range(20)]
+        keys = []
+        constant = 0x01
+        while True:
+            keys.append(np.array([key[j] for j in [1, 3, 4, 6, 13, 14, 15, 16]],
+                                 dtype=np.uint8).reshape(8, 1))
+            if len(keys) == 36:
+                break
+            key[1] ^= sbox[key[0]]
+            key[4] ^= sbox[key[16]]
+            key[7] ^= constant >> 3
+            key[19] ^= constant & 0x7
+            key[0:4] = key[1:4] + key[0:1]
+            key = key[4:] + key[:4]
+            constant = ((constant << 1) ^ (0x43 if constant & 0x20 else 0)) & 0x3F
+
+        # Nibble j is X_j, the last round has no permutation
+        state = np.array([(0x0123456789ABCDEF >> (4 * (15 - j))) & 0xF for j in range(16)],
+                         dtype=np.uint8).reshape(16, 1)
+        state = encrypt(ref, state, keys)[ref.perm]
+        self.assertEqual("".join("{:X}".format(int(value)) for value in state[:, 0]),
+                         "7C1F0F80B1DF9C28")
+
+
+if __name__ == "__main__":
+    unittest.main()
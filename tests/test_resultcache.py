@@ -0,0 +1,105 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the keys and the eviction of the result cache.
+'''
+
+from cryptanalysis import resultcache
+
+import os
+import shutil
+import tempfile
+import unittest
+
+MODEL = """% Input File for STP
+X0,X1: BITVECTOR(16);
+ASSERT(X1 = BVXOR(X0, 0x0001));
+ASSERT(NOT(X0 = 0x0000));
+QUERY(FALSE);
+"""
+
+
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parameters = {"cachedir": os.path.join(self.directory, "cache"),
+                           "resultcachesize": 1,
+                           "resultCache": {"hits": 0, "misses": 0, "saved": 0}}
+        resultcache.cacheSizes.clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def writeModel(self, name, model):
+        stp_file = os.path.join(self.directory, name)
+        with open(stp_file, "w") as model_file:
+            model_file.write(model)
+        return stp_file
+
+    def testModelHash(self):
+        key = resultcache.getModelHash(self.writeModel("a.stp", MODEL), "solve")
+
+        # Comments, whitespace and the order of the lines are not part of the key
+        lines = MODEL.replace("% Input File for STP", "% WARP rounds=4").splitlines()
+        same = "\n".join([lines[0], lines[1], lines[3], "  " + lines[2].replace(" ", "   "), lines[4]])
+        self.assertEqual(resultcache.getModelHash(self.writeModel("b.stp", same), "solve"), key)
+
+        # Different constraints or result types are
+        other = MODEL.replace("0x0001", "0x0002")
+        self.assertNotEqual(resultcache.getModelHash(self.writeModel("c.stp", other), "solve"), key)
+        self.assertNotEqual(resultcache.getModelHash(self.writeModel("d.stp", MODEL), "count-16"), key)
+
+    def testCached(self):
+        stp_file = self.writeModel("a.stp", MODEL)
+        calls = []
+
+        def solve():
+            calls.append(stp_file)
+            return {"result": "Valid."}
+
+        self.assertEqual(resultcache.cached(self.parameters, stp_file, "solve", solve)["result"], "Valid.")
+        self.assertEqual(resultcache.cached(self.parameters, stp_file, "solve", solve)["result"], "Valid.")
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(self.parameters["resultCache"]["hits"], 1)
+        self.assertEqual(self.parameters["resultCache"]["misses"], 1)
+
+        # A partially written entry is a miss and is solved again
+        key = resultcache.getModelHash(stp_file, "solve")
+        with open(resultcache.getEntryFile(self.parameters, key), "w") as entry_file:
+            entry_file.write('{"result": ')
+        resultcache.cached(self.parameters, stp_file, "solve", solve)
+        self.assertEqual(len(calls), 2)
+
+        # Nothing is cached without a cache size
+        self.parameters["resultcachesize"] = 0
+        resultcache.cached(self.parameters, stp_file, "solve", solve)
+        self.assertEqual(len(calls), 3)
+
+    def testEviction(self):
+        # Entries of about 100 kB in a cache of 1 MB
+        keys = ["{:02x}{}".format(index, "0" * 62) for index in range(12)]
+        for index, key in enumerate(keys[:9]):
+            resultcache.store(self.parameters, key, {"result": "x" * 100000}, 1)
+            os.utime(resultcache.getEntryFile(self.parameters, key), (index, index))
+        # Hits are recently used
+        self.assertIsNotNone(resultcache.lookup(self.parameters, keys[0]))
+
+        for key in keys[9:]:
+            resultcache.store(self.parameters, key, {"result": "x" * 100000}, 1)
+        entries, total = resultcache.getEntries(resultcache.getCacheDir(self.parameters))
+        self.assertLessEqual(total, 2**20)
+
+        # The least recently used entries are evicted first
+        remaining = [key for key in keys
+                     if os.path.exists(resultcache.getEntryFile(self.parameters, key))]
+        self.assertIn(keys[0], remaining)
+        self.assertIn(keys[-1], remaining)
+        self.assertNotIn(keys[1], remaining)
+        self.assertEqual(remaining, [keys[0]] + keys[len(keys) - len(remaining) + 1:])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the solver portfolio with scripts in place of the solvers.
+'''
+
+from cryptanalysis import solvers
+
+import json
+import os
+import shutil
+import stat
+import tempfile
+import time
+import unittest
+
+# Writes its pid to <model>.<option>.pid, then sleeps and answers as
+# given by the options: --fast, --slow or --fail
+FAKE_STP = """#!/bin/sh
+model=$1
+for option in "$@"; do
+    case $option in
+        --exit-after-CNF) echo "p cnf 1 1" > output_0.cnf; exit 0;;
+        --fast) echo $$ > $model.fast.pid; sleep 0.2; echo "ASSERT( X0 = 0x0001 );"; exit 0;;
+        --slow) echo $$ > $model.slow.pid; sleep 60; echo "ASSERT( X0 = 0x0002 );"; exit 0;;
+        --fail) exit 1;;
+        --cryptominisat) echo "ASSERT( X0 = 0x0003 );"; exit 0;;
+    esac
+done
+exit 1
+"""
+
+FAKE_CRYPTOMINISAT = """#!/bin/sh
+case $4 in
+    1) echo "s UNSATISFIABLE"; exit 20;;
+    2) echo "s SATISFIABLE"; exit 10;;
+esac
+exit 1
+"""
+
+
+class PortfolioTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.paths = (solvers.PATH_STP, solvers.PATH_CRYPTOMINISAT)
+        self.configurations = solvers.SOLVER_CONFIGURATIONS
+        solvers.PATH_STP = self.writeScript("stp", FAKE_STP)
+        solvers.PATH_CRYPTOMINISAT = self.writeScript("cryptominisat5", FAKE_CRYPTOMINISAT)
+        solvers.SOLVER_CONFIGURATIONS = dict(self.configurations)
+        solvers.SOLVER_CONFIGURATIONS.update({"fast": ("stp", ["--fast"]),
+                                              "slow": ("stp", ["--slow"]),
+                                              "fail": ("stp", ["--fail"])})
+        self.stp_file = os.path.join(self.directory, "model.stp")
+        with open(self.stp_file, "w") as stp_file:
+            stp_file.write("QUERY(FALSE);\n")
+
+    def tearDown(self):
+        solvers.PATH_STP, solvers.PATH_CRYPTOMINISAT = self.paths
+        solvers.SOLVER_CONFIGURATIONS = self.configurations
+        shutil.rmtree(self.directory)
+
+    def writeScript(self, name, content):
+        path = os.path.join(self.directory, name)
+        with open(path, "w") as script:
+            script.write(content)
+        os.chmod(path, os.stat(path).st_mode | stat.S_IEXEC)
+        return path
+
+    def getParameters(self, portfolio):
+        return {"portfolio": portfolio, "portfoliosize": 0, "cipher": "warp", "rounds": 4,
+                "cachedir": os.path.join(self.directory, "cache")}
+
+    def isRunning(self, option):
+        with open("{}.{}.pid".format(self.stp_file, option), "r") as pid_file:
+            pid = int(pid_file.read())
+        # Killed processes may not have been reaped yet
+        try:
+            with open("/proc/{}/stat".format(pid), "r") as stat_file:
+                return stat_file.read().split(")")[-1].split()[0] != "Z"
+        except FileNotFoundError:
+            return False
+
+    def testFirstResultWins(self):
+        parameters = self.getParameters(["slow", "fail", "fast"])
+        start_time = time.time()
+        result, configuration = solvers.solvePortfolio(self.stp_file, parameters)
+        self.assertEqual(configuration, "fast")
+        self.assertIn("0x0001", result)
+        self.assertLess(time.time() - start_time, 30)
+
+        # The slower solver is killed with its worker
+        self.assertFalse(self.isRunning("slow"))
+
+        with open(os.path.join(parameters["cachedir"], "portfolio.json"), "r") as input_file:
+            statistics = json.load(input_file)["warp-4"]
+        self.assertEqual(statistics["fast"]["wins"], 1)
+        self.assertEqual(statistics["slow"], {"runs": 1, "wins": 0, "time": 0})
+        self.assertEqual(solvers.getPortfolioOrder(parameters)[0], "fast")
+
+    def testCryptoMiniSatSeeds(self):
+        parameters = self.getParameters(["slow", "cms-r1"])
+        result, configuration = solvers.solvePortfolio(self.stp_file, parameters)
+        self.assertEqual((result, configuration), ("Valid.\n", "cms-r1"))
+        self.assertFalse(self.isRunning("slow"))
+
+    def testAllFailed(self):
+        with self.assertRaises(RuntimeError):
+            solvers.solvePortfolio(self.stp_file, self.getParameters(["fail"]))
+
+    def testCryptoMiniSat(self):
+        # Unsatisfiable models are answered by CryptoMiniSat alone
+        self.assertEqual(solvers.solveCryptoMiniSat(self.stp_file, ["--random", "1"]), "Valid.\n")
+        # Satisfiable models are solved again by STP for the counterexample
+        self.assertIn("0x0003", solvers.solveCryptoMiniSat(self.stp_file, ["--random", "2"]))
+        # No CNF is left behind
+        self.assertEqual(sorted(os.listdir(self.directory)), ["cryptominisat5", "model.stp", "stp"])
+
+
+if __name__ == "__main__":
+    unittest.main()
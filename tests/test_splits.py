@@ -0,0 +1,116 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the round split search with a fake solver for the bounds and a
+fake boomerang search, whose probability is 2 below the estimate of the
+split.
+'''
+
+from cryptanalysis import boomerang, bounds, splits, warmstart
+
+import os
+import shutil
+import tempfile
+import unittest
+
+# Exact lower bounds for 1 to 4 rounds
+BOUNDS = {1: 2, 2: 6, 3: 12, 4: 20}
+
+
+class Cipher(object):
+
+    name = "fake"
+
+    def createSTP(self, stp_file, parameters):
+        with open(stp_file, "w") as model_file:
+            model_file.write("% rounds={} weight={}\n".format(parameters["rounds"],
+                                                               parameters["sweight"]))
+        return
+
+
+def solveWarm(stp_file, parameters, hint):
+    if parameters["sweight"] >= BOUNDS[parameters["rounds"]]:
+        return "Invalid.", "stp"
+    return "Valid.", "stp"
+
+
+def computeBoomerang(cipher, parameters):
+    weight = BOUNDS[parameters["uppertrail"]] + BOUNDS[parameters["lowertrail"]]
+    parameters["boomerangResult"] = {"probability": -2 * weight - 2}
+    return
+
+
+class SplitsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parameters = {"rounds": 5, "wordsize": 16, "timelimit": 60, "workers": 1,
+                           "splitslack": None, "bestProbability": None, "resultstore": False,
+                           "endweight": 100, "warmstart": False, "keepworkspace": False,
+                           "tmpdir": self.directory, "cachedir": os.path.join(self.directory, "cache"),
+                           "boomerangVariables": {}, "clusterStatistics": {}, "modelStatistics": {},
+                           "solverCalls": [], "pruning": {"pruned": 0, "saved": 0},
+                           "resultCache": {"hits": 0, "misses": 0, "saved": 0},
+                           "warmStart": {"warm": 0, "cold": 0}, "weightSearch": {"calls": 0, "time": 0},
+                           "cnfCache": {"translated": 0, "reused": 0},
+                           "solverTime": {"calls": 0, "time": 0}}
+        self.computeBoomerang = boomerang.computeFeistelBoomerangDifferential
+        self.solveWarm = warmstart.solveWarm
+        boomerang.computeFeistelBoomerangDifferential = computeBoomerang
+        warmstart.solveWarm = solveWarm
+
+    def tearDown(self):
+        boomerang.computeFeistelBoomerangDifferential = self.computeBoomerang
+        warmstart.solveWarm = self.solveWarm
+        shutil.rmtree(self.directory)
+
+    def storeBounds(self):
+        for rounds, weight in BOUNDS.items():
+            bounds.storeBound(self.parameters, "fake-16", rounds, weight, True)
+        return
+
+    def testEstimates(self):
+        candidates = [{"uppertrail": upper, "lowertrail": 5 - upper} for upper in range(1, 5)]
+        # Without cached bounds, the bounds of more rounds follow from the
+        # smaller ones
+        bounds.storeBound(self.parameters, "fake-16", 1, 2, False)
+        self.assertEqual(bounds.getCachedBound(Cipher(), self.parameters, 4), 8)
+        splits.updateEstimates(Cipher(), self.parameters, candidates)
+        self.assertEqual([split["bound"] for split in candidates], [-20, -20, -20, -20])
+
+        self.storeBounds()
+        self.parameters["splitslack"] = 3
+        splits.updateEstimates(Cipher(), self.parameters, candidates)
+        self.assertEqual([(split["uppertrail"], split["bound"]) for split in candidates],
+                         [(2, -33), (3, -33), (1, -41), (4, -41)])
+
+    def testIsBeaten(self):
+        split = {"bound": -40}
+        # Without splitslack no split is abandoned
+        self.assertFalse(splits.isBeaten(self.parameters, split, {"probability": -30}))
+        self.parameters["splitslack"] = 0
+        self.assertFalse(splits.isBeaten(self.parameters, split, None))
+        self.assertFalse(splits.isBeaten(self.parameters, split, {"probability": -40}))
+        self.assertTrue(splits.isBeaten(self.parameters, split, {"probability": -39}))
+
+    def testBestRoundSplit(self):
+        leader = splits.findBestRoundSplit(Cipher(), self.parameters)
+        self.assertEqual((leader["uppertrail"], leader["probability"]), (2, -38))
+        self.assertEqual(self.parameters["bestProbability"], -38)
+        # The workers computed the bounds of their splits
+        self.assertEqual(bounds.loadBounds(self.parameters)["fake-16"],
+                         {str(rounds): {"weight": weight, "exact": True}
+                          for rounds, weight in BOUNDS.items()})
+
+    def testAbandon(self):
+        self.storeBounds()
+        self.parameters["splitslack"] = 0
+        self.assertEqual(splits.findBestRoundSplit(Cipher(), self.parameters)["uppertrail"], 2)
+        # 1-4 and 4-1 can not reach -38 and are never started
+        self.assertEqual(sorted(os.listdir(self.directory)), ["cache", "split-2-3", "split-3-2"])
+
+
+if __name__ == "__main__":
+    unittest.main()
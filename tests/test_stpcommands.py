@@ -0,0 +1,247 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the S-box clauses and the weight encodings, the generated
+expressions are evaluated on all (or random) assignments.
+'''
+
+from parser import stpcommands
+
+import io
+import itertools
+import random
+import re
+import unittest
+
+SBOXES = {"warp": [0xC, 0xA, 0xD, 0x3, 0xE, 0xB, 0xF, 0x7, 0x8, 0x9, 0x1, 0x5, 0x0, 0x2, 0x4, 0x6],
+          "twine": [0xC, 0x0, 0xF, 0xA, 0x2, 0xB, 0x9, 0x5, 0x8, 0x3, 0xD, 0x7, 0x1, 0xE, 0x6, 0x4],
+          "present": [0xC, 0x5, 0x6, 0xB, 0x9, 0x0, 0xA, 0xD, 0x3, 0xE, 0xF, 0x8, 0x4, 0x7, 0x1, 0x2]}
+
+TOKENS = re.compile(r"\s*(0bin[01]+|0b[01]+|<<|[A-Za-z_][A-Za-z0-9_]*|\d+|[\[\]():@|&~=,])")
+
+
+class Evaluator(object):
+    """
+    Evaluates the subset of the CVC language written by the weight
+    encodings. Values are (value, width).
+    """
+
+    def __init__(self, env):
+        self.env = env
+
+    def run(self, model):
+        """
+        Defines the asserted variables in order and returns the values of
+        the remaining asserts.
+        """
+        results = []
+        for line in model.splitlines():
+            line = line.strip()
+            if not line.startswith("ASSERT("):
+                continue
+            body = line[len("ASSERT("):-len(");")]
+            if body.startswith("(") and body.endswith(")"):
+                body = body[1:-1]
+            match = re.match(r"(\w+) = (.*)$", body)
+            if match and match.group(1) not in self.env:
+                self.env[match.group(1)] = self.evaluate(match.group(2))
+            else:
+                results.append(self.evaluate(body)[0])
+        return results
+
+    def evaluate(self, text):
+        self.tokens = TOKENS.findall(text)
+        self.index = 0
+        value = self.parseEquality()
+        assert self.index == len(self.tokens), text
+        return value
+
+    def peek(self):
+        return self.tokens[self.index] if self.index < len(self.tokens) else None
+
+    def take(self, expected=None):
+        token = self.tokens[self.index]
+        assert expected is None or token == expected, (expected, token)
+        self.index += 1
+        return token
+
+    def parseEquality(self):
+        value = self.parseOr()
+        if self.peek() == "=":
+            self.take()
+            other = self.parseOr()
+            return int(value[0] == other[0]), 1
+        return value
+
+    def parseOr(self):
+        value = self.parseConcat()
+        while self.peek() in ["|", "&"]:
+            operator = self.take()
+            other = self.parseConcat()
+            result = value[0] | other[0] if operator == "|" else value[0] & other[0]
+            value = result, max(value[1], other[1])
+        return value
+
+    def parseConcat(self):
+        value = self.parseShift()
+        while self.peek() == "@":
+            self.take()
+            other = self.parseShift()
+            value = (value[0] << other[1]) | other[0], value[1] + other[1]
+        return value
+
+    def parseShift(self):
+        value = self.parseUnary()
+        while self.peek() == "<<":
+            self.take()
+            shift = int(self.take())
+            value = value[0] << shift, value[1] + shift
+        return value
+
+    def parseUnary(self):
+        if self.peek() == "~":
+            self.take()
+            value, width = self.parseUnary()
+            return ~value & ((1 << width) - 1), width
+        value = self.parseAtom()
+        while self.peek() == "[":
+            self.take()
+            high = int(self.take())
+            self.take(":")
+            low = int(self.take())
+            self.take("]")
+            value = (value[0] >> low) & ((1 << (high - low + 1)) - 1), high - low + 1
+        return value
+
+    def parseAtom(self):
+        token = self.take()
+        if token == "(":
+            value = self.parseEquality()
+            self.take(")")
+            return value
+        if token.startswith("0bin"):
+            return int(token[4:], 2), len(token) - 4
+        if token.startswith("0b"):
+            return int(token[2:], 2), len(token) - 2
+        if token == "IF":
+            condition = self.parseEquality()
+            self.take("THEN")
+            value = self.parseEquality()
+            self.take("ELSE")
+            other = self.parseEquality()
+            self.take("ENDIF")
+            return value if condition[0] else other
+        if token == "BVPLUS":
+            self.take("(")
+            width = int(self.take())
+            total = 0
+            while self.peek() == ",":
+                self.take()
+                total += self.parseEquality()[0]
+            self.take(")")
+            return total % (1 << width), width
+        return self.env[token]
+
+
+def getClauses(command):
+    """
+    Returns the clauses of an S-box assert as lists of (variable, negated).
+    """
+    clauses = []
+    for clause in re.findall(r"\(([^()]*)\)", command):
+        clauses.append([(literal.strip().lstrip("~"), literal.strip().startswith("~"))
+                        for literal in clause.split("|")])
+    return clauses
+
+
+def getSolutions(clauses, variables):
+    """
+    Returns the assignments of the 12 variables (MSB first) which satisfy
+    all clauses. A clause excludes the cube where all its literals are
+    false.
+    """
+    excluded = set()
+    for clause in clauses:
+        mask = 0
+        point = 0
+        for variable, negated in clause:
+            bit = 1 << (11 - variables.index(variable))
+            mask |= bit
+            point |= bit if negated else 0
+        free = [1 << i for i in range(12) if not mask & (1 << i)]
+        for bits in itertools.product([0, 1], repeat=len(free)):
+            excluded.add(point | sum(bit for bit, set_bit in zip(free, bits) if set_bit))
+    return set(range(1 << 12)) - excluded
+
+
+class SboxTest(unittest.TestCase):
+
+    def testCompactClauses(self):
+        variables = ["v{}".format(i) for i in range(12)]
+        for name, sbox in SBOXES.items():
+            full = getSolutions(getClauses(stpcommands.add4bitSbox(sbox, variables)), variables)
+            compact = getSolutions(getClauses(stpcommands.add4bitSboxCompact(sbox, variables)),
+                                   variables)
+            self.assertEqual(full, compact, name)
+
+            # Exactly the transitions of the DDT with their weight
+            ddt = [[0] * 16 for i in range(16)]
+            for a, b in itertools.product(range(16), repeat=2):
+                ddt[a ^ b][sbox[a] ^ sbox[b]] += 1
+            weights = {2: 0b0111, 4: 0b0011, 8: 0b0001, 16: 0b0000}
+            valid = set((a << 8) | (b << 4) | weights[ddt[a][b]]
+                        for a, b in itertools.product(range(16), repeat=2) if ddt[a][b])
+            self.assertEqual(compact, valid, name)
+
+
+class WeightEncodingTest(unittest.TestCase):
+
+    def testCardinality(self):
+        generator = random.Random(0)
+        for encoding in ["sequential", "totalizer"]:
+            for trial in range(200):
+                wordsize = generator.randint(1, 6)
+                ignored = generator.randint(0, wordsize - 1)
+                bound = generator.randint(0, 10)
+                env = {"w{}".format(i): (generator.getrandbits(wordsize), wordsize)
+                       for i in range(generator.randint(1, 3))}
+                weight = sum(bin(value & ((1 << (wordsize - ignored)) - 1)).count("1")
+                             for value, width in env.values())
+
+                command = stpcommands.getCardinalityString(sorted(env), wordsize, bound,
+                                                           ignored, "weight", encoding)
+                Evaluator(env).run(command)
+                self.assertEqual(env["WeightCount"][0], (1 << min(weight, bound + 1)) - 1)
+                self.assertEqual(env["WeightLE"][0], int(weight <= bound))
+
+    def testWeightComputation(self):
+        generator = random.Random(1)
+        for encoding in ["bvplus", "sequential", "totalizer"]:
+            for trial in range(100):
+                env = {"w{}".format(i): (generator.getrandbits(8) & generator.getrandbits(8), 8)
+                       for i in range(3)}
+                weight = sum(bin(value).count("1") for value, width in env.values())
+                bound = generator.randint(max(weight - 2, 0), weight + 2)
+
+                model = io.StringIO()
+                stpcommands.setupWeightComputation(model, bound, sorted(env), 8, 0, encoding)
+                results = Evaluator(env).run(model.getvalue())
+                # weight is the weight of the trail, not the bound
+                self.assertEqual(env["weight"][0], weight)
+                self.assertEqual(all(results), weight == bound, (encoding, weight, bound))
+
+    def testZeroMSBs(self):
+        # Bits asserted to be zero elsewhere are only left out of the counters
+        model = io.StringIO()
+        stpcommands.setupWeightComputation(model, 3, ["w0"], 8, encoding="bvplus", zeroMSBs=4)
+        self.assertIn("w0[7:7]", model.getvalue())
+        model = io.StringIO()
+        stpcommands.setupWeightComputation(model, 3, ["w0"], 8, encoding="sequential", zeroMSBs=4)
+        counter = model.getvalue().split("\n", 2)[2]
+        self.assertNotIn("w0[7:7]", counter)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the merging of the trace parts of the search and its workers.
+'''
+
+from cryptanalysis import processes, trace
+
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+
+
+@trace.traced
+def search():
+    with trace.span("solver", model="model.stp"):
+        pass
+    return
+
+
+def runWorker(parameters):
+    with processes.workerOutput(parameters, "worker", group=False):
+        search()
+    return
+
+
+class TraceTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.parameters = {"trace": os.path.join(self.directory, "trace.json"),
+                           "tmpdir": os.path.join(self.directory, "worker"), "resultstore": False}
+
+    def tearDown(self):
+        trace.tracefile = None
+        trace.owner = None
+        trace.events.clear()
+        shutil.rmtree(self.directory)
+
+    def testDisabled(self):
+        self.assertIs(trace.span("solver"), trace.NULL_SPAN)
+        search()
+        trace.finish()
+        self.assertEqual(trace.events, {})
+        self.assertFalse(os.path.exists(self.parameters["trace"]))
+
+    def testMerge(self):
+        trace.start(self.parameters)
+        search()
+        worker = multiprocessing.Process(target=runWorker, args=(self.parameters,))
+        worker.start()
+        worker.join()
+        # The last line of a killed worker is incomplete
+        parts = trace.getPartsDir()
+        with open(os.path.join(parts, "1.jsonl"), "w") as part_file:
+            part_file.write('{"name": "search", "ph": "X"')
+
+        trace.finish()
+        with open(self.parameters["trace"], "r") as trace_file:
+            events = json.load(trace_file)["traceEvents"]
+        self.assertFalse(os.path.exists(parts))
+
+        # Each process has its name, the traced function and its span
+        spansByProcess = {}
+        for event in events:
+            spansByProcess.setdefault(event["pid"], []).append(event["name"])
+        self.assertEqual(sorted(spansByProcess.values()),
+                         [["process_name", "solver", "search"]] * 2)
+        names = sorted(event["args"]["name"].split()[0] for event in events
+                       if event["name"] == "process_name")
+        self.assertEqual(names, ["search", "worker"])
+        spans = [event for event in events if event["name"] == "solver"]
+        self.assertEqual(spans[0]["args"], {"model": "model.stp"})
+        self.assertTrue(all(event["dur"] >= 0 for event in spans))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the warm start with a fake solver.
+'''
+
+from cryptanalysis import solvers, warmstart
+
+import os
+import shutil
+import tempfile
+import unittest
+
+
+class Characteristic(object):
+
+    def __init__(self, words):
+        self.characteristic_data = words
+
+
+class WarmStartTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.stp_file = os.path.join(self.directory, "model.stp")
+        with open(self.stp_file, "w") as stp_file:
+            stp_file.write("QUERY(FALSE);\n")
+        self.models = []
+        self.solveModel = solvers.solveModel
+        solvers.solveModel = self.solve
+        self.parameters = {"warmstart": True, "warmHints": {}, "rounds": 2, "sweight": 4,
+                           "fixedVariables": {}, "tmpdir": self.directory,
+                           "keepworkspace": False, "solverCalls": [],
+                           "warmStart": {"warm": 0, "hits": 0, "warmTime": 0, "warmConflicts": 0,
+                                         "skipped": 0, "cold": 0, "coldTime": 0,
+                                         "coldConflicts": 0}}
+        self.satisfiable = {"warm": False, "cold": True}
+
+    def tearDown(self):
+        solvers.solveModel = self.solveModel
+        shutil.rmtree(self.directory)
+
+    def solve(self, stp_file, parameters):
+        with open(stp_file, "r") as model_file:
+            kind = "warm" if "ASSERT" in model_file.read() else "cold"
+        self.models.append(kind)
+        parameters["solverCalls"].append({"conflicts": 10 if kind == "warm" else 100})
+        return "Invalid." if self.satisfiable[kind] else "Valid.", "stp"
+
+    def recordHint(self, weight):
+        warmstart.recordHint(self.parameters, "upper", Characteristic(
+            {"X0": "0x1", "X1": "0x2", "X2": "0x4", "w0": "0x0"}), 2, weight)
+
+    def testHit(self):
+        self.satisfiable["warm"] = True
+        self.recordHint(4)
+        warmstart.solveWarm(self.stp_file, self.parameters, "upper")
+        self.assertEqual(self.models, ["warm"])
+        self.assertEqual(self.parameters["warmStart"]["hits"], 1)
+        self.assertEqual(self.parameters["warmStart"]["warmConflicts"], 10)
+
+    def testBelowHintWeight(self):
+        # Below the weight of the hint the full model has no solution either
+        self.recordHint(6)
+        warmstart.solveWarm(self.stp_file, self.parameters, "upper")
+        self.assertEqual(self.models, ["cold"])
+        self.assertEqual(self.parameters["warmStart"]["skipped"], 1)
+        self.assertEqual(self.parameters["warmStart"]["coldConflicts"], 100)
+
+    def testFailedOnce(self):
+        self.recordHint(4)
+        for weight in [4, 5]:
+            self.parameters["sweight"] = weight
+            warmstart.solveWarm(self.stp_file, self.parameters, "upper")
+        # The restricted model is not tried again after it failed
+        self.assertEqual(self.models, ["warm", "cold", "cold"])
+        self.assertEqual(self.parameters["warmStart"]["warmConflicts"], 10)
+        self.assertEqual(self.parameters["warmStart"]["coldConflicts"], 200)
+
+        # A new hint is tried again
+        self.recordHint(5)
+        warmstart.solveWarm(self.stp_file, self.parameters, "upper")
+        self.assertEqual(self.models[3:], ["warm", "cold"])
+
+    def testConstraints(self):
+        self.recordHint(4)
+        hint = self.parameters["warmHints"]["upper"]
+        self.assertEqual(warmstart.getHintConstraints(self.parameters, hint),
+                         "ASSERT(X0 = 0x1);\nASSERT(X1 = 0x2);\n")
+        # The half next to the fixed end
+        self.parameters["fixedVariables"] = {"X2": "0x4"}
+        self.assertEqual(warmstart.getHintConstraints(self.parameters, hint), "ASSERT(X1 = 0x2);\n")
+        # A hint for another fixed difference is not used
+        self.parameters["fixedVariables"] = {"X2": "0x8"}
+        self.assertEqual(warmstart.getHintConstraints(self.parameters, hint), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
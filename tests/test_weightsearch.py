@@ -0,0 +1,105 @@
+'''
+Created on Oct 19, 2026
+
+@author: jesenteh
+
+Tests for the range models and the weight search strategies.
+'''
+
+from cryptanalysis import weightsearch
+from parser import stpcommands
+
+import io
+import unittest
+from unittest import mock
+
+
+def getModel(weight, encoding):
+    """
+    Returns the weight computation for weight as written by the ciphers.
+    """
+    model = io.StringIO()
+    stpcommands.setupWeightComputation(model, weight, ["w0", "w1"], 4, 0, encoding)
+    return model.getvalue() + "QUERY(FALSE);\n"
+
+
+class RangeModelTest(unittest.TestCase):
+
+    def testBVPlus(self):
+        model = weightsearch.getRangeModel(getModel(5, "bvplus"), 2, 5)
+        self.assertNotIn("ASSERT(weight = 0b0000000000000101);", model)
+        self.assertIn("ASSERT(BVLE(weight, 0b0000000000000101));", model)
+        self.assertIn("ASSERT(BVGE(weight, 0b0000000000000010));", model)
+        self.assertTrue(model.endswith("QUERY(FALSE);\n"))
+
+    def testCardinality(self):
+        for encoding in ["sequential", "totalizer"]:
+            model = weightsearch.getRangeModel(getModel(5, encoding), 2, 5)
+            self.assertNotIn("ASSERT(weight = 0b0000000000000101);", model)
+            # The weight is the sum in every encoding, the counter bounds it
+            self.assertIn("ASSERT((weight = BVPLUS(16,", model)
+            self.assertIn("ASSERT(WeightLE = 0bin1);", model)
+            self.assertIn("ASSERT(BVGE(weight, 0b0000000000000010));", model)
+
+
+class StrategyTest(unittest.TestCase):
+
+    def getSolver(self, minimum, exact):
+        """
+        Returns a fake solveRange for trails from weight minimum on. With
+        exact the weight of the solution is known (bvplus), otherwise only
+        the upper end of the range.
+        """
+        calls = []
+
+        def solveRange(parameters, createModel, lower, upper):
+            calls.append((lower, upper))
+            # Weights below lower must have been proven infeasible
+            self.assertLessEqual(lower, minimum)
+            if upper < minimum:
+                return False, None
+            return True, max(lower, minimum) if exact else upper
+        return solveRange, calls
+
+    def search(self, strategy, minimum, start=0, endweight=64, exact=True):
+        solveRange, calls = self.getSolver(minimum, exact)
+        parameters = {"weightsearch": strategy, "sweight": start, "endweight": endweight,
+                      "timelimit": -1}
+        with mock.patch.object(weightsearch, "solveRange", solveRange):
+            weight = weightsearch.findMinimalWeight(parameters, 0, None)
+        self.assertEqual(parameters["sweight"], weight)
+        return weight, calls
+
+    def testMinimalWeight(self):
+        for strategy in ["galloping", "descending"]:
+            for exact in [True, False]:
+                for minimum in [0, 1, 2, 7, 23, 63]:
+                    weight, calls = self.search(strategy, minimum, exact=exact)
+                    self.assertEqual(weight, minimum, (strategy, exact, minimum))
+
+    def testStart(self):
+        for strategy in ["galloping", "descending"]:
+            weight, calls = self.search(strategy, 23, start=20)
+            self.assertEqual(weight, 23)
+
+    def testNoSolution(self):
+        for strategy in ["galloping", "descending"]:
+            weight, calls = self.search(strategy, 100, endweight=64)
+            self.assertEqual(weight, 64)
+
+    def testGallopingCalls(self):
+        weight, calls = self.search("galloping", 23)
+        self.assertLessEqual(len(calls), 12)
+
+    def testLinear(self):
+        weight, calls = self.search("linear", 23, start=5)
+        self.assertEqual(weight, 5)
+        self.assertEqual(calls, [])
+
+    def testUnknownStrategy(self):
+        with self.assertRaises(ValueError):
+            self.search("binary", 23)
+
+
+if __name__ == "__main__":
+    unittest.main()